@@ -0,0 +1 @@
+"""Offline performance benchmarks of dapla-toolbelt."""
@@ -0,0 +1,248 @@
+"""A local stand-in for the parts of the GCS JSON API that gcsfs uses, for offline benchmarks."""
+
+import asyncio
+import base64
+import datetime
+import hashlib
+import itertools
+import json
+import re
+import threading
+from http import HTTPStatus
+from types import TracebackType
+from typing import Any
+from typing import NamedTuple
+from urllib.parse import unquote
+
+from aiohttp import web
+
+_BUCKET = re.compile(r"/storage/v1/b/([^/]+)")
+_OBJECTS = re.compile(r"/storage/v1/b/([^/]+)/o")
+_OBJECT = re.compile(r"/storage/v1/b/([^/]+)/o/(.+)")
+_DOWNLOAD = re.compile(r"/download/storage/v1/b/([^/]+)/o/(.+)")
+_UPLOAD = re.compile(r"/upload/storage/v1/b/([^/]+)/o")
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+class StoredObject(NamedTuple):
+    """An object in the fake bucket."""
+
+    data: bytes
+    generation: int
+    created: str
+    md5: str
+
+
+class FakeGCSServer:
+    """An HTTP server on localhost answering GCS JSON API requests from memory.
+
+    Supports bucket metadata, listing with prefixes, delimiters and pages, object metadata,
+    ranged downloads, multipart and resumable uploads, and deletes. Everything else gets a 501.
+    Use it as a context manager, and point gcsfs at `url` with anonymous credentials.
+    """
+
+    def __init__(self) -> None:
+        """Initialize FakeGCSServer with empty buckets."""
+        self.objects: dict[tuple[str, str], StoredObject] = {}
+        self.requests = 0
+        self._uploads: dict[str, tuple[str, str, bytearray]] = {}
+        self._generations = itertools.count(1)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+    def __enter__(self) -> "FakeGCSServer":
+        """Start serving in a background thread."""
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stop serving."""
+        asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def put(self, bucket: str, name: str, data: bytes) -> None:
+        """Store an object directly, without a request."""
+        self.objects[(bucket, name)] = StoredObject(
+            data,
+            next(self._generations),
+            datetime.datetime.now(datetime.timezone.utc).strftime(
+                "%Y-%m-%dT%H:%M:%S.%fZ"
+            ),
+            base64.b64encode(hashlib.md5(data).digest()).decode(),
+        )
+
+    def clear(self) -> None:
+        """Remove every object and reset the request counter."""
+        self.objects.clear()
+        self.requests = 0
+
+    async def _start(self) -> None:
+        app = web.Application(client_max_size=2**40)
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+
+    async def _stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        path = request.rel_url.raw_path
+        query = request.rel_url.query
+        if match := _UPLOAD.fullmatch(path):
+            return await self._upload(request, match.group(1))
+        if match := _DOWNLOAD.fullmatch(path):
+            return self._media(request, match.group(1), unquote(match.group(2)))
+        if match := _OBJECT.fullmatch(path):
+            bucket, name = match.group(1), unquote(match.group(2))
+            if request.method == "DELETE":
+                if self.objects.pop((bucket, name), None) is None:
+                    return _error(404)
+                return web.Response(status=204)
+            if request.method == "GET" and query.get("alt") == "media":
+                return self._media(request, bucket, name)
+            if request.method == "GET":
+                stored = self.objects.get((bucket, name))
+                if stored is None:
+                    return _error(404)
+                return web.json_response(_resource(bucket, name, stored))
+        if (match := _OBJECTS.fullmatch(path)) and request.method == "GET":
+            return web.json_response(self._list(match.group(1), query))
+        if (match := _BUCKET.fullmatch(path)) and request.method == "GET":
+            return web.json_response(
+                {"kind": "storage#bucket", "name": match.group(1), "versioning": {}}
+            )
+        return _error(501)
+
+    def _media(self, request: web.Request, bucket: str, name: str) -> web.Response:
+        stored = self.objects.get((bucket, name))
+        if stored is None:
+            return _error(404)
+        data = stored.data
+        match = _RANGE.fullmatch(request.headers.get("Range", ""))
+        if match is None:
+            return web.Response(body=data)
+        first, last = match.groups()
+        if not first:
+            start, end = max(len(data) - int(last), 0), len(data)
+        else:
+            start, end = int(first), min(
+                int(last) + 1 if last else len(data), len(data)
+            )
+        return web.Response(status=206, body=data[start:end])
+
+    def _list(self, bucket: str, query: Any) -> dict[str, Any]:
+        prefix = query.get("prefix", "")
+        delimiter = query.get("delimiter", "")
+        token = query.get("pageToken", "")
+        start = max(query.get("startOffset", ""), token)
+        end = query.get("endOffset")
+        max_results = int(query.get("maxResults", 1000))
+        items: list[dict[str, Any]] = []
+        prefixes: set[str] = set()
+        last = ""
+        for key in sorted(self.objects):
+            object_bucket, name = key
+            if object_bucket != bucket or not name.startswith(prefix):
+                continue
+            if name <= token or name < start or (end and name >= end):
+                continue
+            rest = name[len(prefix) :]
+            folder = None
+            if delimiter and delimiter in rest:
+                folder = prefix + rest.split(delimiter, 1)[0] + delimiter
+                if folder in prefixes:
+                    continue
+            if len(items) + len(prefixes) >= max_results:
+                return {
+                    "kind": "storage#objects",
+                    "items": items,
+                    "prefixes": sorted(prefixes),
+                    "nextPageToken": last,
+                }
+            if folder is None:
+                items.append(_resource(bucket, name, self.objects[key]))
+                last = name
+            else:
+                prefixes.add(folder)
+                # The next page starts after every object in the folder
+                last = folder + "\uffff"
+        return {"kind": "storage#objects", "items": items, "prefixes": sorted(prefixes)}
+
+    async def _upload(self, request: web.Request, bucket: str) -> web.Response:
+        query = request.rel_url.query
+        upload_type = query.get("uploadType")
+        if "upload_id" in query:
+            return await self._upload_chunk(request, query["upload_id"])
+        if upload_type == "resumable":
+            body = await request.json()
+            upload_id = str(next(self._generations))
+            self._uploads[upload_id] = (
+                bucket,
+                query.get("name") or body["name"],
+                bytearray(),
+            )
+            location = f"{self.url}/upload/storage/v1/b/{bucket}/o?uploadType=resumable&upload_id={upload_id}"
+            return web.Response(headers={"Location": location})
+        body = await request.read()
+        if upload_type == "multipart":
+            # gcsfs sends the metadata and the data as two parts separated by a fixed boundary
+            _, metadata, media = body.split(b"--==0==", 2)
+            name = json.loads(metadata.split(b"\n\n", 1)[1])["name"]
+            data = media.split(b"\n\n", 1)[1][: -len(b"\n--==0==--")]
+        else:
+            name, data = query["name"], body
+        self.put(bucket, name, data)
+        return web.json_response(_resource(bucket, name, self.objects[(bucket, name)]))
+
+    async def _upload_chunk(self, request: web.Request, upload_id: str) -> web.Response:
+        bucket, name, buffer = self._uploads[upload_id]
+        buffer += await request.read()
+        match = _CONTENT_RANGE.fullmatch(request.headers.get("Content-Range", ""))
+        if match is not None and match.group(3) == "*":
+            return web.Response(
+                status=308, headers={"Range": f"bytes=0-{len(buffer) - 1}"}
+            )
+        del self._uploads[upload_id]
+        self.put(bucket, name, bytes(buffer))
+        return web.json_response(_resource(bucket, name, self.objects[(bucket, name)]))
+
+
+def _resource(bucket: str, name: str, stored: StoredObject) -> dict[str, Any]:
+    return {
+        "kind": "storage#object",
+        "id": f"{bucket}/{name}/{stored.generation}",
+        "bucket": bucket,
+        "name": name,
+        "size": str(len(stored.data)),
+        "generation": str(stored.generation),
+        "metageneration": "1",
+        "contentType": "application/octet-stream",
+        "storageClass": "STANDARD",
+        "md5Hash": stored.md5,
+        "timeCreated": stored.created,
+        "updated": stored.created,
+    }
+
+
+def _error(status: int) -> web.Response:
+    return web.json_response(
+        {"error": {"code": status, "message": HTTPStatus(status).phrase}},
+        status=status,
+    )
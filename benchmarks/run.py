@@ -0,0 +1,453 @@
+"""Offline benchmarks of FileClient, read_pandas, write_pandas and backports.show against a fake GCS server.
+
+Run with `nox -s benchmarks` or `python -m benchmarks`. Results are written as JSON, by default to
+'benchmarks/results/<commit>.json', so runs of different commits can be compared with `--compare`.
+"""
+
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from collections.abc import Callable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+from typing import NamedTuple
+from unittest import mock
+
+import fsspec.config
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from benchmarks.fake_gcs import FakeGCSServer
+from dapla import FileClient
+from dapla import backports
+from dapla import read_pandas
+from dapla import write_pandas
+from dapla.gcs import GCSFileSystemPool
+
+BUCKET = "bench"
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Environment variables that change how dapla reads, cleared so results only depend on the code
+_DAPLA_ENV = (
+    "DAPLA_TOOLBELT_CACHE_DIR",
+    "DAPLA_TOOLBELT_HEDGE_PERCENTILE",
+    "DAPLA_TOOLBELT_READ_DEADLINE",
+    "DAPLA_TOOLBELT_METRICS",
+    "DAPLA_TOOLBELT_LISTING_TTL",
+    "DAPLA_TOOLBELT_STORAGE_BACKEND",
+    "STORAGE_EMULATOR_HOST",
+)
+
+
+class Benchmark(NamedTuple):
+    """One timed operation of a workload.
+
+    `setup` runs untimed before every repetition, `run` is timed and returns the number of bytes it transferred.
+    """
+
+    name: str
+    workload: str
+    setup: Callable[[], None]
+    run: Callable[[], int]
+
+
+def many_small_files(server: FakeGCSServer, scale: float) -> list[Benchmark]:
+    """Reading and writing many files of a few kilobytes each."""
+    count = max(int(500 * scale), 5)
+    data = os.urandom(3072).hex().encode()[:4096]
+    paths = [f"{BUCKET}/small/{i:05}.bin" for i in range(count)]
+
+    def seed() -> None:
+        for path in paths:
+            server.put(BUCKET, path.split("/", 1)[1], data)
+        _fresh_caches()
+
+    def cat() -> int:
+        return sum(len(FileClient.cat(path)) for path in paths[: max(count // 5, 1)])
+
+    def cat_many() -> int:
+        return sum(map(len, FileClient.cat_many(paths, encoding=None).values()))
+
+    def write() -> int:
+        for path in paths[: max(count // 5, 1)]:
+            with FileClient.get_gcs_file_system().open(path, "wb") as f:
+                f.write(data)
+        return len(data) * max(count // 5, 1)
+
+    return [
+        Benchmark("small_files.cat", "many_small_files", seed, cat),
+        Benchmark("small_files.cat_many", "many_small_files", seed, cat_many),
+        Benchmark("small_files.write", "many_small_files", _fresh_caches, write),
+    ]
+
+
+def few_huge_files(server: FakeGCSServer, scale: float) -> list[Benchmark]:
+    """Reading and writing a couple of large files."""
+    size = max(int(64 * 2**20 * scale), 2**20)
+    data = os.urandom(size)
+    paths = [f"{BUCKET}/huge/{i}.bin" for i in range(2)]
+
+    def seed() -> None:
+        for path in paths:
+            server.put(BUCKET, path.split("/", 1)[1], data)
+        _fresh_caches()
+
+    def read() -> int:
+        total = 0
+        for path in paths:
+            with FileClient.gcs_open(path, "rb") as f:
+                total += len(f.read())
+        return total
+
+    def write() -> int:
+        for path in paths:
+            with FileClient.get_gcs_file_system().open(path, "wb") as f:
+                f.write(data)
+        return size * len(paths)
+
+    return [
+        Benchmark("huge_files.read", "few_huge_files", seed, read),
+        Benchmark("huge_files.write", "few_huge_files", _fresh_caches, write),
+    ]
+
+
+def listing_heavy(server: FakeGCSServer, scale: float) -> list[Benchmark]:
+    """Listing and walking a tree of many folders."""
+    folders = max(int(100 * scale), 2)
+    for folder in range(folders):
+        for i in range(20):
+            server.put(BUCKET, f"tree/{folder:04}/{i:02}.txt", b"x")
+        server.put(BUCKET, f"tree/{folder:04}/sub/_SUCCESS", b"")
+    root = f"{BUCKET}/tree"
+
+    def show() -> int:
+        backports.show(root)
+        return 0
+
+    def ls() -> int:
+        for folder in range(folders):
+            FileClient.ls(f"{root}/{folder:04}")
+        return 0
+
+    def find() -> int:
+        FileClient.get_gcs_file_system().find(root)
+        return 0
+
+    return [
+        Benchmark("listing.show", "listing_heavy", _fresh_caches, show),
+        Benchmark("listing.ls", "listing_heavy", _fresh_caches, ls),
+        Benchmark("listing.find", "listing_heavy", _fresh_caches, find),
+    ]
+
+
+def parquet_with_filters(server: FakeGCSServer, scale: float) -> list[Benchmark]:
+    """Reading a dataset of several Parquet files with and without row filters, and writing one."""
+    rows = max(int(1_000_000 * scale), 1000)
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "key": rng.integers(0, 100, rows),
+            "value": rng.random(rows),
+            "label": rng.choice(["a", "b", "c", "d"], rows),
+        }
+    )
+    parts = 8
+    for part in range(parts):
+        buffer = io.BytesIO()
+        pq.write_table(
+            pa.Table.from_pandas(df.iloc[part::parts], preserve_index=False), buffer
+        )
+        server.put(BUCKET, f"dataset/part-{part}.parquet", buffer.getvalue())
+    size = sum(
+        len(stored.data)
+        for (bucket, name), stored in server.objects.items()
+        if bucket == BUCKET and name.startswith("dataset/")
+    )
+
+    def read() -> int:
+        read_pandas(f"{BUCKET}/dataset")
+        return size
+
+    def read_filtered() -> int:
+        filters: list[Any] = [("key", "<", 10)]
+        read_pandas(f"{BUCKET}/dataset", columns=["key", "value"], filters=filters)
+        return size
+
+    def write() -> int:
+        write_pandas(df, f"gs://{BUCKET}/out/data.parquet")
+        return len(server.objects[(BUCKET, "out/data.parquet")].data)
+
+    return [
+        Benchmark("parquet.read_pandas", "parquet_with_filters", _fresh_caches, read),
+        Benchmark(
+            "parquet.read_pandas_filtered",
+            "parquet_with_filters",
+            _fresh_caches,
+            read_filtered,
+        ),
+        Benchmark("parquet.write_pandas", "parquet_with_filters", _fresh_caches, write),
+    ]
+
+
+def csv_parsing(server: FakeGCSServer, scale: float) -> list[Benchmark]:
+    """Reading a large CSV file with the Pandas parser and with the multithreaded Arrow parser."""
+    rows = max(int(2_000_000 * scale), 1000)
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "key": rng.integers(0, 100, rows),
+            "value": rng.random(rows),
+            "label": rng.choice(["a", "b", "c", "d"], rows),
+        }
+    )
+    data = df.to_csv(index=False).encode()
+    server.put(BUCKET, "csv/data.csv", data)
+    path = f"{BUCKET}/csv/data.csv"
+
+    def read_pandas_engine() -> int:
+        # Opened through FileClient, since Pandas given a URI makes a filesystem the fake server cannot serve
+        with FileClient.gcs_open(path, "rb") as f:
+            pd.read_csv(f)
+        return len(data)
+
+    def read_arrow_engine() -> int:
+        FileClient.load_csv_to_pandas(path, engine="arrow")
+        return len(data)
+
+    return [
+        Benchmark(
+            "csv.read_pandas_engine", "csv_parsing", _fresh_caches, read_pandas_engine
+        ),
+        Benchmark(
+            "csv.read_arrow_engine", "csv_parsing", _fresh_caches, read_arrow_engine
+        ),
+    ]
+
+
+def ndjson_parsing(server: FakeGCSServer, scale: float) -> list[Benchmark]:
+    """Reading a large newline-delimited JSON file with Pandas, with Arrow, and with Arrow in batches."""
+    rows = max(int(500_000 * scale), 1000)
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "key": rng.integers(0, 100, rows),
+            "value": rng.random(rows),
+            "label": rng.choice(["a", "b", "c", "d"], rows),
+        }
+    )
+    data = df.to_json(orient="records", lines=True).encode()
+    server.put(BUCKET, "ndjson/data.ndjson", data)
+    path = f"{BUCKET}/ndjson/data.ndjson"
+
+    def read_pandas_engine() -> int:
+        # Opened through FileClient, since Pandas given a URI makes a filesystem the fake server cannot serve
+        with FileClient.gcs_open(path, "rb") as f:
+            pd.read_json(f, lines=True)
+        return len(data)
+
+    def read_arrow_engine() -> int:
+        FileClient.load_json_to_pandas(path, engine="arrow")
+        return len(data)
+
+    def iter_arrow_batches() -> int:
+        for _ in FileClient.iter_json_batches(path, block_size=2**20):
+            pass
+        return len(data)
+
+    return [
+        Benchmark(
+            "ndjson.read_pandas_engine",
+            "ndjson_parsing",
+            _fresh_caches,
+            read_pandas_engine,
+        ),
+        Benchmark(
+            "ndjson.read_arrow_engine",
+            "ndjson_parsing",
+            _fresh_caches,
+            read_arrow_engine,
+        ),
+        Benchmark(
+            "ndjson.iter_arrow_batches",
+            "ndjson_parsing",
+            _fresh_caches,
+            iter_arrow_batches,
+        ),
+    ]
+
+
+WORKLOADS = {
+    "many_small_files": many_small_files,
+    "few_huge_files": few_huge_files,
+    "listing_heavy": listing_heavy,
+    "parquet_with_filters": parquet_with_filters,
+    "csv_parsing": csv_parsing,
+    "ndjson_parsing": ndjson_parsing,
+}
+
+
+def run_suite(
+    scale: float = 1.0, repeat: int = 5, workloads: list[str] | None = None
+) -> dict[str, Any]:
+    """Run the benchmarks against a fake GCS server.
+
+    Args:
+        scale: Multiplies the number and size of files of every workload.
+        repeat: Number of timed repetitions of each benchmark, after one untimed warm-up run.
+        workloads: Names of the workloads to run, all of `WORKLOADS` if None.
+
+    Returns:
+        The results, ready to be written as JSON.
+    """
+    results: dict[str, Any] = {}
+    with FakeGCSServer() as server, _pointed_at(server):
+        for workload in workloads or list(WORKLOADS):
+            server.clear()
+            for benchmark in WORKLOADS[workload](server, scale):
+                results[benchmark.name] = _measure(server, benchmark, repeat)
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "repeat": repeat,
+        "benchmarks": results,
+    }
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any]) -> str:
+    """Render a table of the change in median time and request count of every benchmark.
+
+    Args:
+        baseline: Results of an earlier run.
+        current: Results of this run.
+
+    Returns:
+        The table, with one line per benchmark present in both runs.
+    """
+    lines = [
+        f"{'benchmark':<32} {'before':>9} {'after':>9} {'change':>8} {'requests':>15}"
+    ]
+    for name, after in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None:
+            continue
+        change = after["median"] / before["median"] - 1 if before["median"] else 0.0
+        requests = f"{before['requests']} -> {after['requests']}"
+        lines.append(
+            f"{name:<32} {before['median']:>9.4f} {after['median']:>9.4f} {change:>+8.1%} {requests:>15}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workload", action="append", choices=list(WORKLOADS))
+    parser.add_argument("--output", type=Path, help="Where to write the JSON results")
+    parser.add_argument(
+        "--compare", type=Path, help="JSON results of an earlier run to compare with"
+    )
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.scale, args.repeat, args.workload)
+    output = args.output or RESULTS_DIR / f"{results['commit'] or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    for name, result in results["benchmarks"].items():
+        print(
+            f"{name:<32} {result['median']:>9.4f} s {result['mb_per_s']:>9.1f} MB/s {result['requests']:>6} requests"
+        )
+    print(f"Results written to {output}")
+    if args.compare is not None:
+        print(compare(json.loads(args.compare.read_text()), results))
+    return 0
+
+
+def _measure(
+    server: FakeGCSServer, benchmark: Benchmark, repeat: int
+) -> dict[str, Any]:
+    seconds = []
+    transferred = 0
+    for i in range(repeat + 1):
+        benchmark.setup()
+        server.requests = 0
+        started = time.perf_counter()
+        transferred = benchmark.run()
+        elapsed = time.perf_counter() - started
+        if i > 0:
+            seconds.append(elapsed)
+    median = statistics.median(seconds)
+    return {
+        "workload": benchmark.workload,
+        "seconds": seconds,
+        "min": min(seconds),
+        "median": median,
+        "bytes": transferred,
+        "mb_per_s": transferred / median / 1e6 if median else 0.0,
+        "requests": server.requests,
+    }
+
+
+@contextmanager
+def _pointed_at(server: FakeGCSServer) -> Iterator[None]:
+    """Make every GCSFileSystem created by dapla use the fake server with anonymous access."""
+    environ = {key: value for key, value in os.environ.items() if key not in _DAPLA_ENV}
+    environ["DAPLA_REGION"] = "CLOUD_RUN"
+    gs_config = {"token": "anon", "endpoint_url": server.url}
+    with mock.patch.dict(os.environ, environ, clear=True), mock.patch.dict(
+        fsspec.config.conf, {"gs": gs_config, "gcs": gs_config}
+    ), warnings.catch_warnings():
+        # read_pandas and write_pandas are deprecated, but still worth keeping fast
+        warnings.simplefilter("ignore", DeprecationWarning)
+        GCSFileSystemPool.reset()
+        layouts = getattr(
+            FileClient.get_gcs_file_system(), "_storage_layout_cache", None
+        )
+        if layouts is not None:
+            # Newer gcsfs looks the bucket type up over gRPC, which the fake server does not answer
+            from gcsfs.extended_gcsfs import BucketType
+
+            layouts[BUCKET] = BucketType.NON_HIERARCHICAL
+        try:
+            yield
+        finally:
+            GCSFileSystemPool.reset()
+
+
+def _fresh_caches() -> None:
+    """Drop cached listings, so every repetition does the same requests."""
+    for fs in GCSFileSystemPool.instances():
+        fs.invalidate_cache()
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short=12", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
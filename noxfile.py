@@ -183,6 +183,13 @@ def tests(session: Session) -> None:
             session.notify("coverage", posargs=[])
 
 
+@session(python=python_versions[0])
+def benchmarks(session: Session) -> None:
+    """Run the offline benchmarks and write the results as JSON."""
+    session.install(".")
+    session.run("python", "-m", "benchmarks", *session.posargs)
+
+
 @session(python=python_versions[0])
 def coverage(session: Session) -> None:
     """Produce the coverage report."""
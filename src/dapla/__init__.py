@@ -15,6 +15,7 @@ from dapla_auth_client import AuthClient
 # and also is importable with `from dapla import trigger_source_data_processing`
 from dapla_toolbelt_automation import trigger_source_data_processing
 
+from .async_files import AsyncFileClient
 from .backports import details
 from .backports import show
 from .collector import CollectorClient
@@ -26,8 +27,10 @@ from .gsm import get_secret_version
 from .guardian import GuardianClient
 from .pandas import read_pandas
 from .pandas import write_pandas
+from .profiling import profile
 
 __all__ = [
+    "AsyncFileClient",
     "AuthClient",
     "CollectorClient",
     "ConverterClient",
@@ -36,6 +39,7 @@ __all__ = [
     "GuardianClient",
     "details",
     "get_secret_version",
+    "profile",
     "read_pandas",
     "repo_root_dir",
     "show",
@@ -0,0 +1,186 @@
+"""Multithreaded Arrow readers for text formats, used with `engine="arrow"` by FileClient and read_pandas.
+
+The file is read from start to end in blocks, which Arrow parses on all cores while the next blocks are
+downloaded, and the result is a DataFrame backed by Arrow arrays rather than NumPy. Parsing a large file
+this way scales with the number of cores, where the Pandas readers parse it on one.
+
+JSON files must be newline-delimited (NDJSON), with one object per line, and can also be read as an iterator
+of DataFrames of one block each, which keeps memory use constant however large the file is.
+"""
+
+import io
+from collections.abc import Iterator
+from typing import IO
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv
+import pyarrow.json
+
+from dapla import profiling
+
+# Value of the `engine` argument that selects these readers over the Pandas ones
+ENGINE = "arrow"
+
+# Bytes parsed at a time by one thread
+DEFAULT_BLOCK_SIZE = 16 * 2**20
+
+
+def read_csv(
+    source: IO[bytes],
+    columns: list[str] | None = None,
+    sep: str = ",",
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    use_threads: bool = True,
+) -> pd.DataFrame:
+    """Read a CSV file with a header row into an Arrow backed DataFrame.
+
+    Column types are inferred by Arrow, and every column gets a `pandas.ArrowDtype`.
+
+    Args:
+        source: The file, opened in binary mode and read from its current position.
+        columns: Names of the columns to read, in this order. Defaults to None, which reads all of them.
+        sep: The character separating the fields.
+        block_size: Bytes parsed at a time by one thread. Must be larger than the longest row.
+        use_threads: Whether to parse blocks on all cores, or on the calling thread only.
+
+    Returns:
+        A Pandas DataFrame.
+    """
+    with profiling.span("arrow", "read csv"):
+        table = pyarrow.csv.read_csv(
+            source,
+            read_options=pyarrow.csv.ReadOptions(
+                use_threads=use_threads, block_size=block_size
+            ),
+            parse_options=pyarrow.csv.ParseOptions(delimiter=sep),
+            convert_options=pyarrow.csv.ConvertOptions(include_columns=columns),
+        )
+        return _to_pandas(table)
+
+
+def read_json(
+    source: IO[bytes],
+    columns: list[str] | None = None,
+    schema: pa.Schema | None = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    use_threads: bool = True,
+) -> pd.DataFrame:
+    """Read a newline-delimited JSON file into an Arrow backed DataFrame.
+
+    Args:
+        source: The file, opened in binary mode and read from its current position.
+        columns: Names of the columns to read, in this order. Defaults to None, which reads all of them.
+        schema: The fields to read and their types. Other fields are skipped while parsing, and no types
+            are inferred. Defaults to None, which infers the fields and types from the file.
+        block_size: Bytes parsed at a time by one thread. Must be larger than the longest line.
+        use_threads: Whether to parse blocks on all cores, or on the calling thread only.
+
+    Returns:
+        A Pandas DataFrame.
+    """
+    with profiling.span("arrow", "read json"):
+        table = pyarrow.json.read_json(
+            source,
+            read_options=pyarrow.json.ReadOptions(
+                use_threads=use_threads, block_size=block_size
+            ),
+            parse_options=_json_parse_options(schema),
+        )
+        return _to_pandas(table.select(columns) if columns is not None else table)
+
+
+def iter_json(
+    source: IO[bytes],
+    columns: list[str] | None = None,
+    schema: pa.Schema | None = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """Read a newline-delimited JSON file as Arrow backed DataFrames of one block each.
+
+    Blocks are read and parsed one at a time, on the calling thread, so only the current block is held in
+    memory. Without a schema, the types are inferred from the first block, and a later block that does not
+    fit them raises an error, so give a schema for files whose first lines do not show every field and type.
+
+    Args:
+        source: The file, opened in binary mode and read from its current position.
+        columns: Names of the columns to read, in this order. Defaults to None, which reads all of them.
+        schema: The fields to read and their types. Other fields are skipped while parsing, and no types
+            are inferred. Defaults to None.
+        block_size: Bytes parsed at a time. Must be larger than the longest line.
+
+    Yields:
+        A Pandas DataFrame for every block, with the same columns and types.
+    """
+    if hasattr(pyarrow.json, "open_json"):
+        batches = _open_json(source, schema, block_size)
+    else:
+        # The streaming reader was added in pyarrow 19
+        batches = _split_json(source, schema, block_size)
+    while True:
+        with profiling.span("arrow", "read json batch"):
+            batch = next(batches, None)
+            if batch is None:
+                return
+            df = _to_pandas(batch.select(columns) if columns is not None else batch)
+        yield df
+
+
+def _open_json(
+    source: IO[bytes], schema: pa.Schema | None, block_size: int
+) -> Iterator[pa.Table]:
+    with profiling.span("arrow", "open json"):
+        reader = pyarrow.json.open_json(
+            source,
+            read_options=pyarrow.json.ReadOptions(block_size=block_size),
+            parse_options=_json_parse_options(schema),
+        )
+    while True:
+        try:
+            yield pa.Table.from_batches([reader.read_next_batch()])
+        except StopIteration:
+            return
+
+
+def _split_json(
+    source: IO[bytes], schema: pa.Schema | None, block_size: int
+) -> Iterator[pa.Table]:
+    """Parse a file in blocks cut after the last line feed, with the types of the first block."""
+    rest = b""
+    while data := source.read(block_size):
+        data = rest + data
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            rest = data
+            continue
+        table = _parse_json_block(data[:end], schema, block_size)
+        schema = schema or table.schema
+        rest = data[end:]
+        yield table
+    if rest.strip():
+        yield _parse_json_block(rest, schema, block_size)
+
+
+def _parse_json_block(
+    block: bytes, schema: pa.Schema | None, block_size: int
+) -> pa.Table:
+    return pyarrow.json.read_json(
+        io.BytesIO(block),
+        read_options=pyarrow.json.ReadOptions(
+            use_threads=False, block_size=max(block_size, len(block))
+        ),
+        parse_options=_json_parse_options(schema),
+    )
+
+
+def _json_parse_options(schema: pa.Schema | None) -> Any:
+    if schema is None:
+        return pyarrow.json.ParseOptions()
+    return pyarrow.json.ParseOptions(
+        explicit_schema=schema, unexpected_field_behavior="ignore"
+    )
+
+
+def _to_pandas(data: pa.Table | pa.RecordBatch) -> pd.DataFrame:
+    return data.to_pandas(types_mapper=pd.ArrowDtype, self_destruct=True)
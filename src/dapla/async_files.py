@@ -0,0 +1,293 @@
+import asyncio
+import io
+import typing as t
+from types import TracebackType
+from typing import Any
+
+import pandas as pd
+
+from .gcs import GCSFileSystem
+from .gcs import GCSFileSystemPool
+from .versions import list_versions_async
+
+
+class AsyncFileClient:
+    """Client for working with buckets and files on Google Cloud Storage from asyncio code.
+
+    Every method is a coroutine running on the caller's event loop, so many operations can run concurrently
+    with `asyncio.gather` or task groups. Calls on one event loop share a GCSFileSystem and its connection pool.
+    Parsing and serializing dataframes runs in worker threads, so it does not block the event loop.
+
+    This class should not be instantiated, only the static methods should be used.
+    """
+
+    @staticmethod
+    async def get_gcs_file_system(**kwargs: Any) -> GCSFileSystem:
+        """Gets the asynchronous GCSFileSystem shared by calls on the current event loop.
+
+        Args:
+            **kwargs: Additional arguments to pass to the underlying GCSFileSystem.
+
+        Returns:
+            A GCSFileSystem whose underscore-prefixed coroutine methods, such as `_cat_file`, can be awaited.
+        """
+        return await GCSFileSystemPool.get_async(**kwargs)
+
+    @staticmethod
+    async def ls(gcs_path: str, detail: bool = False, **kwargs: Any) -> Any:
+        """List the contents of a GCS bucket path.
+
+        Args:
+            gcs_path: The GCS path to a directory.
+            detail: Whether to return detailed information about the files.
+            kwargs: Additional arguments to pass to the underlying '_ls()' method.
+
+        Returns:
+            List of strings if detail is False, or list of directory information dicts if detail is True.
+        """
+        fs = await AsyncFileClient.get_gcs_file_system()
+        return await fs._ls(gcs_path, detail=detail, **kwargs)
+
+    @staticmethod
+    async def cat(gcs_path: str) -> str:
+        """Get string content of a file from GCS.
+
+        Args:
+            gcs_path: The GCS path to a file.
+
+        Returns:
+            utf-8 decoded string content of the given file
+        """
+        fs = await AsyncFileClient.get_gcs_file_system()
+        return (await fs._cat_file(gcs_path)).decode("utf-8")
+
+    @staticmethod
+    async def gcs_open(gcs_path: str, mode: str = "rb") -> "AsyncFile":
+        """Open a file in GCS for reading or writing bytes with awaitable methods.
+
+        Args:
+            gcs_path: The GCS path to a file.
+            mode: File open mode, 'rb' or 'wb'. Defaults to 'rb'.
+
+        Returns:
+            An `AsyncFile`, which can be used as an async context manager.
+        """
+        return AsyncFile(await AsyncFileClient.get_gcs_file_system(), gcs_path, mode)
+
+    @staticmethod
+    async def get_versions(bucket_name: str, file_path: str) -> list[dict[str, Any]]:
+        """Get all versions of a file in a bucket.
+
+        Args:
+            bucket_name: Bucket name where the file is located.
+            file_path: Path to the file.
+
+        Returns:
+            List of the metadata of every version of the file, including noncurrent or soft deleted versions.
+        """
+        fs = await AsyncFileClient.get_gcs_file_system()
+        _, items = await list_versions_async(fs, bucket_name, file_path)
+        return [fs._process_object(bucket_name, item) for item in items]
+
+    @staticmethod
+    async def load_csv_to_pandas(gcs_path: str, **kwargs: Any) -> pd.DataFrame:
+        """Reads a CSV file from Google Cloud Storage into a Pandas DataFrame.
+
+        Args:
+            gcs_path: The GCS path to a .csv file.
+            **kwargs: Additional arguments to pass to the underlying Pandas read_csv().
+
+        Returns:
+            A Pandas DataFrame.
+        """
+        return await _load(pd.read_csv, gcs_path, **kwargs)
+
+    @staticmethod
+    async def load_json_to_pandas(gcs_path: str, **kwargs: Any) -> pd.DataFrame:
+        """Reads a JSON file from Google Cloud Storage into a Pandas DataFrame.
+
+        Args:
+            gcs_path: The GCS path to a .json file.
+            **kwargs: Additional arguments to pass to the underlying Pandas read_json().
+
+        Returns:
+            A Pandas DataFrame.
+        """
+        return await _load(pd.read_json, gcs_path, **kwargs)
+
+    @staticmethod
+    async def load_xml_to_pandas(gcs_path: str, **kwargs: Any) -> pd.DataFrame:
+        """Reads an XML file from Google Cloud Storage into a Pandas DataFrame.
+
+        Args:
+            gcs_path: The GCS path to a .xml file.
+            **kwargs: Additional arguments to pass to the underlying Pandas read_xml().
+
+        Returns:
+            A Pandas DataFrame.
+        """
+        return await _load(pd.read_xml, gcs_path, **kwargs)
+
+    @staticmethod
+    async def save_pandas_to_csv(
+        df: pd.DataFrame, gcs_path: str, **kwargs: Any
+    ) -> None:
+        """Write the contents of a Pandas DataFrame to a CSV file in a bucket.
+
+        Args:
+            df: The Pandas DataFrame to save to file.
+            gcs_path: The GCS path to the destination .csv file.
+            **kwargs: Additional arguments to pass to the underlying Pandas to_csv().
+        """
+        await _save(df.to_csv, gcs_path, **kwargs)
+
+    @staticmethod
+    async def save_pandas_to_json(
+        df: pd.DataFrame, gcs_path: str, **kwargs: Any
+    ) -> None:
+        """Write the contents of a Pandas DataFrame to a JSON file in a bucket.
+
+        Args:
+            df: The Pandas DataFrame to save to file.
+            gcs_path: The GCS path to the destination .json file.
+            **kwargs: Additional arguments to pass to the underlying Pandas to_json().
+        """
+        await _save(df.to_json, gcs_path, **kwargs)
+
+    @staticmethod
+    async def save_pandas_to_xml(
+        df: pd.DataFrame, gcs_path: str, **kwargs: Any
+    ) -> None:
+        """Write the contents of a Pandas DataFrame to an XML file in a bucket.
+
+        Args:
+            df: The Pandas DataFrame to save to file.
+            gcs_path: The GCS path to the destination .xml file.
+            **kwargs: Additional arguments to pass to the underlying Pandas to_xml().
+        """
+        await _save(df.to_xml, gcs_path, **kwargs)
+
+
+class AsyncFile:
+    """A file in GCS opened with `AsyncFileClient.gcs_open`.
+
+    Each `read` is one ranged request, so reading in large chunks is more efficient than in small ones.
+    Written data is kept in memory and uploaded when the file is closed.
+    """
+
+    def __init__(self, fs: GCSFileSystem, path: str, mode: str = "rb") -> None:
+        """Initialize AsyncFile.
+
+        Args:
+            fs: An asynchronous GCSFileSystem running on the current event loop.
+            path: The GCS path to the file.
+            mode: File open mode, 'rb' or 'wb'.
+
+        Raises:
+            ValueError: If the mode is not 'rb' or 'wb'.
+        """
+        if mode not in ("rb", "wb"):
+            raise ValueError(
+                f"Async files are opened with mode 'rb' or 'wb', not '{mode}'"
+            )
+        self.fs = fs
+        self.path = fs._strip_protocol(path)
+        self.mode = mode
+        self.size: int | None = None
+        self.closed = False
+        self._position = 0
+        self._buffer = io.BytesIO()
+
+    async def read(self, size: int = -1) -> bytes:
+        """Read at most `size` bytes, or the rest of the file if `size` is negative."""
+        self._check("rb")
+        if self.size is None:
+            self.size = int((await self.fs._info(self.path))["size"])
+        end = self.size if size < 0 else min(self._position + size, self.size)
+        if end <= self._position:
+            return b""
+        data = await self.fs._cat_file(self.path, start=self._position, end=end)
+        self._position += len(data)
+        return data
+
+    async def write(self, data: bytes) -> int:
+        """Add bytes to the file, returning the number of bytes written."""
+        self._check("wb")
+        self._position += len(data)
+        return self._buffer.write(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Move to a position for the next read, like `io.IOBase.seek`."""
+        self._check("rb")
+        if whence == io.SEEK_END:
+            if self.size is None:
+                raise ValueError(
+                    "Seeking from the end needs a read first to learn the size"
+                )
+            offset += self.size
+        elif whence == io.SEEK_CUR:
+            offset += self._position
+        self._position = max(offset, 0)
+        return self._position
+
+    def tell(self) -> int:
+        """Return the current position in the file."""
+        return self._position
+
+    async def close(self) -> None:
+        """Close the file, uploading the written data in write mode."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.mode == "wb":
+            await self.fs._pipe_file(self.path, self._buffer.getvalue())
+            _invalidate_pooled(self.fs, self.path)
+
+    async def __aenter__(self) -> "AsyncFile":
+        """Return the file itself."""
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the file, without uploading written data if an exception was raised."""
+        if exc_type is None:
+            await self.close()
+        else:
+            self.closed = True
+
+    def _check(self, mode: str) -> None:
+        if self.closed:
+            raise ValueError("I/O operation on closed file")
+        if self.mode != mode:
+            raise io.UnsupportedOperation(f"Not supported in mode '{self.mode}'")
+
+
+async def _load(
+    reader: t.Callable[..., Any], gcs_path: str, **kwargs: Any
+) -> pd.DataFrame:
+    fs = await AsyncFileClient.get_gcs_file_system()
+    data = await fs._cat_file(gcs_path)
+    return t.cast(
+        pd.DataFrame, await asyncio.to_thread(reader, io.BytesIO(data), **kwargs)
+    )
+
+
+async def _save(writer: t.Callable[..., Any], gcs_path: str, **kwargs: Any) -> None:
+    fs = await AsyncFileClient.get_gcs_file_system()
+    text = await asyncio.to_thread(writer, None, **kwargs)
+    await fs._pipe_file(gcs_path, text.encode("utf-8"))
+    _invalidate_pooled(fs, gcs_path)
+
+
+def _invalidate_pooled(fs: GCSFileSystem, gcs_path: str) -> None:
+    """Drop listings that a write made stale from the file system that made it, and from the pooled ones."""
+    for pooled in [
+        fs,
+        *GCSFileSystemPool.instances(),
+        *GCSFileSystemPool.async_instances(),
+    ]:
+        pooled.invalidate_cache(gcs_path)
@@ -0,0 +1,239 @@
+"""Storage backends that FileClient and dapla.pandas read and write through.
+
+A path is sent to the backend named by its scheme: 'file:///some/dir/file.csv' is read from local disk and
+'memory://bucket/file.csv' from memory. Paths with the 'gs://' scheme or without a scheme go to the default backend,
+which is GCS unless 'DAPLA_TOOLBELT_STORAGE_BACKEND' says otherwise. Setting it to 'memory://' or to
+'file:///some/dir' keeps buckets in memory or as folders of that directory, so code written for GCS runs
+unchanged, without credentials, in local development, tests and benchmarks.
+
+Features that only GCS has, such as object versions, are not available on the other backends.
+"""
+
+import datetime
+import functools
+import os
+import posixpath
+import re
+import threading
+from collections.abc import Callable
+from typing import Any
+
+import fsspec
+from fsspec.implementations.asyn_wrapper import AsyncFileSystemWrapper
+from fsspec.implementations.dirfs import DirFileSystem
+from fsspec.spec import AbstractFileSystem
+
+from dapla.gcs import GCSFileSystemPool
+
+BACKEND_ENV = "DAPLA_TOOLBELT_STORAGE_BACKEND"
+DEFAULT_BACKEND = "gs://"
+GCS_SCHEMES = ("gs", "gcs")
+
+# Called with the root of the backend URI, such as '/some/dir' for 'file:///some/dir', and filesystem options
+Factory = Callable[..., AbstractFileSystem]
+
+_SCHEME = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*)://")
+
+_lock = threading.Lock()
+_factories: dict[str, Factory] = {}
+
+
+class BucketFileSystem(DirFileSystem):  # type: ignore [misc]
+    """A local or in-memory filesystem laid out like GCS, with one top-level folder per bucket.
+
+    Paths are taken relative to a root folder with their scheme removed, so 'gs://bucket/folder/file'
+    is stored at '<root>/bucket/folder/file'. Listings and metadata get the GCS fields that dapla reads,
+    and the async methods run the wrapped filesystem in threads, so the concurrent bulk operations work too.
+    """
+
+    cachable = False
+
+    def __init__(self, root: str, fs: AbstractFileSystem) -> None:
+        """Initialize BucketFileSystem.
+
+        Args:
+            root: The folder the buckets are stored in.
+            fs: The synchronous filesystem to store them in.
+        """
+        super().__init__(path=root, fs=_AsyncWrapper(fs, asynchronous=False))
+
+    @classmethod
+    def _strip_protocol(cls, path: Any) -> Any:
+        if isinstance(path, list):
+            return [cls._strip_protocol(p) for p in path]
+        return _SCHEME.sub("", path).rstrip("/")
+
+    def _join(self, path: Any) -> Any:
+        if not isinstance(path, str):
+            return super()._join(path)
+        path = _SCHEME.sub("", path).lstrip("/")
+        return f"{self.path.rstrip('/')}/{path}"
+
+    def _relpath(self, path: Any) -> Any:
+        if not isinstance(path, str):
+            return super()._relpath(path)
+        relative = posixpath.relpath("/" + path.lstrip("/"), "/" + self.path.strip("/"))
+        return "" if relative == "." else relative
+
+    def ls(self, path: str, detail: bool = True, **kwargs: Any) -> Any:
+        """List the contents of a folder."""
+        entries = super().ls(path, detail=detail, **kwargs)
+        return [_as_object(entry) for entry in entries] if detail else entries
+
+    async def _ls(self, path: str, detail: bool = True, **kwargs: Any) -> Any:
+        entries = await super()._ls(path, detail=detail, **kwargs)
+        return [_as_object(entry) for entry in entries] if detail else entries
+
+    def info(self, path: str, **kwargs: Any) -> dict[str, Any]:
+        """Return the metadata of a file or folder."""
+        return _as_object(super().info(path, **kwargs))
+
+    async def _info(self, path: str, **kwargs: Any) -> dict[str, Any]:
+        return _as_object(await super()._info(path, **kwargs))
+
+    def _relpath_detail(self, paths: dict[str, Any]) -> dict[str, Any]:
+        return {
+            path: _as_object(info)
+            for path, info in super()._relpath_detail(paths).items()
+        }
+
+    def _relpath_walk_entries(self, entries: Any) -> Any:
+        entries = super()._relpath_walk_entries(entries)
+        if not isinstance(entries, dict):
+            return entries
+        return {name: _as_object(info) for name, info in entries.items()}
+
+
+class _AsyncWrapper(AsyncFileSystemWrapper):  # type: ignore [misc]
+    def _open(self, path: str, mode: str = "rb", **kwargs: Any) -> Any:
+        # The wrapper has no file class of its own, the wrapped filesystem opens the file
+        return self.sync_fs._open(path, mode, **kwargs)
+
+
+def register_backend(scheme: str, factory: Factory) -> None:
+    """Register a storage backend, or replace the one registered for a scheme.
+
+    Args:
+        scheme: The URI scheme of the backend, such as 's3'.
+        factory: Called with the root of the backend URI and any filesystem options to return the filesystem.
+            Paths handed to it keep their scheme, and are 'gs://' paths when it is the default backend.
+    """
+    with _lock:
+        _factories[scheme] = factory
+
+
+def default_backend() -> str:
+    """Return the URI of the backend for paths with the 'gs://' scheme or without a scheme.
+
+    Returns:
+        The value of 'DAPLA_TOOLBELT_STORAGE_BACKEND', or 'gs://' if it is not set.
+    """
+    return os.getenv(BACKEND_ENV) or DEFAULT_BACKEND
+
+
+def backend_for(path: str) -> str:
+    """Return the URI of the backend a path is sent to.
+
+    Args:
+        path: A path, with or without a scheme.
+
+    Returns:
+        'file:///' for local paths, '<scheme>://' for paths with another scheme than 'gs://',
+        and the default backend for the rest.
+    """
+    match = _SCHEME.match(path)
+    if match is None or match.group(1) in GCS_SCHEMES:
+        return default_backend()
+    return f"{match.group(1)}:///" if match.group(1) == "file" else match.group(0)
+
+
+def has_scheme(path: str) -> bool:
+    """Tell whether a path starts with a scheme such as 'gs://' or 'file://'."""
+    return _SCHEME.match(path) is not None
+
+
+def is_gcs(path: str) -> bool:
+    """Tell whether a path is sent to GCS."""
+    match = _SCHEME.match(backend_for(path))
+    return match is not None and match.group(1) in GCS_SCHEMES
+
+
+def filesystem(backend: str | None = None, **kwargs: Any) -> AbstractFileSystem:
+    """Return the filesystem of a backend.
+
+    Args:
+        backend: The backend URI, such as 'gs://', 'memory://' or 'file:///some/dir'. Defaults to the default backend.
+        kwargs: Options for the filesystem. The local and in-memory backends ignore them.
+
+    Returns:
+        A filesystem instance, shared with other callers asking for the same backend and options.
+
+    Raises:
+        ValueError: If no backend is registered for the scheme of the URI.
+    """
+    backend = backend or default_backend()
+    match = _SCHEME.match(backend)
+    if match is None:
+        raise ValueError(f"Storage backend must be a URI like 'gs://', got '{backend}'")
+    with _lock:
+        factory = _factories.get(match.group(1))
+    if factory is None:
+        raise ValueError(
+            f"No storage backend registered for '{match.group(0)}'. Registered: {', '.join(sorted(_factories))}"
+        )
+    return factory(backend[match.end() :], **kwargs)
+
+
+def filesystem_for(path: str, **kwargs: Any) -> AbstractFileSystem:
+    """Return the filesystem of the backend a path is sent to, see `backend_for`.
+
+    Args:
+        path: A path, with or without a scheme.
+        kwargs: Options for the filesystem.
+
+    Returns:
+        A filesystem instance.
+    """
+    return filesystem(backend_for(path), **kwargs)
+
+
+def _gcs(root: str, **kwargs: Any) -> AbstractFileSystem:
+    return GCSFileSystemPool.get(**kwargs)
+
+
+def _local(root: str, **kwargs: Any) -> AbstractFileSystem:
+    return _buckets("file", os.path.abspath(root or "."))
+
+
+def _memory(root: str, **kwargs: Any) -> AbstractFileSystem:
+    return _buckets("memory", f"/{root}")
+
+
+@functools.cache
+def _buckets(protocol: str, root: str) -> BucketFileSystem:
+    options = {"auto_mkdir": True} if protocol == "file" else {}
+    return BucketFileSystem(root, fsspec.filesystem(protocol, **options))
+
+
+def _as_object(info: dict[str, Any]) -> dict[str, Any]:
+    """Add the GCS object fields missing from the metadata of a local or in-memory file."""
+    name = info["name"].rstrip("/")
+    directory = info.get("type") == "directory"
+    modified = info.get("mtime") or info.get("created") or 0.0
+    if isinstance(modified, float | int):
+        modified = datetime.datetime.fromtimestamp(modified, datetime.timezone.utc)
+    timestamp = modified.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+    return {
+        "bucket": name.split("/", 1)[0],
+        "storageClass": "DIRECTORY" if directory else "STANDARD",
+        "timeCreated": timestamp,
+        "updated": timestamp,
+        **info,
+        "size": 0 if directory else info.get("size", 0),
+    }
+
+
+for _scheme in GCS_SCHEMES:
+    register_backend(_scheme, _gcs)
+register_backend("file", _local)
+register_backend("memory", _memory)
@@ -10,7 +10,7 @@ def show(gcs_path: str) -> list[str]:
     Returns:
         A simplified list of files or folders
     """
-    fs = FileClient.get_gcs_file_system()
+    fs = FileClient.get_file_system(gcs_path)
     out = dict()
     files = None
     for _path, dirs, files in fs.walk(gcs_path, detail=True):  # noqa: B007
@@ -33,7 +33,7 @@ def details(gcs_path: str) -> list[dict[str, str]]:
     Returns:
         A list of dicts containing file details
     """
-    fs = FileClient.get_gcs_file_system()
+    fs = FileClient.get_file_system(gcs_path)
     return list(
         map(
             lambda o: (
@@ -0,0 +1,209 @@
+import asyncio
+import email.parser
+import json
+import typing as t
+import uuid
+from collections.abc import Callable
+from collections.abc import Iterable
+from typing import Any
+from urllib.parse import quote
+
+import gcsfs
+from gcsfs.retry import validate_response
+
+from dapla.transfer import run_many
+
+# GCS accepts at most this many operations in one batch request
+MAX_BATCH_SIZE = 100
+# Number of batch requests kept in flight unless the caller asks otherwise
+DEFAULT_BATCH_CONCURRENCY = 8
+# Operations answered with these statuses are sent again in a new batch
+_RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+_MAX_ATTEMPTS = 5
+# Seconds to wait before the first retry, doubled for every following attempt
+_RETRY_DELAY = 1.0
+
+
+def info_many(
+    fs: gcsfs.GCSFileSystem,
+    paths: Iterable[str],
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+) -> dict[str, dict[str, Any] | Exception]:
+    """Get the metadata of many objects, with up to 100 lookups per batch request.
+
+    Args:
+        fs: The GCS filesystem to use.
+        paths: Paths to the objects, optionally with a '#generation' suffix.
+        max_concurrency: Maximum number of batch requests in flight at once.
+
+    Returns:
+        A dict mapping each path to its metadata, or to the exception for that object,
+        such as FileNotFoundError if it does not exist.
+    """
+    if not isinstance(fs, gcsfs.GCSFileSystem):
+        # Other storage backends have no batch requests, so the objects are looked up one by one
+        return run_many(fs, paths, fs._info, max_concurrency)
+
+    def parse(path: str, body: bytes) -> dict[str, Any]:
+        bucket, _, _ = fs.split_path(path)
+        return t.cast(dict[str, Any], fs._process_object(bucket, json.loads(body)))
+
+    return _run_batched(fs, "GET", paths, parse, max_concurrency)
+
+
+def rm_many(
+    fs: gcsfs.GCSFileSystem,
+    paths: Iterable[str],
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+) -> dict[str, Exception | None]:
+    """Delete many objects, with up to 100 deletes per batch request.
+
+    Cached listings are updated for every object that was deleted.
+
+    Args:
+        fs: The GCS filesystem to use.
+        paths: Paths to the objects, optionally with a '#generation' suffix to delete one version.
+        max_concurrency: Maximum number of batch requests in flight at once.
+
+    Returns:
+        A dict mapping each path to None if it was deleted, or to the exception for that object.
+    """
+    if not isinstance(fs, gcsfs.GCSFileSystem):
+        return run_many(fs, paths, fs._rm_file, max_concurrency)
+
+    def parse(path: str, body: bytes) -> None:
+        if hasattr(fs, "remove_from_listing_cache"):
+            fs.remove_from_listing_cache(path)
+        else:
+            bucket, key, _ = fs._split_path(path, version_aware=True)
+            fs.invalidate_cache(f"{bucket}/{key}")
+
+    return _run_batched(fs, "DELETE", paths, parse, max_concurrency)
+
+
+def _run_batched(
+    fs: gcsfs.GCSFileSystem,
+    method: str,
+    paths: Iterable[str],
+    parse: Callable[[str, bytes], Any],
+    max_concurrency: int,
+) -> dict[str, Any]:
+    """Send one request per path in batches and parse each successful response body."""
+    paths = list(dict.fromkeys(paths))
+    batches = [
+        tuple(paths[i : i + MAX_BATCH_SIZE])
+        for i in range(0, len(paths), MAX_BATCH_SIZE)
+    ]
+
+    async def run(batch: tuple[str, ...]) -> dict[str, Any]:
+        results: dict[str, Any] = {}
+        for path, response in (await _send_batch(fs, method, batch)).items():
+            try:
+                if isinstance(response, BaseException):
+                    raise response
+                status, body = response
+                validate_response(status, body, path)
+                results[path] = parse(path, body)
+            except Exception as err:
+                results[path] = err
+        return results
+
+    results: dict[str, Any] = {}
+    for batch, outcome in run_many(fs, batches, run, max_concurrency).items():
+        if isinstance(outcome, Exception):
+            # The batch request as a whole failed
+            results.update(dict.fromkeys(batch, outcome))
+        else:
+            results.update(outcome)
+    return {path: results[path] for path in paths}
+
+
+async def _send_batch(
+    fs: gcsfs.GCSFileSystem, method: str, paths: tuple[str, ...]
+) -> dict[str, tuple[int, bytes] | BaseException]:
+    """Send a request per path in one multipart batch, retrying throttled and failed operations.
+
+    Returns:
+        The status and body of the response to each path.
+    """
+    if not fs.on_google:
+        # Emulators do not support batch requests, fall back to one request per path
+        return dict(
+            zip(
+                paths,
+                await asyncio.gather(
+                    *(_send_single(fs, method, p) for p in paths),
+                    return_exceptions=True,
+                ),
+                strict=True,
+            )
+        )
+    responses: dict[str, tuple[int, bytes] | BaseException] = {}
+    remaining = list(paths)
+    for attempt in range(_MAX_ATTEMPTS):
+        if attempt:
+            await asyncio.sleep(min(_RETRY_DELAY * 2 ** (attempt - 1), 32))
+        boundary = f"dapla-{uuid.uuid4().hex}"
+        body = "".join(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <{i}>\r\n\r\n"
+            f"{method} {_object_url(fs, path)} HTTP/1.1\r\n\r\n"
+            for i, path in enumerate(remaining)
+        )
+        headers, content = await fs._call(
+            "POST",
+            fs.batch_url_base,
+            headers={"Content-Type": f"multipart/mixed; boundary={boundary}"},
+            data=f"{body}--{boundary}--\r\n".encode(),
+        )
+        parts = _parse_batch_response(headers["Content-Type"], content)
+        retry = []
+        for i, path in enumerate(remaining):
+            status, part_body = parts.get(i, (500, b"Missing from batch response"))
+            responses[path] = (status, part_body)
+            if status in _RETRY_STATUSES:
+                retry.append(path)
+        if not retry:
+            break
+        remaining = retry
+    return responses
+
+
+async def _send_single(
+    fs: gcsfs.GCSFileSystem, method: str, path: str
+) -> tuple[int, bytes]:
+    bucket, key, generation = fs._split_path(path, version_aware=True)
+    kwargs = {"generation": generation} if generation else {}
+    _, content = await fs._call(method, "b/{}/o/{}", bucket, key, **kwargs)
+    return 200, content
+
+
+def _object_url(fs: gcsfs.GCSFileSystem, path: str) -> str:
+    # The '#generation' suffix is honoured whether or not the filesystem is version aware
+    bucket, key, generation = fs._split_path(path, version_aware=True)
+    url = f"/storage/v1/b/{quote(bucket, safe='')}/o/{quote(key, safe='')}"
+    return f"{url}?generation={generation}" if generation else url
+
+
+def _parse_batch_response(
+    content_type: str, content: bytes
+) -> dict[int, tuple[int, bytes]]:
+    """Split a multipart batch response into the status and body of each operation, by request index."""
+    parser = email.parser.BytesParser()
+    message = parser.parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + content
+    )
+    if not message.is_multipart():
+        raise OSError(f"Unexpected batch response of type {content_type}")
+    parts: dict[int, tuple[int, bytes]] = {}
+    for part in t.cast(list[Any], message.get_payload()):
+        # GCS answers request '<i>' with '<response-i>'
+        index = int(part["Content-ID"].strip("<> ").rsplit("-", 1)[-1])
+        status_line, _, http_message = part.get_payload(decode=True).partition(b"\n")
+        response = parser.parsebytes(http_message)
+        parts[index] = (
+            int(status_line.split()[1]),
+            t.cast(bytes, response.get_payload(decode=True) or b""),
+        )
+    return parts
@@ -4,7 +4,8 @@ from typing import Any
 import requests
 from requests import Response
 
-from dapla import AuthClient
+from dapla import profiling
+from dapla.credentials import CredentialCache
 
 
 class CollectorClient:
@@ -14,6 +15,7 @@ class CollectorClient:
         """Initialize CollectorClient."""
         self.collector_url = collector_url
 
+    @profiling.profiled("service")
     def start(self, specification: dict[str, Any]) -> Response:
         """Start a new collector task.
 
@@ -23,7 +25,7 @@ class CollectorClient:
         Returns:
             Response: The "requests.Response" object from the API call
         """
-        keycloak_token = AuthClient.fetch_personal_token()
+        keycloak_token = CredentialCache.fetch_personal_token()
         collector_response = requests.put(
             self.collector_url,
             headers={
@@ -38,15 +40,17 @@ class CollectorClient:
         )
         return collector_response
 
+    @profiling.profiled("service")
     def running_tasks(self) -> Response:
         """Get all running collector tasks."""
-        keycloak_token = AuthClient.fetch_personal_token()
+        keycloak_token = CredentialCache.fetch_personal_token()
         collector_response = requests.get(
             self.collector_url, headers={"Authorization": f"Bearer {keycloak_token}"}
         )
         collector_response.raise_for_status()
         return collector_response
 
+    @profiling.profiled("service")
     def stop(self, task_id: int) -> Response:
         """Stop a running collector task.
 
@@ -56,7 +60,7 @@ class CollectorClient:
         Returns:
             Response: The "requests.Response" object from the API call
         """
-        keycloak_token = AuthClient.fetch_personal_token()
+        keycloak_token = CredentialCache.fetch_personal_token()
         collector_response = requests.delete(
             f"{self.collector_url}/{task_id}",
             headers={"Authorization": f"Bearer {keycloak_token}"},
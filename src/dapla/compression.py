@@ -0,0 +1,91 @@
+"""Streaming gzip and zstd compression of the files written and read by the FileClient pandas helpers.
+
+Files are compressed and decompressed in chunks as they are written and read, so neither the compressed
+nor the uncompressed content has to fit in memory.
+
+Files written to GCS are stored with the content type 'application/gzip' or 'application/zstd' and no
+Content-Encoding header. GCS decompresses objects stored with 'Content-Encoding: gzip' while serving them,
+which breaks ranged reads and makes the bytes read differ from the stored CRC32C checksum. Without the header
+every client, including gsutil and the Cloud Console, downloads the compressed bytes and decompresses them itself.
+"""
+
+import contextlib
+import posixpath
+from collections.abc import Iterator
+from typing import IO
+from typing import Any
+from typing import Literal
+from typing import cast
+
+import gcsfs
+import pyarrow as pa
+from fsspec import AbstractFileSystem
+
+from dapla.streaming import AccessPattern
+from dapla.streaming import open_with_access
+
+Codec = Literal["gzip", "zstd"]
+
+CODECS = ("gzip", "zstd")
+# File extensions the codec is inferred from
+EXTENSIONS = {".gz": "gzip", ".gzip": "gzip", ".zst": "zstd", ".zstd": "zstd"}
+
+
+def codec_for(path: str, compression: Any = "infer") -> str | None:
+    """Return the codec dapla compresses a file with.
+
+    Args:
+        path: The path to the file.
+        compression: 'gzip' or 'zstd', or 'infer' to pick the codec from a '.gz' or '.zst' extension.
+
+    Returns:
+        'gzip', 'zstd', or None if dapla does not compress the file and any other compression is left to Pandas.
+    """
+    if compression == "infer":
+        return EXTENSIONS.get(posixpath.splitext(path)[1].lower())
+    return compression if compression in CODECS else None
+
+
+@contextlib.contextmanager
+def open_compressed(
+    fs: AbstractFileSystem, path: str, codec: str
+) -> Iterator[IO[bytes]]:
+    """Open a file for writing, compressing what is written to it.
+
+    Args:
+        fs: The filesystem to write to.
+        path: The path to the file.
+        codec: 'gzip' or 'zstd'.
+
+    Yields:
+        A binary file-like object. The file is complete once the block exits.
+    """
+    options: dict[str, Any] = {}
+    if isinstance(fs, gcsfs.GCSFileSystem):
+        options = {"content_type": f"application/{codec}"}
+    with (
+        fs.open(path, "wb", **options) as f,
+        pa.CompressedOutputStream(f, cast(Codec, codec)) as stream,
+    ):
+        yield cast(IO[bytes], stream)
+
+
+@contextlib.contextmanager
+def open_decompressed(
+    fs: AbstractFileSystem, path: str, codec: str
+) -> Iterator[IO[bytes]]:
+    """Open a compressed file for reading, decompressing it as it is read.
+
+    Args:
+        fs: The filesystem to read from.
+        path: The path to the file.
+        codec: 'gzip' or 'zstd'.
+
+    Yields:
+        A binary file-like object with the uncompressed content.
+    """
+    with (
+        open_with_access(fs, path, "rb", AccessPattern.SEQUENTIAL) as f,
+        pa.CompressedInputStream(f, cast(Codec, codec)) as stream,
+    ):
+        yield cast(IO[bytes], stream)
@@ -4,7 +4,8 @@ from typing import Any
 import requests
 from requests import Response
 
-from dapla import AuthClient
+from dapla import profiling
+from dapla.credentials import CredentialCache
 
 
 class ConverterClient:
@@ -14,6 +15,7 @@ class ConverterClient:
         """Initialize ConverterClient."""
         self.converter_url = converter_url
 
+    @profiling.profiled("service")
     def start(self, job_config: dict[str, Any]) -> Response:
         """Schedule a new converter job.
 
@@ -23,7 +25,7 @@ class ConverterClient:
         Returns:
             The "requests.Response" object from the API call
         """
-        keycloak_token = AuthClient.fetch_personal_token()
+        keycloak_token = CredentialCache.fetch_personal_token()
         converter_response = requests.post(
             f"{self.converter_url}/jobs",
             headers={
@@ -35,6 +37,7 @@ class ConverterClient:
         converter_response.raise_for_status()
         return converter_response
 
+    @profiling.profiled("service")
     def start_simulation(self, job_config: dict[str, Any]) -> Response:
         """Start a simulated converter job.
 
@@ -46,7 +49,7 @@ class ConverterClient:
         Returns:
             The "requests.Response" object from the API call
         """
-        keycloak_token = AuthClient.fetch_personal_token()
+        keycloak_token = CredentialCache.fetch_personal_token()
         converter_response = requests.post(
             f"{self.converter_url}/jobs/simulation",
             headers={
@@ -58,6 +61,7 @@ class ConverterClient:
         converter_response.raise_for_status()
         return converter_response
 
+    @profiling.profiled("service")
     def get_job_summary(self, job_id: str) -> Response:
         """Retrieve the execution summary for a specific converter job.
 
@@ -67,7 +71,7 @@ class ConverterClient:
         Returns:
             The "requests.Response" object from the API call
         """
-        keycloak_token = AuthClient.fetch_personal_token()
+        keycloak_token = CredentialCache.fetch_personal_token()
 
         job_summary = requests.get(
             f"{self.converter_url}/jobs/{job_id}/execution-summary",
@@ -79,6 +83,7 @@ class ConverterClient:
         job_summary.raise_for_status()
         return job_summary
 
+    @profiling.profiled("service")
     def stop_job(self, job_id: str) -> Response:
         """Stop a specific converter job.
 
@@ -88,7 +93,7 @@ class ConverterClient:
         Returns:
             The "requests.Response" object from the API call
         """
-        keycloak_token = AuthClient.fetch_personal_token()
+        keycloak_token = CredentialCache.fetch_personal_token()
 
         job_status = requests.post(
             f"{self.converter_url}/jobs/{job_id}/stop",
@@ -100,6 +105,7 @@ class ConverterClient:
         job_status.raise_for_status()
         return job_status
 
+    @profiling.profiled("service")
     def get_pseudo_report(self, job_id: str) -> Response:
         """Get a report with details about how pseudonymization is being applied for a specific job.
 
@@ -117,7 +123,7 @@ class ConverterClient:
         Returns:
             The "requests.Response" object from the API call
         """
-        keycloak_token = AuthClient.fetch_personal_token()
+        keycloak_token = CredentialCache.fetch_personal_token()
 
         pseudo_report = requests.get(
             f"{self.converter_url}/jobs/{job_id}/reports/pseudo",
@@ -129,6 +135,7 @@ class ConverterClient:
         pseudo_report.raise_for_status()
         return pseudo_report
 
+    @profiling.profiled("service")
     def get_pseudo_schema(self, job_id: str) -> Response:
         """Get hierarchical schema representation that details how pseudo rules are being applied.
 
@@ -140,7 +147,7 @@ class ConverterClient:
         Returns:
             The "requests.Response" object from the API call
         """
-        keycloak_token = AuthClient.fetch_personal_token()
+        keycloak_token = CredentialCache.fetch_personal_token()
 
         pseudo_report = requests.get(
             f"{self.converter_url}/jobs/{job_id}/reports/pseudo-schema-hierarchy",
@@ -0,0 +1,250 @@
+import datetime
+import logging
+import os
+import threading
+from typing import ClassVar
+
+import jwt
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+
+from dapla import AuthClient
+from dapla import profiling
+
+logger = logging.getLogger(__name__)
+
+# Refresh a credential this long before it expires, or after three quarters of its remaining lifetime if that is sooner
+REFRESH_MARGIN = datetime.timedelta(minutes=5)
+# How long to keep a personal token whose expiry can not be read from the token itself
+DEFAULT_TOKEN_TTL = datetime.timedelta(minutes=5)
+# Lower bound on the delay between background refreshes, to avoid busy loops on short-lived tokens
+MIN_REFRESH_DELAY = 1.0
+# Seconds to wait before trying again after a failed background refresh
+RETRY_DELAY = 30.0
+
+_GOOGLE_CREDENTIALS_KEY = "google"
+_PERSONAL_TOKEN_KEY = "personal"
+
+
+class CredentialCache:
+    """Process-wide cache of Google credentials and personal tokens.
+
+    Cached values are refreshed in a background thread shortly before they expire,
+    so callers on the hot path get a valid credential without waiting for a token round trip.
+    Hit, miss and refresh counters are available through `stats()`.
+
+    This class should not be instantiated, only the class methods should be used.
+    """
+
+    _lock = threading.RLock()
+    # Held while fetching an entry, so concurrent misses wait for one fetch instead of each making their own
+    _fetch_locks: ClassVar[dict[str, threading.Lock]] = {
+        _GOOGLE_CREDENTIALS_KEY: threading.Lock(),
+        _PERSONAL_TOKEN_KEY: threading.Lock(),
+    }
+    _google_credentials: ClassVar[Credentials | None] = None
+    _personal_token: ClassVar[tuple[str, datetime.datetime] | None] = None
+    _timers: ClassVar[dict[str, threading.Timer]] = {}
+    _stats: ClassVar[dict[str, int]] = {
+        "hits": 0,
+        "misses": 0,
+        "refreshes": 0,
+        "refresh_errors": 0,
+    }
+
+    @classmethod
+    def fetch_google_credentials(cls) -> Credentials:
+        """Return the cached Google credentials, fetching them on first use or once they have expired.
+
+        Returns:
+            The Google "Credentials" object.
+        """
+        credentials = cls._cached_google_credentials()
+        if credentials is not None:
+            return credentials
+        with cls._fetch_locks[_GOOGLE_CREDENTIALS_KEY]:
+            # Another thread may have fetched them while this one waited
+            credentials = cls._cached_google_credentials(count_miss=True)
+            if credentials is not None:
+                return credentials
+            with profiling.span("auth", "fetch google credentials"):
+                credentials = AuthClient.fetch_google_credentials()
+            with cls._lock:
+                cls._google_credentials = credentials
+                cls._schedule_refresh(
+                    _GOOGLE_CREDENTIALS_KEY, _google_credentials_expiry(credentials)
+                )
+            return credentials
+
+    @classmethod
+    def fetch_personal_token(cls) -> str:
+        """Return the cached personal token, fetching a new one if there is no valid token in the cache.
+
+        Returns:
+            The personal token.
+        """
+        token = cls._cached_personal_token()
+        if token is not None:
+            return token
+        with cls._fetch_locks[_PERSONAL_TOKEN_KEY]:
+            token = cls._cached_personal_token(count_miss=True)
+            if token is not None:
+                return token
+            with profiling.span("auth", "fetch personal token"):
+                token, expiry = _fetch_personal_token()
+            with cls._lock:
+                cls._personal_token = (token, expiry)
+                cls._schedule_refresh(_PERSONAL_TOKEN_KEY, expiry)
+            return token
+
+    @classmethod
+    def stats(cls) -> dict[str, int]:
+        """Return a snapshot of the cache counters.
+
+        Returns:
+            A dict with the number of hits, misses, background refreshes and failed background refreshes.
+        """
+        with cls._lock:
+            return dict(cls._stats)
+
+    @classmethod
+    def reset(cls) -> None:
+        """Drop all cached credentials, cancel pending refreshes and zero the counters."""
+        with cls._lock:
+            for timer in cls._timers.values():
+                timer.cancel()
+            cls._timers.clear()
+            cls._google_credentials = None
+            cls._personal_token = None
+            for name in cls._stats:
+                cls._stats[name] = 0
+
+    @classmethod
+    def _cached_google_credentials(cls, count_miss: bool = False) -> Credentials | None:
+        """Return the cached Google credentials if they have not expired, counting the hit or miss."""
+        with cls._lock:
+            credentials = cls._google_credentials
+            if credentials is not None and not _google_credentials_expired(credentials):
+                cls._stats["hits"] += 1
+                return credentials
+            if count_miss:
+                cls._stats["misses"] += 1
+            return None
+
+    @classmethod
+    def _cached_personal_token(cls, count_miss: bool = False) -> str | None:
+        """Return the cached personal token if it has not expired, counting the hit or miss."""
+        with cls._lock:
+            cached = cls._personal_token
+            if cached is not None and _now() < cached[1]:
+                cls._stats["hits"] += 1
+                return cached[0]
+            if count_miss:
+                cls._stats["misses"] += 1
+            return None
+
+    @classmethod
+    def _schedule_refresh(cls, key: str, expiry: datetime.datetime | None) -> None:
+        """Start a timer that refreshes the entry for `key` shortly before `expiry`."""
+        if expiry is None:
+            cls._start_timer(key, None)
+            return
+        remaining = (expiry - _now()).total_seconds()
+        margin = min(REFRESH_MARGIN.total_seconds(), remaining / 4)
+        cls._start_timer(key, max(remaining - margin, MIN_REFRESH_DELAY))
+
+    @classmethod
+    def _start_timer(cls, key: str, delay: float | None) -> None:
+        """Replace the refresh timer for `key` with one firing after `delay` seconds, or none if `delay` is None."""
+        previous = cls._timers.pop(key, None)
+        if previous is not None:
+            previous.cancel()
+        if delay is None:
+            return
+        timer = threading.Timer(delay, cls._refresh, args=(key,))
+        timer.daemon = True
+        cls._timers[key] = timer
+        timer.start()
+
+    @classmethod
+    def _refresh(cls, key: str) -> None:
+        """Refresh the entry for `key` in the background and schedule the next refresh."""
+        try:
+            if key == _GOOGLE_CREDENTIALS_KEY:
+                with cls._lock:
+                    credentials = cls._google_credentials
+                if credentials is None:
+                    return
+                credentials.refresh(Request())
+                expiry = _google_credentials_expiry(credentials)
+            else:
+                token, expiry = _fetch_personal_token()
+                with cls._lock:
+                    if cls._personal_token is None:
+                        return
+                    cls._personal_token = (token, expiry)
+        except Exception as err:
+            # The entry is left as is and retried later, the hot path fetches a new one if it expires before then
+            logger.warning(f"Background refresh of credentials failed: {err}")
+            with cls._lock:
+                cls._stats["refresh_errors"] += 1
+                if cls._timers.get(key) is threading.current_thread():
+                    cls._start_timer(key, RETRY_DELAY)
+            return
+        with cls._lock:
+            cls._stats["refreshes"] += 1
+            if cls._timers.get(key) is threading.current_thread():
+                cls._schedule_refresh(key, expiry)
+
+    @classmethod
+    def _reset_after_fork(cls) -> None:
+        # Timer threads do not survive a fork, and the locks may be held
+        cls._lock = threading.RLock()
+        cls._fetch_locks = {key: threading.Lock() for key in cls._fetch_locks}
+        cls._timers = {}
+        cls._google_credentials = None
+        cls._personal_token = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=CredentialCache._reset_after_fork)
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _fetch_personal_token() -> tuple[str, datetime.datetime]:
+    """Fetch a new personal token and read its expiry from the 'exp' claim."""
+    token = AuthClient.fetch_personal_token()
+    try:
+        claims = jwt.decode(
+            token, algorithms=["RS256"], options={"verify_signature": False}
+        )
+        return token, datetime.datetime.fromtimestamp(
+            float(claims["exp"]), tz=datetime.timezone.utc
+        )
+    except (jwt.PyJWTError, KeyError, TypeError, ValueError):
+        return token, _now() + DEFAULT_TOKEN_TTL
+
+
+def _google_credentials_expired(credentials: Credentials) -> bool:
+    """Tell whether the credentials have an expiry that has passed."""
+    expiry = _google_credentials_expiry(credentials)
+    return getattr(credentials, "token", "") is not None and (
+        expiry is not None and _now() >= expiry
+    )
+
+
+def _google_credentials_expiry(
+    credentials: Credentials,
+) -> datetime.datetime | None:
+    """Return when the credentials need refreshing, or None if they refresh themselves on demand."""
+    expiry = getattr(credentials, "expiry", None)
+    if isinstance(expiry, datetime.datetime):
+        # google-auth stores expiry as a naive UTC timestamp
+        return expiry.replace(tzinfo=datetime.timezone.utc)
+    if getattr(credentials, "token", "") is None:
+        # Credentials from ADC start without a token, fetch one in the background right away
+        return _now()
+    return None
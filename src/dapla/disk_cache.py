@@ -0,0 +1,186 @@
+import contextlib
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from typing import IO
+
+try:
+    import fcntl
+
+    _HAS_FCNTL = True
+except ImportError:  # pragma: no cover - not available on Windows
+    _HAS_FCNTL = False
+
+logger = logging.getLogger(__name__)
+
+# Size limit of the cache unless configured otherwise
+DEFAULT_MAX_BYTES = 10 * 2**30
+# Environment variables enabling the cache for every GCSFileSystem created by dapla
+CACHE_DIR_ENV = "DAPLA_TOOLBELT_CACHE_DIR"
+CACHE_MAX_BYTES_ENV = "DAPLA_TOOLBELT_CACHE_MAX_BYTES"
+
+_LOCK_FILE = ".lock"
+_TMP_SUFFIX = ".tmp"
+# download() writes to '<path>.<uuid>.part' and renames it to the '.tmp' path it was given once complete
+_PART_SUFFIX = ".part"
+# Temporary files not written to for this long are left behind by crashed downloads
+STALE_TMP_SECONDS = 3600.0
+
+
+class DiskCache:
+    """Size-bounded local disk cache of object contents, keyed by bucket, object name and generation.
+
+    A GCS object generation never changes content, so cached entries can not become stale.
+    Entries are evicted least recently used first when the cache grows beyond `max_bytes`.
+    The cache directory can be shared by several processes on one node, access is coordinated with file locks.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """Initialize DiskCache.
+
+        Args:
+            directory: The local directory to store cached objects in. It is created if it does not exist.
+            max_bytes: Size limit of the cache in bytes.
+        """
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes_stored": 0}
+
+    @classmethod
+    def from_env(cls) -> "DiskCache | None":
+        """Create a DiskCache from the environment, or return None if caching is not enabled.
+
+        Returns:
+            A DiskCache in the directory given by 'DAPLA_TOOLBELT_CACHE_DIR', if that is set.
+        """
+        directory = os.getenv(CACHE_DIR_ENV)
+        if not directory:
+            return None
+        max_bytes = os.getenv(CACHE_MAX_BYTES_ENV)
+        return cls(directory, int(max_bytes) if max_bytes else DEFAULT_MAX_BYTES)
+
+    def open(self, bucket: str, name: str, generation: str) -> IO[bytes] | None:
+        """Open a cached object for reading.
+
+        Args:
+            bucket: The bucket of the object.
+            name: The object name.
+            generation: The object generation.
+
+        Returns:
+            An open binary file, or None if the object is not in the cache.
+        """
+        path = self._path(bucket, name, generation)
+        with self._locked(exclusive=False):
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                self._count("misses")
+                return None
+            # The modification time doubles as the last access time for LRU eviction
+            os.utime(path)
+        self._count("hits")
+        return f
+
+    def new_entry_path(self) -> str:
+        """Return a unique temporary path inside the cache directory to download a new entry to.
+
+        Returns:
+            The temporary path. Pass it to `add` once the download is complete.
+        """
+        return os.path.join(self.directory, f"{uuid.uuid4().hex}{_TMP_SUFFIX}")
+
+    def add(self, bucket: str, name: str, generation: str, tmp_path: str) -> IO[bytes]:
+        """Move a downloaded file into the cache and evict old entries if the cache is too large.
+
+        Args:
+            bucket: The bucket of the object.
+            name: The object name.
+            generation: The object generation.
+            tmp_path: The downloaded file, as returned by `new_entry_path`.
+
+        Returns:
+            The new entry, opened for reading.
+        """
+        path = self._path(bucket, name, generation)
+        with self._locked(exclusive=True):
+            os.replace(tmp_path, path)
+            self._count("bytes_stored", os.path.getsize(path))
+            self._evict(keep=path)
+            # Open before releasing the lock, so another process can not evict the entry first
+            return open(path, "rb")
+
+    def stats(self) -> dict[str, int]:
+        """Return a snapshot of the cache counters of this process.
+
+        Returns:
+            A dict with the number of hits, misses, evicted entries and bytes added to the cache.
+        """
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def clear(self) -> None:
+        """Remove all entries from the cache, and temporary files left behind by crashed downloads."""
+        with self._locked(exclusive=True):
+            for entry in self._entries():
+                os.remove(entry.path)
+            self._remove_stale_tmp()
+
+    def _path(self, bucket: str, name: str, generation: str) -> str:
+        key = hashlib.sha256(f"{bucket}/{name}#{generation}".encode()).hexdigest()
+        return os.path.join(self.directory, key)
+
+    def _entries(self, tmp: bool = False) -> list[os.DirEntry[str]]:
+        """List the cached entries, or the temporary files of downloads if `tmp` is True."""
+        with os.scandir(self.directory) as it:
+            return [
+                entry
+                for entry in it
+                if entry.is_file()
+                and entry.name != _LOCK_FILE
+                and entry.name.endswith((_TMP_SUFFIX, _PART_SUFFIX)) == tmp
+            ]
+
+    def _remove_stale_tmp(self) -> None:
+        """Remove temporary files that have not been written to for `STALE_TMP_SECONDS`."""
+        cutoff = time.time() - STALE_TMP_SECONDS
+        for entry in self._entries(tmp=True):
+            with contextlib.suppress(FileNotFoundError):
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+
+    def _evict(self, keep: str) -> None:
+        """Remove stale temporary files and the least recently used entries until the cache fits within `max_bytes`."""
+        self._remove_stale_tmp()
+        entries = [(entry, entry.stat()) for entry in self._entries()]
+        total = sum(stat.st_size for _, stat in entries)
+        for entry, stat in sorted(entries, key=lambda e: e[1].st_mtime):
+            if total <= self.max_bytes:
+                break
+            if entry.path == keep:
+                continue
+            os.remove(entry.path)
+            total -= stat.st_size
+            self._count("evictions")
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        if not _HAS_FCNTL:
+            yield
+            return
+        with open(os.path.join(self.directory, _LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += amount
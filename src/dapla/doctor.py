@@ -8,6 +8,7 @@ import requests
 from gcsfs.retry import HttpError
 
 from dapla import AuthClient
+from dapla.credentials import CredentialCache
 
 logger = logging.getLogger(__name__)
 
@@ -57,7 +58,7 @@ class Doctor:
         print("Checking your Google Cloud Storage credentials...")
 
         # Fetch the google token
-        google_token = AuthClient.fetch_google_credentials().token
+        google_token = CredentialCache.fetch_google_credentials().token
 
         try:
             requests.get(
@@ -1,13 +1,60 @@
+import collections
+import contextlib
+import datetime
+import itertools
+import logging
 import typing as t
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
 from io import TextIOWrapper
 from typing import Any
 
 import google
 import pandas as pd
+import pyarrow as pa
+from fsspec.asyn import sync
 from fsspec.spec import AbstractBufferedFile
+from fsspec.spec import AbstractFileSystem
 from google.cloud import storage
+from pandas._typing import CompressionOptions
+from pandas.io.common import infer_compression  # type: ignore [import-not-found, unused-ignore]
 
+from . import arrow
+from . import backends
+from . import metrics
+from . import profiling
+from .batch import DEFAULT_BATCH_CONCURRENCY
+from .batch import info_many
+from .batch import rm_many
+from .compression import codec_for
+from .compression import open_compressed
+from .compression import open_decompressed
 from .gcs import GCSFileSystem
+from .gcs import GCSFileSystemPool
+from .gcs import StorageClientPool
+from .restore import RestoreResult
+from .restore import restore_prefix
+from .rewrite import TreeProgress
+from .rewrite import copy_tree
+from .rewrite import move_tree
+from .streaming import DEFAULT_CHUNK_SIZE
+from .streaming import AccessPattern
+from .streaming import iter_chunks
+from .streaming import iter_lines
+from .streaming import open_with_access
+from .sync import SyncResult
+from .sync import sync_dirs
+from .transfer import DEFAULT_COMPOSITE_THRESHOLD
+from .transfer import DEFAULT_MAX_CONCURRENCY
+from .transfer import cat_many
+from .transfer import download
+from .transfer import get_many
+from .transfer import iter_cat_many
+from .transfer import put_many
+from .versions import open_as_of
+
+logger = logging.getLogger(__name__)
 
 GS_URI_PREFIX = "gs://"
 
@@ -25,7 +72,7 @@ class FileClient:
         Some operations require GCS uris, but we don't want the user to bother with knowing when to use the prefix,
         so we ensure its presence automatically where it is needed.
         """
-        if not gcs_path.startswith(GS_URI_PREFIX):
+        if not backends.has_scheme(gcs_path):
             gcs_path = f"{GS_URI_PREFIX}{gcs_path}"
         return gcs_path
 
@@ -36,10 +83,25 @@ class FileClient:
             gcs_path = gcs_path[len(GS_URI_PREFIX) :]
         return gcs_path
 
+    @staticmethod
+    def _update_listing_cache(gcs_path: str) -> None:
+        """Bring cached listings of the pooled file systems up to date with a write that bypassed them."""
+        if not backends.is_gcs(gcs_path):
+            return
+        for fs in GCSFileSystemPool.instances():
+            try:
+                fs.update_listing_cache(gcs_path)
+            except Exception:
+                # Fall back to dropping the affected listings, for example if the metadata could not be read
+                fs.invalidate_cache(gcs_path)
+
     @staticmethod
     def get_gcs_file_system(**kwargs: Any) -> GCSFileSystem:
         """Return a pythonic file-system for Google Cloud Storage - initialized with a personal Google Identity token.
 
+        Instances are pooled per process, so calls with the same arguments share one authenticated
+        session and its connections. Use `GCSFileSystemPool.reset()` to discard the pooled instances.
+
         Args:
             kwargs: Additional arguments to pass to the underlying GCSFileSystem.
 
@@ -48,12 +110,114 @@ class FileClient:
 
         See https://gcsfs.readthedocs.io/en/latest for advanced usage
         """
-        return GCSFileSystem(**kwargs)
+        return GCSFileSystemPool.get(**kwargs)
+
+    @staticmethod
+    def get_file_system(path: str | None = None, **kwargs: Any) -> AbstractFileSystem:
+        """Return the file-system of the storage backend a path is sent to.
+
+        Paths with the 'gs://' scheme or without a scheme go to GCS, unless the environment variable
+        'DAPLA_TOOLBELT_STORAGE_BACKEND' sends them to a local directory or to memory.
+        Paths starting with 'file://' or 'memory://' always go to that backend. See `dapla.backends`.
+
+        Args:
+            path: The path, or None for the backend of paths without a scheme.
+            kwargs: Additional arguments to pass to the underlying file-system.
+
+        Returns:
+            The GCSFileSystem from `get_gcs_file_system` for paths sent to GCS, or the file-system of another backend.
+        """
+        if backends.is_gcs(path or ""):
+            return FileClient.get_gcs_file_system(**kwargs)
+        return backends.filesystem_for(path or "", **kwargs)
+
+    @staticmethod
+    def _file_system_for_paths(
+        paths: Iterable[str],
+    ) -> tuple[AbstractFileSystem, list[str]]:
+        """Return the file-system shared by the backends of several paths, and the paths as a list.
+
+        Raises:
+            ValueError: If the paths are sent to different storage backends.
+        """
+        paths = list(paths)
+        used = {backends.backend_for(path) for path in paths}
+        if len(used) > 1:
+            raise ValueError(
+                f"All paths must be in the same storage backend, got {', '.join(sorted(used))}"
+            )
+        return FileClient.get_file_system(paths[0] if paths else None), paths
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _pandas_io(
+        gcs_path: str,
+        mode: str,
+        compression: CompressionOptions = "infer",
+    ) -> Iterator[Any]:
+        """Yield what to pass to a Pandas reader or writer.
+
+        Files compressed with gzip or zstd are opened here and handed to Pandas uncompressed.
+        Other files are passed as their 'gs://' URI to GCS, or opened in another backend.
+        """
+        codec = codec_for(gcs_path, compression)
+        if codec is not None:
+            fs = FileClient.get_file_system(gcs_path)
+            gcs_path = FileClient._ensure_gcs_uri_prefix(gcs_path)
+            with (
+                open_compressed(fs, gcs_path, codec)
+                if "w" in mode
+                else open_decompressed(fs, gcs_path, codec)
+            ) as f:
+                yield f
+        elif backends.is_gcs(gcs_path):
+            yield FileClient._ensure_gcs_uri_prefix(gcs_path)
+        else:
+            with FileClient.get_file_system(gcs_path).open(gcs_path, mode) as f:
+                yield f
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _open_stream(
+        gcs_path: str, compression: CompressionOptions = "infer"
+    ) -> Iterator[Any]:
+        """Open a file to be read from start to end, decompressing gzip and zstd files.
+
+        Raises:
+            ValueError: If the file is compressed with another codec.
+        """
+        fs = FileClient.get_file_system(gcs_path)
+        gcs_path = FileClient._ensure_gcs_uri_prefix(gcs_path)
+        codec = codec_for(gcs_path, compression)
+        if codec is not None:
+            with open_decompressed(fs, gcs_path, codec) as f:
+                yield f
+        elif FileClient._pandas_compression(gcs_path, compression) is not None:
+            raise ValueError(
+                f"Only gzip and zstd files can be streamed, got compression {compression!r} for '{gcs_path}'"
+            )
+        else:
+            with open_with_access(fs, gcs_path, "rb", AccessPattern.SEQUENTIAL) as f:
+                yield f
+
+    @staticmethod
+    def _pandas_compression(
+        gcs_path: str, compression: CompressionOptions
+    ) -> CompressionOptions:
+        """Return the compression for Pandas to apply, None for files that `_pandas_io` decompresses or compresses.
+
+        'infer' is resolved from the path here, since Pandas cannot infer it from the open files of other backends.
+        """
+        if codec_for(gcs_path, compression):
+            return None
+        return t.cast(CompressionOptions, infer_compression(gcs_path, compression))
 
     @staticmethod
     def ls(gcs_path: str, detail: bool = False, **kwargs: Any) -> Any:
         """List the contents of a GCS bucket path.
 
+        Listings are cached for a short while, see `GCSFileSystem`. Pass `refresh=True` to bypass the cache.
+
         Args:
             gcs_path: The GCS path to a directory.
             detail: Whether to return detailed information about the files.
@@ -62,7 +226,9 @@ class FileClient:
         Returns:
             List of strings if detail is False, or list of directory information dicts if detail is True.
         """
-        return FileClient.get_gcs_file_system().ls(gcs_path, detail=detail, **kwargs)
+        return FileClient.get_file_system(gcs_path).ls(
+            gcs_path, detail=detail, **kwargs
+        )
 
     @staticmethod
     def get_versions(bucket_name: str, file_path: str) -> Any:
@@ -75,18 +241,90 @@ class FileClient:
         Returns:
             List of versions of the file.
         """
-        storage_client = storage.Client()
+        storage_client = StorageClientPool.get()
         try:
-            bucket = storage_client.get_bucket(bucket_name)
+            with metrics.timed("list"), profiling.io(
+                "list", f"{bucket_name}/{file_path}"
+            ):
+                bucket = storage_client.get_bucket(bucket_name)
 
-            if bucket.versioning_enabled:
-                return list(bucket.list_blobs(prefix=file_path, versions=True))
-            else:
-                return list(bucket.list_blobs(prefix=file_path, soft_deleted=True))
+                if bucket.versioning_enabled:
+                    return list(bucket.list_blobs(prefix=file_path, versions=True))
+                else:
+                    return list(bucket.list_blobs(prefix=file_path, soft_deleted=True))
         except google.api_core.exceptions.NotFound:
-            print(f'Bucket "{bucket_name}" does not exist')
+            logger.warning(f'Bucket "{bucket_name}" does not exist')
             return []
 
+    @staticmethod
+    def iter_versions(
+        bucket_name: str,
+        file_path: str,
+        start_time: datetime.datetime | None = None,
+        end_time: datetime.datetime | None = None,
+        min_generation: int | None = None,
+        max_generation: int | None = None,
+        latest: int | None = None,
+        page_size: int = 1000,
+    ) -> Iterator[storage.Blob]:
+        """Iterate over versions of the files below a path, fetching them from GCS one page at a time.
+
+        Unlike `get_versions`, versions are not all loaded into memory, and the storage client is reused between calls.
+        Versions of one file are listed in the order they were created.
+
+        Args:
+            bucket_name: Bucket name where the files are located.
+            file_path: Path to a file, or a prefix matching several files.
+            start_time: Skip versions created before this time.
+            end_time: Skip versions created at or after this time.
+            min_generation: Skip versions with a lower generation.
+            max_generation: Skip versions with a higher generation.
+            latest: Only yield this many of the most recent matching versions of each file.
+            page_size: Number of versions fetched per request.
+
+        Yields:
+            The matching versions, as blobs.
+        """
+        path = f"{bucket_name}/{file_path}"
+        try:
+            with metrics.timed("list"), profiling.io("list", path):
+                bucket = StorageClientPool.get().get_bucket(bucket_name)
+        except google.api_core.exceptions.NotFound:
+            logger.warning(f'Bucket "{bucket_name}" does not exist')
+            return
+        if bucket.versioning_enabled:
+            blobs = bucket.list_blobs(
+                prefix=file_path, versions=True, page_size=page_size
+            )
+        else:
+            blobs = bucket.list_blobs(
+                prefix=file_path, soft_deleted=True, page_size=page_size
+            )
+
+        def fetch_pages() -> Iterator[storage.Blob]:
+            # Every page is one request, made when the previous page has been consumed
+            pages = iter(blobs.pages)
+            while True:
+                with metrics.timed("list"), profiling.io("list", path):
+                    page = next(pages, None)
+                if page is None:
+                    return
+                yield from page
+
+        matching = (
+            blob
+            for blob in fetch_pages()
+            if _version_in_range(
+                blob, start_time, end_time, min_generation, max_generation
+            )
+        )
+        if latest is None:
+            yield from matching
+            return
+        # Versions come grouped by file name, so only `latest` versions are held at a time
+        for _, versions in itertools.groupby(matching, key=lambda blob: blob.name):
+            yield from collections.deque(versions, maxlen=latest)
+
     @staticmethod
     def restore_version(
         source_bucket_name: str,
@@ -105,7 +343,7 @@ class FileClient:
         Returns:
             A new blob with new generation id.
         """
-        storage_client = storage.Client()
+        storage_client = StorageClientPool.get()
 
         try:
             source_bucket = storage_client.get_bucket(source_bucket_name)
@@ -113,12 +351,19 @@ class FileClient:
 
             if source_bucket.versioning_enabled:
                 try:
-                    return source_bucket.copy_blob(
-                        blob=source_file,
-                        destination_bucket=source_bucket,
-                        source_generation=source_generation_id,
-                        **kwargs,
+                    with metrics.timed("copy"), profiling.io(
+                        "copy", f"{source_bucket_name}/{source_file_name}"
+                    ):
+                        restored = source_bucket.copy_blob(
+                            blob=source_file,
+                            destination_bucket=source_bucket,
+                            source_generation=source_generation_id,
+                            **kwargs,
+                        )
+                    FileClient._update_listing_cache(
+                        f"{source_bucket_name}/{restored.name}"
                     )
+                    return restored
                 except google.api_core.exceptions.NotFound:
                     print(
                         f'No such object "{source_file_name}" exist with generationnumber "{source_generation_id}".'
@@ -126,11 +371,18 @@ class FileClient:
                     return []
             else:
                 try:
-                    return source_bucket.restore_blob(
-                        blob_name=source_file_name,
-                        generation=source_generation_id,
-                        **kwargs,
+                    with metrics.timed("copy"), profiling.io(
+                        "copy", f"{source_bucket_name}/{source_file_name}"
+                    ):
+                        restored = source_bucket.restore_blob(
+                            blob_name=source_file_name,
+                            generation=source_generation_id,
+                            **kwargs,
+                        )
+                    FileClient._update_listing_cache(
+                        f"{source_bucket_name}/{restored.name}"
                     )
+                    return restored
                 except google.api_core.exceptions.NotFound:
                     print(
                         f'No such object "{source_file_name}" exist with generationnumber "{source_generation_id}"'
@@ -140,6 +392,41 @@ class FileClient:
         except google.api_core.exceptions.NotFound:
             print(f'Bucket "{source_bucket_name}" does not exist')
 
+    @staticmethod
+    def restore_prefix(
+        bucket: str,
+        prefix: str,
+        as_of: datetime.datetime,
+        delete_newer: bool = False,
+        dry_run: bool = False,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> RestoreResult:
+        """Restore every file below a path to the version that was live at a point in time.
+
+        Works in buckets with object versioning or soft delete. The versions to restore are resolved
+        from one listing of the bucket, and the files are restored concurrently.
+
+        Args:
+            bucket: Bucket name where the files are located.
+            prefix: Restore the files whose path starts with this prefix.
+            as_of: The point in time to restore, as a timezone aware datetime.
+            delete_newer: Delete files that did not exist at `as_of`.
+            dry_run: Only report what would be restored and deleted.
+            max_concurrency: Maximum number of files restored at once.
+
+        Returns:
+            A `RestoreResult` with the restored, deleted, unchanged and newer files, and the error for every file that failed.
+        """
+        return restore_prefix(
+            FileClient.get_gcs_file_system(),
+            bucket,
+            prefix,
+            as_of,
+            delete_newer,
+            dry_run,
+            max_concurrency,
+        )
+
     @staticmethod
     def cat(gcs_path: str) -> str:
         """Get string content of a file from GCS.
@@ -151,118 +438,595 @@ class FileClient:
             utf-8 decoded string content of the given file
         """
         return t.cast(
-            str, FileClient.get_gcs_file_system().cat(gcs_path).decode("utf-8")
+            str, FileClient.get_file_system(gcs_path).cat(gcs_path).decode("utf-8")
+        )
+
+    @staticmethod
+    def iter_lines(
+        gcs_path: str,
+        encoding: str = "utf-8",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        readahead: int = 0,
+    ) -> Iterator[str]:
+        """Stream the lines of a text file from GCS, without loading the whole file into memory.
+
+        Args:
+            gcs_path: The GCS path to a file.
+            encoding: The text encoding of the file.
+            chunk_size: Number of bytes fetched from GCS at a time.
+            readahead: Number of chunks to fetch in the background while the current one is processed.
+
+        Returns:
+            An iterator over the lines of the file, without line terminators.
+        """
+        return iter_lines(
+            FileClient.get_file_system(gcs_path),
+            gcs_path,
+            encoding=encoding,
+            chunk_size=chunk_size,
+            readahead=readahead,
+        )
+
+    @staticmethod
+    def iter_chunks(
+        gcs_path: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        encoding: str | None = "utf-8",
+        readahead: int = 0,
+    ) -> Iterator[Any]:
+        """Stream the content of a file from GCS in chunks, without loading the whole file into memory.
+
+        Args:
+            gcs_path: The GCS path to a file.
+            chunk_size: Number of bytes fetched from GCS at a time.
+            encoding: Decode the content incrementally with this encoding. Set to None to get bytes.
+            readahead: Number of chunks to fetch in the background while the current one is processed.
+
+        Returns:
+            An iterator over the chunks of the file, as str or as bytes if encoding is None.
+        """
+        return iter_chunks(
+            FileClient.get_file_system(gcs_path),
+            gcs_path,
+            chunk_size=chunk_size,
+            encoding=encoding,
+            readahead=readahead,
+        )
+
+    @staticmethod
+    def cat_many(
+        gcs_paths: Iterable[str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        encoding: str | None = "utf-8",
+    ) -> dict[str, Any]:
+        """Get the content of many files from GCS concurrently.
+
+        Failing files do not stop the others, their exception is returned in place of the content.
+
+        Args:
+            gcs_paths: The GCS paths to the files.
+            max_concurrency: Maximum number of files downloaded at once.
+            encoding: Decode the content with this encoding. Returns bytes if None. Defaults to 'utf-8'.
+
+        Returns:
+            A dict mapping each path to its content, or to the exception raised while reading it.
+
+        Raises:
+            ValueError: If the paths are in different storage backends.
+        """
+        fs, paths = FileClient._file_system_for_paths(gcs_paths)
+        return cat_many(fs, paths, max_concurrency, encoding)
+
+    @staticmethod
+    def iter_cat_many(
+        gcs_paths: Iterable[str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        encoding: str | None = "utf-8",
+        ordered: bool = False,
+    ) -> Iterator[tuple[str, Any]]:
+        """Get the content of many files from GCS concurrently, yielding each file as soon as it is downloaded.
+
+        Args:
+            gcs_paths: The GCS paths to the files.
+            max_concurrency: Maximum number of files downloaded at once.
+            encoding: Decode the content with this encoding. Yields bytes if None. Defaults to 'utf-8'.
+            ordered: Yield files in the order of `gcs_paths` instead of in the order they complete.
+
+        Returns:
+            An iterator of tuples of path and content, or path and the exception raised while reading it.
+
+        Raises:
+            ValueError: If the paths are in different storage backends.
+        """
+        fs, paths = FileClient._file_system_for_paths(gcs_paths)
+        return iter_cat_many(fs, paths, max_concurrency, encoding, ordered)
+
+    @staticmethod
+    def get_many(
+        gcs_paths: Iterable[str],
+        local_dir: str,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> dict[str, Any]:
+        """Download many files from GCS concurrently into a local directory.
+
+        The folder structure below the deepest folder shared by all paths is kept.
+        Failing files do not stop the others, their exception is returned in place of the local path.
+
+        Args:
+            gcs_paths: The GCS paths to the files.
+            local_dir: The local directory to download into.
+            max_concurrency: Maximum number of files downloaded at once.
+
+        Returns:
+            A dict mapping each path to the local file path, or to the exception raised while downloading it.
+
+        Raises:
+            ValueError: If the paths are in different storage backends.
+        """
+        fs, paths = FileClient._file_system_for_paths(gcs_paths)
+        return get_many(fs, paths, local_dir, max_concurrency)
+
+    @staticmethod
+    def download(
+        gcs_path: str,
+        local_path: str,
+        slices: int | None = None,
+        verify: bool = True,
+    ) -> str:
+        """Download a large file from GCS using concurrent ranged requests.
+
+        The file is split into byte ranges that are downloaded in parallel straight into a preallocated local file,
+        which makes better use of the available bandwidth than a single stream.
+
+        Args:
+            gcs_path: The GCS path to the file.
+            local_path: The local destination file.
+            slices: Number of ranges downloaded concurrently. Chosen from the file size if None.
+            verify: Check the crc32c checksum of the downloaded file against GCS. Defaults to True.
+
+        Returns:
+            The local file path.
+        """
+        fs = FileClient.get_file_system(gcs_path)
+        return t.cast(
+            str, sync(fs.loop, download, fs, gcs_path, local_path, slices, verify)
+        )
+
+    @staticmethod
+    def put_many(
+        local_paths: Iterable[str],
+        gcs_prefix: str,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        composite_threshold: int | None = DEFAULT_COMPOSITE_THRESHOLD,
+    ) -> dict[str, Any]:
+        """Upload many local files to a GCS folder concurrently.
+
+        The folder structure below the deepest folder shared by all files is kept.
+        Large files are split into slices that are uploaded in parallel and composed into one object in GCS.
+        Failing files do not stop the others, their exception is returned in place of the GCS path.
+
+        Args:
+            local_paths: Paths to the local files.
+            gcs_prefix: The GCS path to the destination folder.
+            max_concurrency: Maximum number of files, or slices of a large file, uploaded at once.
+            composite_threshold: Size in bytes from which a file is uploaded in parallel slices.
+                Set to None to upload every file as a single stream. Defaults to 150 MiB.
+
+        Returns:
+            A dict mapping each local path to the GCS path it was uploaded to, or to the exception raised while uploading it.
+        """
+        return put_many(
+            FileClient.get_file_system(gcs_prefix),
+            local_paths,
+            FileClient._ensure_gcs_uri_prefix(gcs_prefix),
+            max_concurrency,
+            composite_threshold,
+        )
+
+    @staticmethod
+    def info_many(
+        gcs_paths: Iterable[str],
+        max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    ) -> dict[str, Any]:
+        """Get the metadata of many files in GCS, with up to 100 lookups per request.
+
+        Args:
+            gcs_paths: The GCS paths to the files.
+            max_concurrency: Maximum number of batch requests sent at once.
+
+        Returns:
+            A dict mapping each GCS path to its metadata, or to the exception for that file,
+            such as FileNotFoundError if it does not exist.
+
+        Raises:
+            ValueError: If the paths are in different storage backends.
+        """
+        fs, paths = FileClient._file_system_for_paths(gcs_paths)
+        return info_many(fs, paths, max_concurrency)
+
+    @staticmethod
+    def rm_many(
+        gcs_paths: Iterable[str],
+        max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    ) -> dict[str, Any]:
+        """Delete many files in GCS, with up to 100 deletes per request.
+
+        Failing files do not stop the others.
+
+        Args:
+            gcs_paths: The GCS paths to the files.
+            max_concurrency: Maximum number of batch requests sent at once.
+
+        Returns:
+            A dict mapping each GCS path to None if it was deleted, or to the exception for that file.
+
+        Raises:
+            ValueError: If the paths are in different storage backends.
+        """
+        fs, paths = FileClient._file_system_for_paths(gcs_paths)
+        return rm_many(fs, paths, max_concurrency)
+
+    @staticmethod
+    def copy_tree(
+        src_prefix: str,
+        dst_prefix: str,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        checkpoint: str | None = None,
+        progress: Callable[[TreeProgress], None] | None = None,
+    ) -> dict[str, Any]:
+        """Copy a folder in GCS to another folder, possibly in another bucket, without the data passing through this machine.
+
+        Args:
+            src_prefix: The GCS path to the folder to copy, or to a single object to copy into `dst_prefix`.
+            dst_prefix: The GCS path to the destination folder.
+            max_concurrency: Maximum number of files copied at once.
+            checkpoint: Path to a local file recording progress. Running the same copy again with the same
+                checkpoint skips the files that were already copied, and resumes large files where they stopped.
+            progress: Called with a `TreeProgress` with the number of files and bytes copied so far.
+
+        Returns:
+            A dict mapping each source path to its destination path, or to the exception raised while copying it.
+        """
+        return copy_tree(
+            FileClient.get_file_system(src_prefix),
+            src_prefix,
+            dst_prefix,
+            max_concurrency,
+            checkpoint,
+            progress,
+        )
+
+    @staticmethod
+    def move_tree(
+        src_prefix: str,
+        dst_prefix: str,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        checkpoint: str | None = None,
+        progress: Callable[[TreeProgress], None] | None = None,
+    ) -> dict[str, Any]:
+        """Move a folder in GCS to another folder, possibly in another bucket, without the data passing through this machine.
+
+        The files are copied as with `copy_tree`, and then deleted from the source folder.
+        Files that could not be copied are left in the source folder.
+
+        Args:
+            src_prefix: The GCS path to the folder to move, or to a single object to move into `dst_prefix`.
+            dst_prefix: The GCS path to the destination folder.
+            max_concurrency: Maximum number of files copied at once.
+            checkpoint: Path to a local file recording progress, see `copy_tree`.
+            progress: Called with a `TreeProgress` with the number of files and bytes copied so far.
+
+        Returns:
+            A dict mapping each source path to its destination path, or to the exception raised while moving it.
+        """
+        return move_tree(
+            FileClient.get_file_system(src_prefix),
+            src_prefix,
+            dst_prefix,
+            max_concurrency,
+            checkpoint,
+            progress,
+        )
+
+    @staticmethod
+    def sync(
+        src: str,
+        dst: str,
+        delete: bool = False,
+        dry_run: bool = False,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        hash_index: str | None = None,
+        allow_empty_source: bool = False,
+    ) -> SyncResult:
+        """Copy the files that differ from a local directory to a GCS folder, or from a GCS folder to a local directory.
+
+        Files are compared by size and checksum, so unchanged files are not copied again.
+        Checksums of local files are remembered between calls in a hash index.
+
+        Args:
+            src: The source folder. Exactly one of `src` and `dst` must be a GCS path starting with 'gs://'.
+            dst: The destination folder.
+            delete: Delete files at the destination that are not in the source.
+            dry_run: Only report what would be copied and deleted.
+            max_concurrency: Maximum number of files copied at once.
+            hash_index: Path to the hash index file. Defaults to a file in the user's cache directory.
+            allow_empty_source: With `delete`, allow an empty source, which deletes every file at the destination.
+
+        Returns:
+            A `SyncResult` with the copied, deleted and unchanged files.
+
+        Raises:
+            ValueError: If neither or both of `src` and `dst` start with 'gs://',
+                or if `delete` is set and the source is empty, without `allow_empty_source`.
+            FileNotFoundError: If the source folder does not exist.
+        """
+        if src.startswith(GS_URI_PREFIX) == dst.startswith(GS_URI_PREFIX):
+            raise ValueError(
+                f"Exactly one of src and dst must be a GCS path starting with '{GS_URI_PREFIX}'"
+            )
+        to_gcs = dst.startswith(GS_URI_PREFIX)
+        return sync_dirs(
+            FileClient.get_file_system(dst if to_gcs else src),
+            local_dir=src if to_gcs else dst,
+            gcs_prefix=dst if to_gcs else src,
+            to_gcs=to_gcs,
+            delete=delete,
+            dry_run=dry_run,
+            max_concurrency=max_concurrency,
+            hash_index=hash_index,
+            allow_empty_source=allow_empty_source,
         )
 
     @staticmethod
     def gcs_open(
-        gcs_path: str, mode: str = "r"
+        gcs_path: str,
+        mode: str = "r",
+        access: AccessPattern | str | None = None,
+        as_of: datetime.datetime | None = None,
     ) -> TextIOWrapper | AbstractBufferedFile:
         """Open a file in GCS, works like regular python open().
 
         Args:
             gcs_path: The GCS path to a file.
             mode: File open mode. Defaults to 'r'
+            access: How the file is going to be read, one of 'sequential', 'random', 'parquet' or 'whole'.
+                Picks the block size, readahead and cache type, and adds a `read_stats` attribute to the file
+                with the bytes fetched from GCS and the bytes read. Only valid for read modes.
+            as_of: Open the version of the file that was live at this time, as a timezone aware datetime.
+                Needs object versioning or soft delete on the bucket. Only valid for read modes.
 
         Returns:
             A file-like object.
         """
-        return FileClient.get_gcs_file_system().open(
-            FileClient._ensure_gcs_uri_prefix(gcs_path), mode
+        if as_of is not None:
+            return t.cast(
+                TextIOWrapper | AbstractBufferedFile,
+                open_as_of(
+                    FileClient.get_gcs_file_system(version_aware=True),
+                    gcs_path,
+                    as_of,
+                    mode,
+                    access,
+                ),
+            )
+        return t.cast(
+            TextIOWrapper | AbstractBufferedFile,
+            open_with_access(
+                FileClient.get_file_system(gcs_path),
+                FileClient._ensure_gcs_uri_prefix(gcs_path),
+                mode,
+                access,
+            ),
         )
 
     @staticmethod
-    def load_csv_to_pandas(gcs_path: str, **kwargs: Any) -> pd.DataFrame:
+    def load_csv_to_pandas(
+        gcs_path: str,
+        compression: CompressionOptions = "infer",
+        **kwargs: Any,
+    ) -> pd.DataFrame:
         """Reads a CSV file from Google Cloud Storage into a Pandas DataFrame.
 
         Args:
             gcs_path: The GCS path to a .csv file.
-            **kwargs: Additional arguments to pass to the underlying Pandas read_csv().
+            compression: 'gzip' or 'zstd' to decompress the file while it is read, or 'infer' to pick
+                the codec from a '.gz' or '.zst' extension. Other values are passed on to Pandas.
+            **kwargs: Additional arguments to pass to the underlying Pandas read_csv(). With `engine="arrow"`,
+                the file is instead streamed into the multithreaded Arrow CSV parser, which returns an Arrow backed
+                DataFrame and takes the columns to read as `usecols`, and `sep`, `block_size` and `use_threads`,
+                see `dapla.arrow.read_csv`.
 
         Returns:
             A Pandas DataFrame.
         """
-        return t.cast(
-            pd.DataFrame,
-            pd.read_csv(
-                FileClient._ensure_gcs_uri_prefix(gcs_path),
-                **kwargs,
-            ),
-        )
+        if kwargs.get("engine") == arrow.ENGINE:
+            del kwargs["engine"]
+            with FileClient._open_stream(gcs_path, compression) as f:
+                return arrow.read_csv(f, columns=kwargs.pop("usecols", None), **kwargs)
+        with FileClient._pandas_io(gcs_path, "rb", compression) as source:
+            return t.cast(
+                pd.DataFrame,
+                pd.read_csv(
+                    source,
+                    compression=FileClient._pandas_compression(gcs_path, compression),
+                    **kwargs,
+                ),
+            )
 
     @staticmethod
-    def load_json_to_pandas(gcs_path: str, **kwargs: Any) -> pd.DataFrame:
+    def load_json_to_pandas(
+        gcs_path: str,
+        compression: CompressionOptions = "infer",
+        **kwargs: Any,
+    ) -> pd.DataFrame:
         """Reads a JSON file from Google Cloud Storage into a Pandas DataFrame.
 
         Args:
             gcs_path: The GCS path to a .json file.
-            **kwargs: Additional arguments to pass to the underlying Pandas read_json().
+            compression: 'gzip' or 'zstd' to decompress the file while it is read, or 'infer' to pick
+                the codec from a '.gz' or '.zst' extension. Other values are passed on to Pandas.
+            **kwargs: Additional arguments to pass to the underlying Pandas read_json(). With `engine="arrow"`,
+                a newline-delimited JSON file is instead streamed into the multithreaded Arrow JSON parser, which
+                returns an Arrow backed DataFrame and takes `columns`, `schema`, `block_size` and `use_threads`,
+                see `dapla.arrow.read_json`.
 
         Returns:
             A Pandas DataFrame.
+
+        Raises:
+            ValueError: If the Arrow engine is asked to read a file that is not newline-delimited.
         """
-        return t.cast(
-            pd.DataFrame,
-            pd.read_json(
-                FileClient._ensure_gcs_uri_prefix(gcs_path),
-                **kwargs,
-            ),
-        )
+        if kwargs.get("engine") == arrow.ENGINE:
+            del kwargs["engine"]
+            if not kwargs.pop("lines", True):
+                raise ValueError("The arrow engine only reads newline-delimited JSON")
+            with FileClient._open_stream(gcs_path, compression) as f:
+                return arrow.read_json(f, **kwargs)
+        with FileClient._pandas_io(gcs_path, "rb", compression) as source:
+            return t.cast(
+                pd.DataFrame,
+                pd.read_json(
+                    source,
+                    compression=FileClient._pandas_compression(gcs_path, compression),
+                    **kwargs,
+                ),
+            )
+
+    @staticmethod
+    def iter_json_batches(
+        gcs_path: str,
+        columns: list[str] | None = None,
+        schema: pa.Schema | None = None,
+        block_size: int = arrow.DEFAULT_BLOCK_SIZE,
+        compression: CompressionOptions = "infer",
+    ) -> Iterator[pd.DataFrame]:
+        """Stream a newline-delimited JSON file from GCS as DataFrames of one block each, in constant memory.
+
+        Args:
+            gcs_path: The GCS path to a .json or .ndjson file.
+            columns: Names of the columns to read, in this order. Defaults to None, which reads all of them.
+            schema: The fields to read and their Arrow types. Other fields are skipped while parsing, and no
+                types are inferred. Defaults to None, which infers them from the first block.
+            block_size: Bytes parsed at a time. Must be larger than the longest line.
+            compression: 'gzip' or 'zstd' to decompress the file while it is read, or 'infer' to pick
+                the codec from a '.gz' or '.zst' extension.
+
+        Yields:
+            Arrow backed Pandas DataFrames with the same columns and types, see `dapla.arrow.iter_json`.
+        """
+        with FileClient._open_stream(gcs_path, compression) as f:
+            yield from arrow.iter_json(
+                f, columns=columns, schema=schema, block_size=block_size
+            )
 
     @staticmethod
-    def load_xml_to_pandas(gcs_path: str, **kwargs: Any) -> pd.DataFrame:
+    def load_xml_to_pandas(
+        gcs_path: str,
+        compression: CompressionOptions = "infer",
+        **kwargs: Any,
+    ) -> pd.DataFrame:
         """Reads an XML file from Google Cloud Storage into a Pandas DataFrame.
 
         Args:
             gcs_path: The GCS path to a .xml file.
+            compression: 'gzip' or 'zstd' to decompress the file while it is read, or 'infer' to pick
+                the codec from a '.gz' or '.zst' extension. Other values are passed on to Pandas.
             **kwargs: Additional arguments to pass to the underlying Pandas read_xml().
 
         Returns:
             A Pandas DataFrame.
         """
-        return pd.read_xml(
-            FileClient._ensure_gcs_uri_prefix(gcs_path),
-            **kwargs,
-        )
+        with FileClient._pandas_io(gcs_path, "rb", compression) as source:
+            return pd.read_xml(
+                source,
+                compression=FileClient._pandas_compression(gcs_path, compression),
+                **kwargs,
+            )
 
     @staticmethod
-    def save_pandas_to_csv(df: pd.DataFrame, gcs_path: str, **kwargs: Any) -> None:
+    def save_pandas_to_csv(
+        df: pd.DataFrame,
+        gcs_path: str,
+        compression: CompressionOptions = "infer",
+        **kwargs: Any,
+    ) -> None:
         """Write the contents of a Pandas DataFrame to a CSV file in a bucket.
 
         Args:
             df: The Pandas DataFrame to save to file.
             gcs_path: The GCS path to the destination .csv file.
+            compression: 'gzip' or 'zstd' to compress the file while it is written, or 'infer' to pick
+                the codec from a '.gz' or '.zst' extension. Other values are passed on to Pandas.
             **kwargs: Additional arguments to pass to the underlying Pandas to_csv().
         """
-        df.to_csv(
-            FileClient._ensure_gcs_uri_prefix(gcs_path),
-            **kwargs,
-        )
+        with FileClient._pandas_io(gcs_path, "wb", compression) as target:
+            df.to_csv(
+                target,
+                compression=FileClient._pandas_compression(gcs_path, compression),
+                **kwargs,
+            )
+        FileClient._update_listing_cache(gcs_path)
 
     @staticmethod
-    def save_pandas_to_json(df: pd.DataFrame, gcs_path: str, **kwargs: Any) -> None:
+    def save_pandas_to_json(
+        df: pd.DataFrame,
+        gcs_path: str,
+        compression: CompressionOptions = "infer",
+        **kwargs: Any,
+    ) -> None:
         """Write the contents of a Pandas DataFrame to a JSON file in a bucket.
 
         Args:
             df: The Pandas DataFrame to save to file.
             gcs_path: The GCS path to the destination .json file.
+            compression: 'gzip' or 'zstd' to compress the file while it is written, or 'infer' to pick
+                the codec from a '.gz' or '.zst' extension. Other values are passed on to Pandas.
             **kwargs: Additional arguments to pass to the underlying Pandas to_json().
         """
-        df.to_json(
-            FileClient._ensure_gcs_uri_prefix(gcs_path),
-            **kwargs,
-        )
+        with FileClient._pandas_io(gcs_path, "wb", compression) as target:
+            df.to_json(
+                target,
+                compression=FileClient._pandas_compression(gcs_path, compression),
+                **kwargs,
+            )
+        FileClient._update_listing_cache(gcs_path)
 
     @staticmethod
-    def save_pandas_to_xml(df: pd.DataFrame, gcs_path: str, **kwargs: Any) -> None:
+    def save_pandas_to_xml(
+        df: pd.DataFrame,
+        gcs_path: str,
+        compression: CompressionOptions = "infer",
+        **kwargs: Any,
+    ) -> None:
         """Write the contents of a Pandas DataFrame to an XML file in a bucket.
 
         Args:
             df: The Pandas DataFrame to save to file.
             gcs_path: The GCS path to the destination .xml file.
+            compression: 'gzip' or 'zstd' to compress the file while it is written, or 'infer' to pick
+                the codec from a '.gz' or '.zst' extension. Other values are passed on to Pandas.
             **kwargs: Additional arguments to pass to the underlying Pandas to_xml().
         """
-        df.to_xml(
-            FileClient._ensure_gcs_uri_prefix(gcs_path),
-            **kwargs,
-        )
+        with FileClient._pandas_io(gcs_path, "wb", compression) as target:
+            df.to_xml(
+                target,
+                compression=FileClient._pandas_compression(gcs_path, compression),
+                **kwargs,
+            )
+        FileClient._update_listing_cache(gcs_path)
+
+
+def _version_in_range(
+    blob: storage.Blob,
+    start_time: datetime.datetime | None,
+    end_time: datetime.datetime | None,
+    min_generation: int | None,
+    max_generation: int | None,
+) -> bool:
+    if min_generation is not None and blob.generation < min_generation:
+        return False
+    if max_generation is not None and blob.generation > max_generation:
+        return False
+    if start_time is not None and blob.time_created < start_time:
+        return False
+    return end_time is None or blob.time_created < end_time
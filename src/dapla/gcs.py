@@ -1,18 +1,74 @@
+import asyncio
+import functools
+import logging
 import os
+import re
+import threading
+import time
 import typing as t
+from typing import IO
 from typing import Any
+from typing import ClassVar
+from urllib.parse import parse_qs
+from urllib.parse import unquote
+from urllib.parse import urlsplit
 
+import aiohttp
 import gcsfs
+from fsspec.asyn import sync
+from fsspec.utils import tokenize
+from google.cloud import storage
 
-from dapla import AuthClient
+from dapla import metrics
+from dapla import profiling
 from dapla.const import DaplaRegion
+from dapla.credentials import CredentialCache
+from dapla.disk_cache import DiskCache
+from dapla.read_policy import ReadPolicy
+from dapla.transfer import download
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached directory listing is used before it is fetched again, unless configured otherwise
+DEFAULT_LISTING_TTL = 60.0
+# Maximum number of directory listings kept in the cache
+DEFAULT_LISTING_MAX_PATHS = 10_000
+LISTING_TTL_ENV = "DAPLA_TOOLBELT_LISTING_TTL"
 
 
 class GCSFileSystem(gcsfs.GCSFileSystem):  # type: ignore [misc]
     """GCSFileSystem is a wrapper around gcsfs.GCSFileSystem."""
 
-    def __init__(self, **kwargs: Any) -> None:
-        """Initialize GCSFileSystem."""
+    def __init__(
+        self,
+        disk_cache: DiskCache | None = None,
+        read_policy: ReadPolicy | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize GCSFileSystem.
+
+        Args:
+            disk_cache: Local disk cache for object reads. Taken from the environment variable
+                'DAPLA_TOOLBELT_CACHE_DIR' if None, and disabled if that is not set either.
+            read_policy: Hedging and deadlines for object reads. Taken from the environment variables
+                'DAPLA_TOOLBELT_HEDGE_PERCENTILE' and 'DAPLA_TOOLBELT_READ_DEADLINE' if None,
+                and disabled if neither is set.
+            kwargs: Additional arguments to pass to gcsfs.GCSFileSystem.
+                Directory listings are cached for 'listings_expiry_time' seconds, by default taken from
+                the environment variable 'DAPLA_TOOLBELT_LISTING_TTL' or 60, and at most 'max_paths' listings are kept.
+        """
+        if "cache_timeout" not in kwargs:
+            kwargs.setdefault(
+                "listings_expiry_time",
+                float(os.getenv(LISTING_TTL_ENV, DEFAULT_LISTING_TTL)),
+            )
+        kwargs.setdefault("max_paths", DEFAULT_LISTING_MAX_PATHS)
+        session_kwargs = dict(kwargs.get("session_kwargs") or {})
+        session_kwargs["trace_configs"] = [
+            *session_kwargs.get("trace_configs", []),
+            _ATTEMPT_TRACE,
+        ]
+        kwargs["session_kwargs"] = session_kwargs
         if (
             os.getenv("DAPLA_REGION") == DaplaRegion.DAPLA_LAB.value
             or os.getenv("DAPLA_REGION") == DaplaRegion.CLOUD_RUN.value
@@ -21,9 +77,488 @@ class GCSFileSystem(gcsfs.GCSFileSystem):  # type: ignore [misc]
             # from the environment
             super().__init__(**kwargs)
         else:
-            super().__init__(token=AuthClient.fetch_google_credentials(), **kwargs)
+            super().__init__(token=CredentialCache.fetch_google_credentials(), **kwargs)
+
+        self.disk_cache = disk_cache if disk_cache is not None else DiskCache.from_env()
+        self.read_policy = (
+            read_policy if read_policy is not None else ReadPolicy.from_env()
+        )
 
     def isdir(self, path: str) -> bool:
         """Check if path is a directory."""
-        info = super(gcsfs.GCSFileSystem, self).info(path)
-        return t.cast(bool, info["type"] == "directory")
+        return t.cast(bool, sync(self.loop, self._isdir, path))
+
+    async def _isdir(self, path: str) -> bool:
+        """Check if path is a directory, answered from the listing cache or with a single list request.
+
+        The cost does not depend on the number of objects under the prefix or in its parent folder.
+        """
+        path = self._strip_protocol(path).rstrip("/")
+        if "/" not in path:
+            return t.cast(bool, await super()._isdir(path))
+        cached = self._cached_type(path)
+        if cached is not None:
+            return cached == "directory"
+        bucket, key, _ = self.split_path(path)
+        page = await self._call(
+            "GET", "b/{}/o", bucket, json_out=True, prefix=f"{key}/", maxResults=1
+        )
+        return bool(page.get("items") or page.get("prefixes"))
+
+    async def _exists(self, path: str, **kwargs: Any) -> bool:
+        cached = self._cached_type(self._strip_protocol(path).rstrip("/"))
+        if cached is not None:
+            return cached != ""
+        return t.cast(bool, await super()._exists(path, **kwargs))
+
+    def update_listing_cache(
+        self, path: str, info: dict[str, Any] | None = None
+    ) -> None:
+        """Add or replace an object in the cached listings after it was written outside of this filesystem.
+
+        Cached listings of the parent folders are updated in place instead of being dropped,
+        so listing-heavy code does not have to list them again.
+
+        Args:
+            path: Path to the object that was written.
+            info: The object metadata. Fetched from GCS if None and a parent listing is cached.
+        """
+        path = self._strip_protocol(path).rstrip("/")
+        parent = self._parent(path)
+        listing = self._cached_listing(parent)
+        if listing is not None:
+            if info is None:
+                info = sync(self.loop, self._get_object, path)
+            listing[:] = [e for e in listing if e["name"] != path] + [info]
+        # Make sure the new object's folders show up in cached listings further up
+        while "/" in parent:
+            child, parent = parent, self._parent(parent)
+            listing = self._cached_listing(parent)
+            if listing is None or any(e["name"] == child for e in listing):
+                continue
+            listing.append(
+                {
+                    "bucket": child.split("/", 1)[0],
+                    "name": child,
+                    "size": 0,
+                    "storageClass": "DIRECTORY",
+                    "type": "directory",
+                }
+            )
+
+    def remove_from_listing_cache(self, path: str) -> None:
+        """Remove an object from the cached listings after it was deleted outside of this filesystem.
+
+        Args:
+            path: Path to the object that was deleted, optionally with a '#generation' suffix for one version.
+        """
+        bucket, key, generation = self._split_path(path, version_aware=True)
+        path = f"{bucket}/{key}".rstrip("/")
+        parent = self._parent(path)
+        listing = self._cached_listing(parent)
+        if listing is None:
+            return
+        if generation:
+            live = next((e for e in listing if e["name"] == path), None)
+            if live is not None and str(live.get("generation", generation)) == str(
+                generation
+            ):
+                # The live version, or one the listing cannot tell apart from it, is gone
+                self.invalidate_cache(parent)
+            return
+        listing[:] = [e for e in listing if e["name"] != path]
+        if not listing:
+            # The folder may be gone too, which only a fresh listing of its ancestors can tell
+            self.invalidate_cache(parent)
+
+    def _cached_type(self, path: str) -> str | None:
+        """Look up a path in the listing cache.
+
+        Returns:
+            The type of the path, an empty string if a cached listing shows it does not exist,
+            or None if the cache does not know.
+        """
+        if "#" in path or "/" not in path:
+            # Versioned paths and buckets are not represented in listings
+            return None
+        if self._cached_listing(path):
+            return "directory"
+        listing = self._cached_listing(self._parent(path))
+        if listing is None:
+            return None
+        for entry in listing:
+            if entry["name"].rstrip("/") == path:
+                return t.cast(str, entry["type"])
+        return ""
+
+    def _cached_listing(self, path: str) -> list[dict[str, Any]] | None:
+        try:
+            return t.cast(list[dict[str, Any]], self.dircache[path])
+        except KeyError:
+            return None
+
+    async def _call(self, method: str, path: str, *args: Any, **kwargs: Any) -> Any:
+        profiled = profiling.is_active()
+        if not metrics.is_enabled() and not profiled:
+            return await super()._call(method, path, *args, **kwargs)
+        data = kwargs.get("data")
+        operation = _classify(method, path, data)
+        bytes_out = len(data) if isinstance(data, bytes | bytearray | memoryview) else 0
+        bytes_in = 0
+        if profiled:
+            profiling.io_started()
+        started = time.perf_counter()
+        try:
+            with metrics.count_attempts() as attempts:
+                try:
+                    out = await super()._call(method, path, *args, **kwargs)
+                except Exception:
+                    metrics.record(
+                        operation,
+                        time.perf_counter() - started,
+                        error=True,
+                        retries=max(attempts[0] - 1, 0),
+                        bytes_out=bytes_out,
+                    )
+                    raise
+            if operation == "read" and isinstance(out, tuple):
+                bytes_in = len(out[1])
+            metrics.record(
+                operation,
+                time.perf_counter() - started,
+                retries=max(attempts[0] - 1, 0),
+                bytes_in=bytes_in,
+                bytes_out=bytes_out,
+            )
+            return out
+        finally:
+            if profiled:
+                profiling.io_finished(
+                    operation,
+                    _object_path(path, args),
+                    time.perf_counter() - started,
+                    bytes_in,
+                    bytes_out,
+                )
+
+    async def _cat_file(
+        self,
+        path: str,
+        start: int | None = None,
+        end: int | None = None,
+        **kwargs: Any,
+    ) -> bytes:
+        if self.disk_cache is not None:
+            # Only whole reads fill the cache, ranged reads such as Parquet footers are served from it if already there
+            f = await self._open_cached(path, fill=not start and end is None)
+            if f is not None:
+                with f:
+                    return _read_range(f, start, end)
+        fetch = functools.partial(
+            super()._cat_file, path, start=start, end=end, **kwargs
+        )
+        if self.read_policy is not None:
+            return await self.read_policy.run(fetch)
+        return t.cast(bytes, await fetch())
+
+    def _open(self, path: str, mode: str = "rb", **kwargs: Any) -> Any:
+        if self.disk_cache is not None and mode == "rb":
+            f = sync(self.loop, self._open_cached, path)
+            if f is not None:
+                return f
+        return super()._open(path, mode=mode, **kwargs)
+
+    async def _open_cached(self, path: str, fill: bool = True) -> IO[bytes] | None:
+        """Open the current generation of an object from the disk cache, downloading it on a miss.
+
+        Args:
+            path: The path to the object.
+            fill: Whether to download the object on a miss. Without it, the generation is only taken from
+                the listing cache, so a miss costs no requests.
+
+        Returns:
+            An open local file, or None if the object has no generation to key the cache on,
+            or is not cached and `fill` is False.
+        """
+        assert self.disk_cache is not None
+        info = await self._info(path) if fill else self._listed_info(path)
+        if info is None:
+            return None
+        generation = info.get("generation")
+        if info.get("type") != "file" or not generation:
+            return None
+        bucket, name, _ = self.split_path(path)
+        f = self.disk_cache.open(bucket, name, generation)
+        if f is not None or not fill:
+            return f
+        tmp_path = self.disk_cache.new_entry_path()
+        await download(self, path, tmp_path, info=info)
+        return self.disk_cache.add(bucket, name, generation, tmp_path)
+
+    def _listed_info(self, path: str) -> dict[str, Any] | None:
+        """Return the metadata of an object from the cached listing of its folder, without a request."""
+        path = self._strip_protocol(path).rstrip("/")
+        try:
+            listing = self._ls_from_cache(self._parent(path))
+        except FileNotFoundError:
+            return None
+        return next((entry for entry in listing or [] if entry["name"] == path), None)
+
+
+class GCSFileSystemPool:
+    """Process-wide registry of GCSFileSystem instances.
+
+    Instances are keyed by their constructor arguments and by the identity of the credentials
+    in use, so repeated calls reuse one authenticated aiohttp session and its warm connections.
+    The pool is safe to use from several threads, and is emptied in child processes after a fork.
+
+    This class should not be instantiated, only the class methods should be used.
+    """
+
+    _lock = threading.Lock()
+    _instances: ClassVar[dict[str, GCSFileSystem]] = {}
+    _async_instances: ClassVar[
+        dict[asyncio.AbstractEventLoop, dict[str, GCSFileSystem]]
+    ] = {}
+
+    @classmethod
+    def get(cls, **kwargs: Any) -> GCSFileSystem:
+        """Return a pooled GCSFileSystem for the given arguments, creating it if needed.
+
+        Args:
+            kwargs: Additional arguments to pass to the underlying GCSFileSystem.
+
+        Returns:
+            A GCSFileSystem instance shared with other callers using the same arguments.
+        """
+        key = tokenize(_credential_identity(), kwargs)
+        with cls._lock:
+            stale = cls._instances.get(key)
+        # Refreshing and creating credentials may take a token request, which must not hold up other callers
+        if stale is not None:
+            if _ensure_fresh_credentials(stale):
+                return stale
+            logger.debug("Discarding pooled GCSFileSystem with expired credentials")
+        # The pool owns instance lifetime, so bypass the per-thread fsspec instance cache
+        fs = GCSFileSystem(skip_instance_cache=True, **kwargs)
+        with cls._lock:
+            current = cls._instances.get(key)
+            if current is not None and current is not stale:
+                # Another thread created one meanwhile
+                return current
+            cls._instances[key] = fs
+            return fs
+
+    @classmethod
+    async def get_async(cls, **kwargs: Any) -> GCSFileSystem:
+        """Return a pooled asynchronous GCSFileSystem running on the current event loop, creating it if needed.
+
+        Coroutines on the same event loop share one instance and its aiohttp session,
+        and instances are dropped once their event loop is closed.
+
+        Args:
+            kwargs: Additional arguments to pass to the underlying GCSFileSystem.
+
+        Returns:
+            A GCSFileSystem instance whose async methods can be awaited on the current event loop.
+        """
+        loop = asyncio.get_running_loop()
+        key = tokenize(_credential_identity(), kwargs)
+        with cls._lock:
+            # Instances hold on to their loop, so drop those of closed loops here
+            for closed in [lp for lp in cls._async_instances if lp.is_closed()]:
+                del cls._async_instances[closed]
+            stale = cls._async_instances.setdefault(loop, {}).get(key)
+        # Refreshing and creating credentials may take a blocking token request, so it runs in a thread
+        if stale is not None:
+            if not _credentials_expired(stale) or await asyncio.to_thread(
+                _ensure_fresh_credentials, stale
+            ):
+                await stale._set_session()
+                return stale
+            logger.debug("Discarding pooled GCSFileSystem with expired credentials")
+        fs = await asyncio.to_thread(
+            GCSFileSystem,
+            skip_instance_cache=True,
+            asynchronous=True,
+            loop=loop,
+            **kwargs,
+        )
+        with cls._lock:
+            instances = cls._async_instances.setdefault(loop, {})
+            current = instances.get(key)
+            if current is not None and current is not stale:
+                # Another coroutine created one meanwhile
+                fs = current
+            else:
+                instances[key] = fs
+        await fs._set_session()
+        return fs
+
+    @classmethod
+    def instances(cls) -> list[GCSFileSystem]:
+        """Return the pooled instances that currently exist.
+
+        Returns:
+            A list of the pooled GCSFileSystem instances.
+        """
+        with cls._lock:
+            return list(cls._instances.values())
+
+    @classmethod
+    def async_instances(cls) -> list[GCSFileSystem]:
+        """Return the pooled asynchronous instances that currently exist, on every event loop.
+
+        Returns:
+            A list of the pooled asynchronous GCSFileSystem instances.
+        """
+        with cls._lock:
+            return [
+                fs
+                for instances in cls._async_instances.values()
+                for fs in instances.values()
+            ]
+
+    @classmethod
+    def reset(cls) -> None:
+        """Drop all pooled instances, forcing new ones to be created on next use."""
+        with cls._lock:
+            cls._instances.clear()
+            cls._async_instances.clear()
+
+    @classmethod
+    def _reset_after_fork(cls) -> None:
+        # The parent's sessions and event loop are unusable in the child, and the lock may be held
+        cls._lock = threading.Lock()
+        cls._instances = {}
+        cls._async_instances = {}
+
+
+class StorageClientPool:
+    """Process-wide registry of google-cloud-storage clients, one per set of credentials.
+
+    Creating a client resolves credentials and opens a new HTTP session, so reusing one
+    saves a token round trip and a TLS handshake on every call.
+
+    This class should not be instantiated, only the class methods should be used.
+    """
+
+    _lock = threading.Lock()
+    _clients: ClassVar[dict[tuple[str | None, ...], storage.Client]] = {}
+
+    @classmethod
+    def get(cls) -> storage.Client:
+        """Return the pooled storage client for the current credentials, creating it if needed.
+
+        Returns:
+            A storage.Client shared with other callers.
+        """
+        key = _credential_identity()
+        with cls._lock:
+            client = cls._clients.get(key)
+            if client is None:
+                client = storage.Client()
+                cls._clients[key] = client
+            return client
+
+    @classmethod
+    def reset(cls) -> None:
+        """Drop all pooled clients, forcing new ones to be created on next use."""
+        with cls._lock:
+            cls._clients.clear()
+
+    @classmethod
+    def _reset_after_fork(cls) -> None:
+        cls._lock = threading.Lock()
+        cls._clients = {}
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=GCSFileSystemPool._reset_after_fork)
+    os.register_at_fork(after_in_child=StorageClientPool._reset_after_fork)
+
+
+def _credential_identity() -> tuple[str | None, ...]:
+    """Return the environment settings that decide which credentials a new GCSFileSystem uses."""
+    return (
+        os.getenv("DAPLA_REGION"),
+        os.getenv("DAPLA_SERVICE"),
+        os.getenv("GOOGLE_APPLICATION_CREDENTIALS"),
+    )
+
+
+def _ensure_fresh_credentials(fs: GCSFileSystem) -> bool:
+    """Refresh the credentials of a pooled instance if they have expired.
+
+    Returns:
+        False if the credentials are expired and could not be refreshed.
+    """
+    if not _credentials_expired(fs):
+        return True
+    try:
+        fs.credentials.maybe_refresh()
+    except Exception as err:
+        logger.debug(f"Could not refresh pooled credentials: {err}")
+        return False
+    return not _credentials_expired(fs)
+
+
+def _credentials_expired(fs: GCSFileSystem) -> bool:
+    credentials = getattr(fs.credentials, "credentials", None)
+    return credentials is not None and getattr(credentials, "expired", False) is True
+
+
+_OBJECT_URL = re.compile(r"/b/([^/?]+)(?:/o/([^?]+))?")
+
+
+def _classify(method: str, path: str, data: Any) -> str:
+    """Tell which kind of operation, in `metrics.OPERATIONS`, a GCS JSON API request is."""
+    if "/batch/" in path and isinstance(data, bytes):
+        # Batches sent by gcsfs hold either deletes or metadata requests
+        return "delete" if b"DELETE " in data else "info"
+    if method == "DELETE":
+        return "delete"
+    if any(f"/{action}/" in path for action in ("rewriteTo", "copyTo", "moveTo")) or (
+        path.endswith("/compose")
+    ):
+        return "copy"
+    if "/upload/" in path:
+        return "write"
+    if "alt=media" in path or "/download/" in path:
+        return "read"
+    if method == "GET" and path.endswith("b/{}/o"):
+        return "list"
+    if method == "GET" and path.endswith("b/{}/o/{}"):
+        return "info"
+    return "other"
+
+
+def _object_path(path: str, args: tuple[Any, ...]) -> str | None:
+    """Return the 'bucket/name', or the bucket, a GCS JSON API request is for."""
+    if path.startswith("b/{}"):
+        return "/".join(args[:2]) if path.startswith("b/{}/o/{}") else str(args[0])
+    match = _OBJECT_URL.search(path)
+    if match is None:
+        return None
+    bucket, name = match.groups()
+    if name is None:
+        # Uploads give the name of the new object as a query parameter
+        name = parse_qs(urlsplit(path).query).get("name", [None])[0]
+    return unquote(f"{bucket}/{name}") if name else unquote(bucket)
+
+
+async def _count_attempt(*args: Any) -> None:
+    metrics.count_attempt()
+
+
+# Counts every HTTP request, including retries, for the operation metrics
+_ATTEMPT_TRACE = aiohttp.TraceConfig()
+_ATTEMPT_TRACE.on_request_start.append(_count_attempt)
+
+
+def _read_range(f: IO[bytes], start: int | None, end: int | None) -> bytes:
+    """Read bytes [start, end) of a local file, with negative offsets counting from the end."""
+    size = os.fstat(f.fileno()).st_size
+    first, last, _ = slice(start, end).indices(size)
+    f.seek(first)
+    return f.read(max(last - first, 0))
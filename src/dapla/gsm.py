@@ -2,7 +2,10 @@ from typing import Optional
 
 from google.cloud.secretmanager import SecretManagerServiceClient
 
+from dapla import profiling
 
+
+@profiling.profiled("service")
 def get_secret_version(
     project_id: str, shortname: str, version_id: Optional[str] = "latest"
 ) -> str:
@@ -5,9 +5,10 @@ from typing import Optional
 
 import requests
 
-from dapla import AuthClient
+from dapla import profiling
 from dapla.const import GUARDIAN_URLS
 from dapla.const import DaplaEnvironment
+from dapla.credentials import CredentialCache
 
 
 class GuardianClient:
@@ -23,6 +24,7 @@ class GuardianClient:
             raise ValueError(f"Unknown environment: {env}") from err
 
     @staticmethod
+    @profiling.profiled("service")
     def call_api(
         api_endpoint_url: str,
         maskinporten_client_id: str,
@@ -46,7 +48,7 @@ class GuardianClient:
         guardian_endpoint_url = GuardianClient.get_guardian_url()
 
         if keycloak_token is None:
-            keycloak_token = AuthClient.fetch_personal_token()
+            keycloak_token = CredentialCache.fetch_personal_token()
         body = {"maskinportenClientId": maskinporten_client_id, "scopes": scopes}
         maskinporten_token = GuardianClient.get_guardian_token(
             guardian_endpoint_url, keycloak_token, body=body
@@ -67,6 +69,7 @@ class GuardianClient:
             )
 
     @staticmethod
+    @profiling.profiled("service")
     def get_guardian_token(
         guardian_endpoint: str, keycloak_token: str, body: dict[str, str]
     ) -> str:
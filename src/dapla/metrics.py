@@ -0,0 +1,237 @@
+"""Counters and latency histograms of the GCS operations done through dapla.
+
+Collection is off unless enabled with `enable()` or by setting 'DAPLA_TOOLBELT_METRICS' to a non-empty value.
+While it is off, instrumented code only checks a flag.
+"""
+
+import atexit
+import bisect
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from typing import NamedTuple
+
+METRICS_ENV = "DAPLA_TOOLBELT_METRICS"
+
+# Upper bounds in seconds of the latency histogram buckets, from 1 ms doubling up to about a minute
+LATENCY_BUCKETS: tuple[float, ...] = tuple(0.001 * 2**i for i in range(17))
+
+OPERATIONS = ("list", "info", "read", "write", "copy", "delete", "other")
+
+
+class Histogram(NamedTuple):
+    """Latency distribution of an operation.
+
+    `counts[i]` is the number of observations of at most `LATENCY_BUCKETS[i]` seconds and more than the bound
+    before it, and the last count is the number of observations above the largest bound.
+    """
+
+    counts: tuple[int, ...]
+    total: float
+
+    @property
+    def observations(self) -> int:
+        """Number of observations."""
+        return sum(self.counts)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket it falls in.
+
+        Args:
+            q: The quantile, between 0 and 1.
+
+        Returns:
+            The estimate in seconds, or infinity if it falls above the largest bound, or 0 without observations.
+        """
+        rank = q * self.observations
+        seen = 0
+        for bound, count in zip(
+            (*LATENCY_BUCKETS, float("inf")), self.counts, strict=True
+        ):
+            seen += count
+            if count and seen >= rank:
+                return bound
+        return 0.0
+
+
+class OperationStats(NamedTuple):
+    """Counters and latencies of one kind of operation."""
+
+    requests: int
+    errors: int
+    retries: int
+    bytes_in: int
+    bytes_out: int
+    latency: Histogram
+
+
+Snapshot = dict[str, OperationStats]
+Exporter = Callable[[Snapshot], None]
+
+_enabled = bool(os.getenv(METRICS_ENV))
+_lock = threading.Lock()
+_counters: dict[str, list[int]] = {}
+_latencies: dict[str, list[int]] = {}
+_totals: dict[str, float] = {}
+_exporters: list[Exporter] = []
+# HTTP attempts made by the operation running in the current task, to count retries
+_attempts: contextvars.ContextVar[list[int] | None] = contextvars.ContextVar(
+    "dapla_metrics_attempts", default=None
+)
+
+
+def enable() -> None:
+    """Start collecting metrics."""
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    """Stop collecting metrics. Collected metrics are kept until `reset` is called."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    """Tell whether metrics are collected."""
+    return _enabled
+
+
+def record(
+    operation: str,
+    seconds: float,
+    error: bool = False,
+    retries: int = 0,
+    bytes_in: int = 0,
+    bytes_out: int = 0,
+) -> None:
+    """Record one operation.
+
+    Args:
+        operation: The kind of operation, one of `OPERATIONS`.
+        seconds: How long the operation took, including retries.
+        error: Whether the operation failed.
+        retries: Number of requests repeated after a failure.
+        bytes_in: Bytes received.
+        bytes_out: Bytes sent.
+    """
+    if not _enabled:
+        return
+    bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+    with _lock:
+        counters = _counters.setdefault(operation, [0, 0, 0, 0, 0])
+        counters[0] += 1
+        counters[1] += error
+        counters[2] += retries
+        counters[3] += bytes_in
+        counters[4] += bytes_out
+        _latencies.setdefault(operation, [0] * (len(LATENCY_BUCKETS) + 1))[bucket] += 1
+        _totals[operation] = _totals.get(operation, 0.0) + seconds
+
+
+@contextlib.contextmanager
+def timed(operation: str) -> Iterator[None]:
+    """Record the time spent in a block as one operation, failed if the block raises.
+
+    Args:
+        operation: The kind of operation, one of `OPERATIONS`.
+
+    Yields:
+        Nothing.
+    """
+    if not _enabled:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        record(operation, time.perf_counter() - started, error=True)
+        raise
+    record(operation, time.perf_counter() - started)
+
+
+def snapshot() -> Snapshot:
+    """Return the metrics collected so far.
+
+    Returns:
+        A dict mapping each kind of operation that was recorded to its `OperationStats`.
+    """
+    with _lock:
+        return {
+            operation: OperationStats(
+                requests,
+                errors,
+                retries,
+                bytes_in,
+                bytes_out,
+                Histogram(tuple(_latencies[operation]), _totals[operation]),
+            )
+            for operation, (requests, errors, retries, bytes_in, bytes_out) in sorted(
+                _counters.items()
+            )
+        }
+
+
+def reset() -> None:
+    """Forget the metrics collected so far."""
+    with _lock:
+        _counters.clear()
+        _latencies.clear()
+        _totals.clear()
+
+
+def add_exporter(exporter: Exporter) -> None:
+    """Register a function to receive a snapshot on every `export` call and when the process exits.
+
+    Args:
+        exporter: Called with the snapshot, for example to log it or to push it to a monitoring system.
+    """
+    with _lock:
+        _exporters.append(exporter)
+
+
+def remove_exporter(exporter: Exporter) -> None:
+    """Unregister an exporter added with `add_exporter`."""
+    with _lock:
+        _exporters.remove(exporter)
+
+
+def export() -> None:
+    """Send a snapshot of the metrics to every registered exporter."""
+    with _lock:
+        exporters = list(_exporters)
+    if not exporters:
+        return
+    current = snapshot()
+    for exporter in exporters:
+        exporter(current)
+
+
+def count_attempt() -> None:
+    """Count an HTTP request made for the operation running in the current task."""
+    attempts = _attempts.get()
+    if attempts is not None:
+        attempts[0] += 1
+
+
+@contextlib.contextmanager
+def count_attempts() -> Iterator[list[int]]:
+    """Count the HTTP requests made by `count_attempt` calls inside a block, in the same task.
+
+    Yields:
+        A list whose only element is the number of requests made so far.
+    """
+    attempts = [0]
+    token = _attempts.set(attempts)
+    try:
+        yield attempts
+    finally:
+        _attempts.reset(token)
+
+
+atexit.register(lambda: export() if _enabled else None)
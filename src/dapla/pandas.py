@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import datetime
 import typing as t
 from enum import Enum
 from typing import Any
@@ -19,9 +20,14 @@ from pandas import read_json
 from pandas import read_sas
 from pandas import read_xml
 
-from dapla import AuthClient
+from dapla import arrow
+from dapla import backends
+from dapla import profiling
+from dapla.credentials import CredentialCache
 
 from .files import FileClient
+from .versions import open_as_of
+from .versions import paths_as_of
 
 
 class SupportedFileFormat(Enum):
@@ -50,6 +56,7 @@ class SupportedFileFormat(Enum):
         "Read more at: https://pandas.pydata.org/docs/reference/io.html"
     ),
 )
+@profiling.profiled("pandas", "read_pandas")
 def read_pandas(
     gcs_path: str | list[str],
     file_format: Optional[str] = "parquet",
@@ -57,6 +64,7 @@ def read_pandas(
     filters: Optional[
         list[tuple[Any] | list[tuple[Any]]] | pyarrow.compute.Expression
     ] = None,
+    as_of: datetime.datetime | None = None,
     **kwargs: Any,
 ) -> t.Union[DataFrame, Series]:  # type: ignore [type-arg]
     """Convenience method for reading a dataset from a given GCS path and convert it to a Pandas dataframe.
@@ -66,12 +74,19 @@ def read_pandas(
             Support multiple paths if reading parquet format.
         file_format: The expected file format. All file formats other than "parquet" are delegated to Pandas
             methods like read_json, read_csv, etc. Defaults to "parquet".
-        columns: Choose specific columsn to read. Defaults to None.
+        columns: Choose specific columsn to read, for parquet, and for CSV and JSON with `engine="arrow"`.
+            Defaults to None.
         filters: Add row filter to process when reading parquet. The filter
             should follow pyarrow methods. See examples in the docs:
             https://arrow.apache.org/docs/python/generated/pyarrow.parquet.ParquetDataset.html#pyarrow.parquet.ParquetDataset.
             Defaults to None.
-        kwargs: Additional arguments to pass to the underlying Pandas "read_*()" method.
+        as_of: Read the dataset as it was at this time, as a timezone aware datetime. Needs object versioning
+            or soft delete on the bucket. The versions to read are resolved from one listing and cached,
+            so reading the same data as of the same time again is reproducible without copying it.
+            Defaults to None, which reads the current data.
+        kwargs: Additional arguments to pass to the underlying Pandas "read_*()" method. CSV and newline-delimited
+            JSON files read with `engine="arrow"` are streamed into the multithreaded Arrow parsers instead, which
+            return an Arrow backed DataFrame, see `dapla.arrow.read_csv` and `dapla.arrow.read_json`.
 
     Raises:
         ValueError: If multiple paths are provided for non-parquet formats.
@@ -85,11 +100,29 @@ def read_pandas(
 
     if isinstance(gcs_path, list) and file_format != "parquet":
         raise ValueError("Multiple paths are only supported for parquet format")
+    if as_of is not None and file_format != "parquet":
+        assert isinstance(gcs_path, str)
+        with open_as_of(
+            FileClient.get_gcs_file_system(version_aware=True),
+            FileClient._remove_gcs_uri_prefix(gcs_path),
+            as_of,
+        ) as f:
+            return _read_file(f, SupportedFileFormat(file_format), columns, **kwargs)
+    if (
+        isinstance(gcs_path, str)
+        and file_format != "parquet"
+        and not backends.is_gcs(gcs_path)
+    ):
+        with FileClient.get_file_system(gcs_path).open(gcs_path, "rb") as f:
+            return _read_file(f, SupportedFileFormat(file_format), columns, **kwargs)
     match SupportedFileFormat(file_format):
         case SupportedFileFormat.PARQUET:
             import pyarrow.parquet as pq
 
-            fs = FileClient.get_gcs_file_system()
+            fs = FileClient.get_file_system(
+                gcs_path if isinstance(gcs_path, str) else gcs_path[0],
+                **({"version_aware": True} if as_of is not None else {}),
+            )
 
             # Workaround for https://github.com/apache/arrow/issues/30481
             if isinstance(gcs_path, list):
@@ -98,17 +131,31 @@ def read_pandas(
                 ]
             else:
                 gcs_path = FileClient._remove_gcs_uri_prefix(gcs_path)
-
-            parquet_ds = pq.ParquetDataset(
-                gcs_path,  # type: ignore [arg-type, unused-ignore]
-                filesystem=fs,
-                filters=filters,  # type: ignore [arg-type]
-            )  # Stubs show the incorrect type -
-            # see https://arrow.apache.org/docs/python/generated/pyarrow.parquet.ParquetDataset.html
-
-            return parquet_ds.read_pandas(columns=columns).to_pandas(
-                split_blocks=False, self_destruct=True, **kwargs
-            )
+            if as_of is not None:
+                gcs_path = paths_as_of(fs, gcs_path, as_of)
+
+            with profiling.span(
+                "arrow",
+                "read parquet",
+                gcs_path if isinstance(gcs_path, str) else f"{len(gcs_path)} paths",
+            ):
+                parquet_ds = pq.ParquetDataset(
+                    gcs_path,  # type: ignore [arg-type, unused-ignore]
+                    filesystem=fs,
+                    filters=filters,  # type: ignore [arg-type]
+                )  # Stubs show the incorrect type -
+                # see https://arrow.apache.org/docs/python/generated/pyarrow.parquet.ParquetDataset.html
+                table = parquet_ds.read_pandas(columns=columns)
+
+            return table.to_pandas(split_blocks=False, self_destruct=True, **kwargs)
+        case (SupportedFileFormat.CSV | SupportedFileFormat.JSON) as streamable if (
+            kwargs.get("engine") == arrow.ENGINE
+        ):
+            assert isinstance(gcs_path, str)
+            with FileClient._open_stream(
+                gcs_path, kwargs.pop("compression", "infer")
+            ) as f:
+                return _read_file(f, streamable, columns, **kwargs)
         case SupportedFileFormat.JSON:
             assert isinstance(gcs_path, str)
             return t.cast(
@@ -143,7 +190,7 @@ def read_pandas(
         case SupportedFileFormat.SAS7BDAT:
             assert isinstance(gcs_path, str)
 
-            fs = FileClient.get_gcs_file_system()
+            fs = FileClient.get_file_system(gcs_path)
 
             with fs.open(gcs_path) as sas:
                 df = read_sas(sas, format="sas7bdat", **kwargs)
@@ -153,6 +200,40 @@ def read_pandas(
             raise ValueError(f"Invalid file format {file_format}")
 
 
+def _read_file(
+    f: t.IO[bytes],
+    file_format: SupportedFileFormat,
+    columns: list[str] | None = None,
+    **kwargs: Any,
+) -> t.Union[DataFrame, Series]:
+    """Read an open file with the Pandas reader for its format, or the Arrow reader if asked for."""
+    match file_format:
+        case SupportedFileFormat.CSV if kwargs.get("engine") == arrow.ENGINE:
+            del kwargs["engine"]
+            return arrow.read_csv(f, columns=columns, **kwargs)
+        case SupportedFileFormat.JSON if kwargs.get("engine") == arrow.ENGINE:
+            del kwargs["engine"]
+            if not kwargs.pop("lines", True):
+                raise ValueError("The arrow engine only reads newline-delimited JSON")
+            return arrow.read_json(f, columns=columns, **kwargs)
+        case SupportedFileFormat.JSON:
+            return t.cast("DataFrame | Series[Any]", read_json(f, **kwargs))
+        case SupportedFileFormat.CSV:
+            return t.cast("DataFrame | Series[Any]", read_csv(f, **kwargs))
+        case SupportedFileFormat.FWF:
+            return t.cast("DataFrame | Series[Any]", read_fwf(f, **kwargs))
+        case SupportedFileFormat.XML:
+            return t.cast("DataFrame | Series[Any]", read_xml(f, **kwargs))
+        case SupportedFileFormat.EXCEL:
+            return t.cast("DataFrame | Series[Any]", read_excel(f, **kwargs))
+        case SupportedFileFormat.SAS7BDAT:
+            return t.cast(
+                "DataFrame | Series[Any]", read_sas(f, format="sas7bdat", **kwargs)
+            )
+        case _:
+            raise ValueError(f"Invalid file format {file_format}")
+
+
 @deprecated(
     reason=(
         "The `write_pandas` function is deprecated and will be removed on 1st February of 2026. "
@@ -160,6 +241,7 @@ def read_pandas(
         "Read more at: https://arrow.apache.org/docs/python/generated/pyarrow.parquet.write_table.html"
     ),
 )
+@profiling.profiled("pandas", "write_pandas")
 def write_pandas(
     df: DataFrame, gcs_path: str, file_format: str = "parquet", **kwargs: Any
 ) -> None:
@@ -189,8 +271,11 @@ def write_pandas(
             )
             if ".parquet" not in gcs_path:
                 raise ValueError("Path must be a parquet file")
-            fs = FileClient.get_gcs_file_system()
-            with fs.open(gcs_path, mode="wb") as buffer:
+            fs = FileClient.get_file_system(gcs_path)
+            with (
+                fs.open(gcs_path, mode="wb") as buffer,
+                profiling.span("arrow", "write parquet", gcs_path),
+            ):
                 pyarrow.parquet.write_table(
                     table,
                     buffer,
@@ -199,6 +284,14 @@ def write_pandas(
                     coerce_timestamps="ms",
                     **kwargs,
                 )
+        case (
+            SupportedFileFormat.JSON
+            | SupportedFileFormat.CSV
+            | SupportedFileFormat.XML
+            | SupportedFileFormat.EXCEL
+        ) as writable if not backends.is_gcs(gcs_path):
+            with FileClient.get_file_system(gcs_path).open(gcs_path, "wb") as f:
+                _write_file(df, f, writable, **kwargs)
         case SupportedFileFormat.JSON:
             df.to_json(gcs_path, **kwargs, storage_options=_get_storage_options())  # type: ignore [call-overload]
         case SupportedFileFormat.CSV:
@@ -216,6 +309,26 @@ def write_pandas(
             )
         case _:
             raise ValueError(f"Invalid file format {file_format}")
+    if SupportedFileFormat(file_format) is not SupportedFileFormat.PARQUET:
+        # Pandas writes these through a file system of its own, which the pooled ones never see
+        FileClient._update_listing_cache(gcs_path)
+
+
+def _write_file(
+    df: DataFrame, f: t.IO[bytes], file_format: SupportedFileFormat, **kwargs: Any
+) -> None:
+    """Write a DataFrame to an open file with the Pandas writer for its format."""
+    match file_format:
+        case SupportedFileFormat.JSON:
+            df.to_json(f, **kwargs)
+        case SupportedFileFormat.CSV:
+            df.to_csv(f, **kwargs)
+        case SupportedFileFormat.XML:
+            df.to_xml(f, **kwargs)
+        case SupportedFileFormat.EXCEL:
+            df.to_excel(f, **kwargs)
+        case _:
+            raise ValueError(f"Invalid file format {file_format}")
 
 
 def _get_storage_options() -> Optional[dict[str, Optional[Credentials]]]:
@@ -225,5 +338,5 @@ def _get_storage_options() -> Optional[dict[str, Optional[Credentials]]]:
     An error will be raised by Pandas if providing this argument with a local path or a file-like buffer.
     See the fsspec and backend storage implementation docs for the set of allowed keys and values
     """
-    credentials = AuthClient.fetch_google_credentials()
+    credentials = CredentialCache.fetch_google_credentials()
     return {"token": credentials} if credentials is not None else None
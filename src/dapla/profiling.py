@@ -0,0 +1,291 @@
+"""Breakdown of where the time of a block of code goes, for finding I/O bottlenecks in notebooks.
+
+Wrap a block in `dapla.profile()` to see how much of its time was spent waiting for GCS, decoding or encoding
+with Arrow, converting with pandas, fetching credentials and calling Dapla services, along with the slowest
+calls and the bytes transferred per path.
+
+GCS time is the wall time during which at least one request was in flight, so concurrent requests are not
+counted twice. The time of every other category excludes the GCS time and the nested calls within it.
+Reads that pandas does through its own fsspec filesystem, such as CSV and JSON in `read_pandas`,
+count as pandas time.
+"""
+
+import contextlib
+import functools
+import heapq
+import itertools
+import threading
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from typing import Any
+from typing import NamedTuple
+from typing import TypeVar
+
+CATEGORIES = ("gcs", "arrow", "pandas", "auth", "service")
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_BAR_WIDTH = 30
+
+_lock = threading.Lock()
+_active: list["Profile"] = []
+# Wall time during which GCS requests were in flight, only tracked while a profile is active
+_in_flight = 0
+_busy_since = 0.0
+_busy_total = 0.0
+# Open spans of the current thread, as [seconds in nested spans, GCS time during nested spans]
+_local = threading.local()
+
+
+class Call(NamedTuple):
+    """One profiled call."""
+
+    category: str
+    name: str
+    seconds: float
+    path: str | None
+    bytes: int
+
+
+class Profile:
+    """The breakdown of a block of code profiled with `profile`.
+
+    Printing a profile shows a table of the time per category, the slowest calls and the bytes per path.
+    """
+
+    def __init__(self, top: int = 10) -> None:
+        """Initialize Profile.
+
+        Args:
+            top: Number of slowest calls to keep.
+        """
+        self.top = top
+        self.wall = 0.0
+        self.seconds = dict.fromkeys(CATEGORIES, 0.0)
+        self._bytes: dict[str, list[int]] = {}
+        self._slowest: list[tuple[float, int, Call]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def other(self) -> float:
+        """Seconds of the block not spent in any of the categories, such as in user code."""
+        return max(self.wall - sum(self.seconds.values()), 0.0)
+
+    @property
+    def slowest(self) -> list[Call]:
+        """The slowest calls, slowest first."""
+        with self._lock:
+            return [call for _, _, call in sorted(self._slowest, reverse=True)]
+
+    @property
+    def bytes_by_path(self) -> dict[str, tuple[int, int]]:
+        """Bytes received and sent per GCS path, most first."""
+        with self._lock:
+            ranked = sorted(self._bytes.items(), key=lambda item: -sum(item[1]))
+        return {path: (received, sent) for path, (received, sent) in ranked}
+
+    def report(self) -> str:
+        """Render the profile as text tables.
+
+        Returns:
+            The time per category with a bar showing its share, the slowest calls, and the bytes per path.
+        """
+        lines = [f"Profile of {self.wall:.3f} s", ""]
+        lines.append(f"{'category':<10} {'seconds':>9} {'share':>6}")
+        for category, seconds in [*self.seconds.items(), ("other", self.other)]:
+            share = seconds / self.wall if self.wall else 0.0
+            bar = "#" * round(share * _BAR_WIDTH)
+            lines.append(f"{category:<10} {seconds:>9.3f} {share:>6.0%} {bar}")
+        if self._slowest:
+            lines += ["", f"{'seconds':>9} {'category':<10} {'bytes':>12}  call"]
+            for call in self.slowest:
+                name = f"{call.name} {call.path}" if call.path else call.name
+                lines.append(
+                    f"{call.seconds:>9.3f} {call.category:<10} {call.bytes:>12}  {name}"
+                )
+        if self._bytes:
+            lines += ["", f"{'received':>12} {'sent':>12}  path"]
+            for path, (received, sent) in self.bytes_by_path.items():
+                lines.append(f"{received:>12} {sent:>12}  {path}")
+        return "\n".join(lines)
+
+    def __str__(self) -> str:
+        """Return the report."""
+        return self.report()
+
+    def _add(self, call: Call, bytes_in: int = 0, bytes_out: int = 0) -> None:
+        with self._lock:
+            if call.category != "gcs":
+                self.seconds[call.category] += call.seconds
+            entry = (call.seconds, next(self._counter), call)
+            if len(self._slowest) < self.top:
+                heapq.heappush(self._slowest, entry)
+            elif self._slowest and entry > self._slowest[0]:
+                heapq.heapreplace(self._slowest, entry)
+            if call.path is not None and (bytes_in or bytes_out):
+                counts = self._bytes.setdefault(call.path, [0, 0])
+                counts[0] += bytes_in
+                counts[1] += bytes_out
+
+
+@contextlib.contextmanager
+def profile(top: int = 10, show: bool = True) -> Iterator[Profile]:
+    """Profile the I/O of a block of code.
+
+    Calls made from any thread while the block runs are included, so concurrent profiles see each other's calls.
+
+    Args:
+        top: Number of slowest calls to keep.
+        show: Whether to print the report when the block exits.
+
+    Yields:
+        The `Profile`, filled in when the block exits.
+    """
+    result = Profile(top)
+    started = time.perf_counter()
+    with _lock:
+        _active.append(result)
+    busy = _busy_now()
+    try:
+        yield result
+    finally:
+        with _lock:
+            _active.remove(result)
+        result.seconds["gcs"] = _busy_now() - busy
+        result.wall = time.perf_counter() - started
+        if show:
+            print(result.report())
+
+
+def is_active() -> bool:
+    """Tell whether a profile is collecting calls."""
+    return bool(_active)
+
+
+@contextlib.contextmanager
+def span(category: str, name: str, path: str | None = None) -> Iterator[None]:
+    """Attribute the time spent in a block, apart from GCS requests and nested spans, to a category.
+
+    Args:
+        category: One of `CATEGORIES` other than 'gcs'.
+        name: Name of the call, shown in the list of slowest calls.
+        path: The path the call works on, if any.
+
+    Yields:
+        Nothing.
+    """
+    if not _active:
+        yield
+        return
+    stack = _stack()
+    frame = [0.0, 0.0]
+    stack.append(frame)
+    started = time.perf_counter()
+    busy = _busy_now()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        busy = _busy_now() - busy
+        stack.pop()
+        if stack:
+            stack[-1][0] += elapsed
+            stack[-1][1] += busy
+        own = max(elapsed - frame[0] - (busy - frame[1]), 0.0)
+        for active in list(_active):
+            active._add(Call(category, name, own, path, 0))
+
+
+def profiled(category: str, name: str | None = None) -> Callable[[F], F]:
+    """Decorate a function to run it in a `span`.
+
+    Args:
+        category: One of `CATEGORIES` other than 'gcs'.
+        name: Name of the call. Defaults to the qualified name of the function.
+
+    Returns:
+        The decorator.
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _active:
+                return func(*args, **kwargs)
+            with span(category, name or func.__qualname__):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore [return-value]
+
+    return decorator
+
+
+def io_started() -> None:
+    """Mark the start of a GCS request, to be followed by `io_finished`."""
+    global _in_flight, _busy_since
+    with _lock:
+        if _in_flight == 0:
+            _busy_since = time.perf_counter()
+        _in_flight += 1
+
+
+def io_finished(
+    name: str, path: str | None, seconds: float, bytes_in: int = 0, bytes_out: int = 0
+) -> None:
+    """Record a GCS request marked with `io_started`.
+
+    Args:
+        name: The kind of request.
+        path: The bucket or object the request was for.
+        seconds: How long the request took.
+        bytes_in: Bytes received.
+        bytes_out: Bytes sent.
+    """
+    global _in_flight, _busy_total
+    with _lock:
+        if _in_flight > 0:
+            _in_flight -= 1
+            if _in_flight == 0:
+                _busy_total += time.perf_counter() - _busy_since
+        active = list(_active)
+    call = Call("gcs", name, seconds, path, bytes_in + bytes_out)
+    for target in active:
+        target._add(call, bytes_in, bytes_out)
+
+
+@contextlib.contextmanager
+def io(name: str, path: str | None = None) -> Iterator[None]:
+    """Record the time spent in a block as a GCS request, for requests not made through GCSFileSystem.
+
+    Args:
+        name: The kind of request.
+        path: The bucket or object the request is for.
+
+    Yields:
+        Nothing.
+    """
+    if not _active:
+        yield
+        return
+    io_started()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        io_finished(name, path, time.perf_counter() - started)
+
+
+def _busy_now() -> float:
+    with _lock:
+        if _in_flight:
+            return _busy_total + time.perf_counter() - _busy_since
+        return _busy_total
+
+
+def _stack() -> list[list[float]]:
+    stack: list[list[float]] | None = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
@@ -0,0 +1,179 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable
+from collections.abc import Callable
+from typing import TypeVar
+
+# Environment variables enabling a read policy for every GCSFileSystem created by dapla
+HEDGE_PERCENTILE_ENV = "DAPLA_TOOLBELT_HEDGE_PERCENTILE"
+READ_DEADLINE_ENV = "DAPLA_TOOLBELT_READ_DEADLINE"
+
+# Percentile of recent read latencies after which a duplicate request is sent, unless configured otherwise
+DEFAULT_HEDGE_PERCENTILE = 95.0
+# Extra requests allowed per read, on average
+DEFAULT_RETRY_BUDGET = 0.1
+
+T = TypeVar("T")
+
+
+class ReadPolicy:
+    """Bounds the tail latency of reads by hedging slow requests and enforcing deadlines.
+
+    When a read takes longer than a percentile of recent read latencies, a duplicate request is sent
+    and whichever finishes first is used. Duplicates are paid for from a retry budget that grows with
+    every read, so a slow backend is never hit with more than a fixed fraction of extra requests.
+    A deadline caps the total time of a read, including its duplicate.
+
+    One policy can be shared by several filesystems, and is safe to use from several threads.
+    """
+
+    def __init__(
+        self,
+        hedge_percentile: float | None = DEFAULT_HEDGE_PERCENTILE,
+        deadline: float | None = None,
+        retry_budget: float = DEFAULT_RETRY_BUDGET,
+        min_hedge_delay: float = 0.02,
+        initial_hedge_delay: float = 1.0,
+        window: int = 1000,
+        min_samples: int = 20,
+    ) -> None:
+        """Initialize ReadPolicy.
+
+        Args:
+            hedge_percentile: Percentile of recent read latencies after which a duplicate request is sent.
+                None disables hedging.
+            deadline: Seconds a read may take in total before it fails with TimeoutError. None for no deadline.
+            retry_budget: Duplicate requests allowed per read on average. Each read adds this much to the
+                budget, up to a reserve of ten requests, and each duplicate request takes one.
+            min_hedge_delay: Lower bound on the delay before a duplicate request, in seconds.
+            initial_hedge_delay: Delay before a duplicate request until enough latencies have been observed.
+            window: Number of recent read latencies the percentile is computed over.
+            min_samples: Number of latencies needed before the percentile is used.
+
+        Raises:
+            ValueError: If `hedge_percentile` is not between 0 and 100.
+        """
+        if hedge_percentile is not None and not 0 < hedge_percentile <= 100:
+            raise ValueError(
+                f"hedge_percentile must be between 0 and 100, got {hedge_percentile}"
+            )
+        self.hedge_percentile = hedge_percentile
+        self.deadline = deadline
+        self.retry_budget = retry_budget
+        self.min_hedge_delay = min_hedge_delay
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._max_tokens = 10.0
+        self._tokens = self._max_tokens
+        self._stats = {"reads": 0, "hedges": 0, "hedge_wins": 0, "deadline_exceeded": 0}
+
+    @classmethod
+    def from_env(cls) -> "ReadPolicy | None":
+        """Create a ReadPolicy from the environment, or return None if no read policy is configured.
+
+        Returns:
+            A ReadPolicy hedging at the percentile in 'DAPLA_TOOLBELT_HEDGE_PERCENTILE'
+            and with the deadline in seconds in 'DAPLA_TOOLBELT_READ_DEADLINE', if either is set.
+        """
+        percentile = os.getenv(HEDGE_PERCENTILE_ENV)
+        deadline = os.getenv(READ_DEADLINE_ENV)
+        if not percentile and not deadline:
+            return None
+        return cls(
+            hedge_percentile=float(percentile) if percentile else None,
+            deadline=float(deadline) if deadline else None,
+        )
+
+    async def run(self, fetch: Callable[[], Awaitable[T]]) -> T:
+        """Run a read under this policy.
+
+        Args:
+            fetch: Called to send a request, once or twice if the first one is slow.
+
+        Returns:
+            The result of the request that finished first.
+
+        Raises:
+            TimeoutError: If the read did not finish within the deadline.
+        """
+        if self.deadline is None:
+            return await self._hedged(fetch)
+        try:
+            return await asyncio.wait_for(self._hedged(fetch), self.deadline)
+        except asyncio.TimeoutError as err:
+            self._count("deadline_exceeded")
+            raise TimeoutError(
+                f"Read did not finish within the deadline of {self.deadline} seconds"
+            ) from err
+
+    def hedge_delay(self) -> float:
+        """Return the number of seconds after which a read gets a duplicate request."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_hedge_delay
+            ordered = sorted(self._latencies)
+        assert self.hedge_percentile is not None
+        rank = math.ceil(self.hedge_percentile / 100 * len(ordered))
+        return max(ordered[rank - 1], self.min_hedge_delay)
+
+    def stats(self) -> dict[str, int]:
+        """Return a snapshot of the read counters.
+
+        Returns:
+            A dict with the number of reads, duplicate requests sent, duplicates that finished first,
+            and reads that exceeded the deadline.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    async def _hedged(self, fetch: Callable[[], Awaitable[T]]) -> T:
+        with self._lock:
+            self._stats["reads"] += 1
+            self._tokens = min(self._tokens + self.retry_budget, self._max_tokens)
+        if self.hedge_percentile is None:
+            return await fetch()
+
+        started = time.monotonic()
+        primary = asyncio.ensure_future(fetch())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay())
+            if not done and self._withdraw():
+                self._count("hedges")
+                tasks.add(asyncio.ensure_future(fetch()))
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                # Checking every finished task also marks the exceptions of failed ones as retrieved
+                finished = [task for task in done if task.exception() is None]
+                if finished:
+                    if primary not in finished:
+                        self._count("hedge_wins")
+                    with self._lock:
+                        self._latencies.append(time.monotonic() - started)
+                    return finished[0].result()
+            # Every request failed, report why the first one did
+            error = primary.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
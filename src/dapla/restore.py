@@ -0,0 +1,127 @@
+import datetime
+from typing import Any
+from typing import NamedTuple
+
+import gcsfs
+
+from dapla.batch import DEFAULT_BATCH_CONCURRENCY
+from dapla.batch import rm_many
+from dapla.rewrite import rewrite_object
+from dapla.transfer import DEFAULT_MAX_CONCURRENCY
+from dapla.transfer import run_many
+from dapla.versions import list_versions
+from dapla.versions import versions_at
+
+
+class RestoreResult(NamedTuple):
+    """Outcome of a `restore_prefix` call.
+
+    `restored` maps the path of each object that differed from its state at the restore time
+    to the generation it was restored from, or to the exception raised while restoring it.
+    `deleted` maps each object created after the restore time to None, or to the exception raised while deleting it,
+    and `newer` lists those objects when they were left in place. In a dry run nothing is restored or deleted,
+    and the result shows what would have been done.
+    """
+
+    restored: dict[str, Any]
+    deleted: dict[str, Any]
+    unchanged: list[str]
+    newer: list[str]
+    dry_run: bool
+
+
+def restore_prefix(
+    fs: gcsfs.GCSFileSystem,
+    bucket: str,
+    prefix: str,
+    as_of: datetime.datetime,
+    delete_newer: bool = False,
+    dry_run: bool = False,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> RestoreResult:
+    """Bring every object below a prefix back to the version that was live at a point in time.
+
+    The version to restore is resolved for all objects from one listing of the bucket's versions,
+    so the number of requests grows with the number of objects to restore, not with the number of versions.
+    In a bucket with object versioning the old version is copied over the live one server-side.
+    In a bucket with soft delete the live version, if any, is deleted and the old version is restored.
+    Either way the replaced versions are kept as noncurrent or soft deleted versions, so a restore can itself be undone.
+
+    Args:
+        fs: The GCS filesystem to use.
+        bucket: Name of the bucket.
+        prefix: Restore the objects whose name starts with this prefix.
+        as_of: The point in time to restore. Must be timezone aware.
+        delete_newer: Delete live objects that did not exist at `as_of`.
+        dry_run: Only resolve the versions, and report what would be restored and deleted.
+        max_concurrency: Maximum number of objects restored at once.
+
+    Returns:
+        A `RestoreResult` with the restored, deleted, unchanged and newer objects.
+
+    Raises:
+        ValueError: If `as_of` is not timezone aware.
+    """
+    if as_of.tzinfo is None:
+        raise ValueError("as_of must be a timezone aware datetime")
+    bucket = fs._strip_protocol(bucket).rstrip("/")
+    versioned, items = list_versions(fs, bucket, prefix)
+    targets, live = versions_at(items, as_of)
+
+    restores = {
+        f"{bucket}/{name}": target
+        for name, target in sorted(targets.items())
+        if name not in live or live[name]["generation"] != target["generation"]
+    }
+    unchanged = sorted(
+        f"{bucket}/{name}" for name in targets if f"{bucket}/{name}" not in restores
+    )
+    newer = sorted(f"{bucket}/{name}" for name in set(live) - set(targets))
+
+    if dry_run:
+        return RestoreResult(
+            {path: target["generation"] for path, target in restores.items()},
+            dict.fromkeys(newer) if delete_newer else {},
+            unchanged,
+            [] if delete_newer else newer,
+            True,
+        )
+
+    async def restore(path: str) -> str:
+        generation: str = restores[path]["generation"]
+        if versioned:
+            await rewrite_object(fs, path, path, generation)
+            return generation
+        _, key, _ = fs.split_path(path)
+        current = live.get(key)
+        if current is not None:
+            # Only soft deleted objects without a live version can be restored
+            await fs._call(
+                "DELETE",
+                "b/{}/o/{}",
+                bucket,
+                key,
+                ifGenerationMatch=current["generation"],
+            )
+        out = await fs._call(
+            "POST",
+            "b/{}/o/{}/restore",
+            bucket,
+            key,
+            json_out=True,
+            generation=generation,
+        )
+        info = fs._process_object(bucket, out)
+        if hasattr(fs, "update_listing_cache"):
+            fs.update_listing_cache(path, info)
+        else:
+            fs.invalidate_cache(path)
+        return generation
+
+    restored = run_many(fs, list(restores), restore, max_concurrency)
+    deleted = (
+        rm_many(fs, newer, DEFAULT_BATCH_CONCURRENCY) if delete_newer and newer else {}
+    )
+    return RestoreResult(
+        restored, deleted, unchanged, [] if delete_newer else newer, False
+    )
@@ -0,0 +1,266 @@
+import json
+import os
+import posixpath
+from collections.abc import Callable
+from typing import IO
+from typing import Any
+from typing import NamedTuple
+
+import gcsfs
+
+from dapla.batch import DEFAULT_BATCH_CONCURRENCY
+from dapla.batch import rm_many
+from dapla.transfer import DEFAULT_MAX_CONCURRENCY
+from dapla.transfer import run_many
+
+
+class TreeProgress(NamedTuple):
+    """Progress of a `copy_tree` or `move_tree` call."""
+
+    objects_done: int
+    objects_total: int
+    bytes_done: int
+    bytes_total: int
+
+
+def copy_tree(
+    fs: gcsfs.GCSFileSystem,
+    src_prefix: str,
+    dst_prefix: str,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    checkpoint: str | None = None,
+    progress: Callable[[TreeProgress], None] | None = None,
+    max_bytes_per_call: int | None = None,
+) -> dict[str, Any]:
+    """Copy every object below a prefix to another prefix, possibly in another bucket, without downloading it.
+
+    Objects are copied server-side with rewrite requests. GCS may need several requests for a large object,
+    or to copy between locations and storage classes, and hands out a rewrite token to continue with.
+    With a checkpoint file the copied objects and the latest rewrite tokens are recorded as the copy goes,
+    so running the same copy again after an interruption skips finished objects and resumes unfinished ones.
+
+    Args:
+        fs: The GCS filesystem to use.
+        src_prefix: The folder to copy, as 'bucket/folder'.
+        dst_prefix: The destination folder. Objects keep their path relative to `src_prefix`,
+            and if `src_prefix` is a single object, it is copied into the folder under its own name.
+        max_concurrency: Maximum number of objects copied at once.
+        checkpoint: Path to a local file recording progress, created if it does not exist.
+        progress: Called with a `TreeProgress` every time an object or part of an object has been copied.
+            It runs on the filesystem's event loop, so it should return quickly.
+        max_bytes_per_call: Upper bound on the bytes GCS copies per rewrite request, mainly useful for testing.
+
+    Returns:
+        A dict mapping each source path to its destination path, or to the exception raised while copying it.
+    """
+    src_prefix = fs._strip_protocol(src_prefix).rstrip("/")
+    dst_prefix = fs._strip_protocol(dst_prefix).rstrip("/")
+    sources: dict[str, dict[str, Any]] = fs.find(src_prefix, detail=True)
+    targets = {src: _target(src, src_prefix, dst_prefix) for src in sources}
+    manifest = _Manifest(checkpoint, src_prefix, dst_prefix)
+    results: dict[str, Any] = {}
+    pending = []
+    for src, info in sources.items():
+        if src in manifest.done and manifest.done[src] == info.get("generation"):
+            results[src] = targets[src]
+        else:
+            pending.append(src)
+
+    state = {
+        "objects_done": len(results),
+        "bytes_done": sum(sources[src]["size"] for src in results),
+    }
+    bytes_total = sum(info["size"] for info in sources.values())
+
+    def report(copied: int, finished: bool) -> None:
+        state["bytes_done"] += copied
+        state["objects_done"] += finished
+        if progress is not None:
+            progress(
+                TreeProgress(
+                    state["objects_done"],
+                    len(sources),
+                    state["bytes_done"],
+                    bytes_total,
+                )
+            )
+
+    async def copy(src: str) -> str:
+        await rewrite_object(
+            fs,
+            src,
+            targets[src],
+            sources[src].get("generation"),
+            manifest,
+            report,
+            max_bytes_per_call,
+        )
+        return targets[src]
+
+    try:
+        results.update(run_many(fs, pending, copy, max_concurrency))
+    finally:
+        manifest.close()
+    return {src: results[src] for src in sources}
+
+
+def move_tree(
+    fs: gcsfs.GCSFileSystem,
+    src_prefix: str,
+    dst_prefix: str,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    checkpoint: str | None = None,
+    progress: Callable[[TreeProgress], None] | None = None,
+) -> dict[str, Any]:
+    """Move every object below a prefix to another prefix, possibly in another bucket, without downloading it.
+
+    Objects are copied with `copy_tree`, and the sources that were copied are then deleted in batches.
+    Sources that could not be copied are left in place.
+
+    Args:
+        fs: The GCS filesystem to use.
+        src_prefix: The folder to move, as 'bucket/folder'.
+        dst_prefix: The destination folder. Objects keep their path relative to `src_prefix`,
+            and if `src_prefix` is a single object, it is moved into the folder under its own name.
+        max_concurrency: Maximum number of objects copied at once.
+        checkpoint: Path to a local file recording progress, see `copy_tree`.
+        progress: Called with a `TreeProgress` while the objects are copied.
+
+    Returns:
+        A dict mapping each source path to its destination path, or to the exception raised while copying or deleting it.
+    """
+    results = copy_tree(
+        fs, src_prefix, dst_prefix, max_concurrency, checkpoint, progress
+    )
+    copied = [src for src, dst in results.items() if not isinstance(dst, Exception)]
+    for src, error in rm_many(fs, copied, DEFAULT_BATCH_CONCURRENCY).items():
+        if error is not None:
+            results[src] = error
+    return results
+
+
+def _target(src: str, src_prefix: str, dst_prefix: str) -> str:
+    """Return the destination path of an object found below a prefix, or of the object the prefix names."""
+    rel = posixpath.relpath(src, src_prefix)
+    if rel == ".":
+        rel = posixpath.basename(src)
+    return f"{dst_prefix}/{rel}"
+
+
+async def rewrite_object(
+    fs: gcsfs.GCSFileSystem,
+    src: str,
+    dst: str,
+    generation: str | None = None,
+    manifest: "_Manifest | None" = None,
+    report: Callable[[int, bool], None] | None = None,
+    max_bytes_per_call: int | None = None,
+) -> dict[str, Any]:
+    """Copy one object with rewrite requests, continuing from a checkpointed rewrite token if there is one.
+
+    Args:
+        fs: The GCS filesystem to use.
+        src: Path to the source object.
+        dst: Path to the destination object.
+        generation: Generation of the source object to copy. Defaults to the live version.
+        manifest: Checkpoint recording the rewrite tokens and finished objects.
+        report: Called with the number of bytes copied by each request, and whether the copy is finished.
+        max_bytes_per_call: Upper bound on the bytes GCS copies per rewrite request.
+
+    Returns:
+        The metadata of the destination object.
+    """
+    if not isinstance(fs, gcsfs.GCSFileSystem):
+        # Other storage backends copy the object in one go, and have no rewrite tokens to checkpoint
+        await fs._cp_file(src, dst)
+        info: dict[str, Any] = await fs._info(dst)
+        if manifest is not None:
+            manifest.record({"src": src, "generation": generation, "done": True})
+        if report is not None:
+            report(int(info["size"]), True)
+        return info
+    manifest = manifest or _Manifest(None, src, dst)
+    src_bucket, src_key, _ = fs.split_path(src)
+    dst_bucket, dst_key, _ = fs.split_path(dst)
+    token = manifest.tokens.get(src, {}).get(generation)
+    reported = 0
+    while True:
+        out = await fs._call(
+            "POST",
+            "b/{}/o/{}/rewriteTo/b/{}/o/{}",
+            src_bucket,
+            src_key,
+            dst_bucket,
+            dst_key,
+            headers={"Content-Type": "application/json"},
+            json_out=True,
+            # Pinning the generation makes GCS reject the token if the source changes between requests
+            sourceGeneration=generation,
+            rewriteToken=token,
+            maxBytesRewrittenPerCall=max_bytes_per_call,
+        )
+        rewritten = int(out["totalBytesRewritten"])
+        done = out["done"] is True
+        if report is not None:
+            report(rewritten - reported, done)
+        reported = rewritten
+        if done:
+            break
+        token = out["rewriteToken"]
+        manifest.record({"src": src, "generation": generation, "token": token})
+    manifest.record({"src": src, "generation": generation, "done": True})
+    info = fs._process_object(dst_bucket, out["resource"])
+    if hasattr(fs, "update_listing_cache"):
+        fs.update_listing_cache(dst, info)
+    else:
+        fs.invalidate_cache(dst)
+    return info
+
+
+class _Manifest:
+    """Append-only JSON lines record of finished objects and rewrite tokens."""
+
+    def __init__(self, path: str | None, src_prefix: str, dst_prefix: str) -> None:
+        self.done: dict[str, str | None] = {}
+        self.tokens: dict[str, dict[str | None, str]] = {}
+        self._file: IO[str] | None = None
+        if path is None:
+            return
+        header = {"src_prefix": src_prefix, "dst_prefix": dst_prefix}
+        content = ""
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                content = f.read()
+            self._load(path, content, header)
+        self._file = open(path, "a", encoding="utf-8")
+        if not content:
+            self.record(header)
+        elif not content.endswith("\n"):
+            # Terminate a line cut short by an interruption, so the next entry starts on a line of its own
+            self._file.write("\n")
+
+    def _load(self, path: str, content: str, header: dict[str, str]) -> None:
+        for i, line in enumerate(content.splitlines()):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if i == 0:
+                if entry != header:
+                    raise ValueError(
+                        f"Checkpoint {path} belongs to a copy from {entry.get('src_prefix')} to {entry.get('dst_prefix')}"
+                    )
+            elif entry.get("done"):
+                self.done[entry["src"]] = entry["generation"]
+                self.tokens.pop(entry["src"], None)
+            else:
+                self.tokens[entry["src"]] = {entry["generation"]: entry["token"]}
+
+    def record(self, entry: dict[str, Any]) -> None:
+        if self._file is not None:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
@@ -0,0 +1,295 @@
+import codecs
+import logging
+import queue
+import threading
+import typing as t
+from collections.abc import Iterator
+from enum import Enum
+from typing import Any
+
+from fsspec import AbstractFileSystem
+from fsspec.caching import AllBytes
+from fsspec.spec import AbstractBufferedFile
+
+logger = logging.getLogger(__name__)
+
+# Bytes requested from GCS at a time when streaming a file
+DEFAULT_CHUNK_SIZE = 8 * 2**20
+
+
+class AccessPattern(Enum):
+    """How an opened file is going to be read, used to pick its buffering."""
+
+    SEQUENTIAL = "sequential"
+    RANDOM = "random"
+    PARQUET = "parquet"
+    WHOLE = "whole"
+
+
+# Arguments to fsspec open for each access pattern
+_ACCESS_OPTIONS: dict[AccessPattern, dict[str, Any]] = {
+    # Large blocks, with the next block fetched in the background while the current one is read
+    AccessPattern.SEQUENTIAL: {
+        "block_size": 16 * 2**20,
+        "cache_type": "background",
+        "cache_options": {"maxblocks": 2},
+    },
+    # Small blocks to keep over-fetching low, with recently used blocks kept for nearby reads
+    AccessPattern.RANDOM: {
+        "block_size": 2**20,
+        "cache_type": "blockcache",
+        "cache_options": {"maxblocks": 32},
+    },
+    # The footer is read first and kept while column chunks are read in mostly ascending order
+    AccessPattern.PARQUET: {
+        "block_size": 4 * 2**20,
+        "cache_type": "blockcache",
+        "cache_options": {"maxblocks": 16},
+    },
+    # One request for the whole file when it is opened
+    AccessPattern.WHOLE: {"cache_type": "all"},
+}
+
+# Seconds between checks for a closed consumer while the readahead queue is full
+_PUT_INTERVAL = 0.1
+_DONE = object()
+
+
+class ReadStats:
+    """Bytes fetched from storage and bytes consumed by the reader of one open file."""
+
+    def __init__(self) -> None:
+        """Initialize ReadStats with zeroed counters."""
+        self.fetched = 0
+        self.consumed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def amplification(self) -> float:
+        """Bytes fetched per byte consumed, or 0.0 if nothing has been consumed yet."""
+        with self._lock:
+            return self.fetched / self.consumed if self.consumed else 0.0
+
+    def _add(self, fetched: int = 0, consumed: int = 0) -> None:
+        with self._lock:
+            self.fetched += fetched
+            self.consumed += consumed
+
+    def __repr__(self) -> str:
+        """Show the counters."""
+        return f"ReadStats(fetched={self.fetched}, consumed={self.consumed})"
+
+
+def open_with_access(
+    fs: AbstractFileSystem,
+    path: str,
+    mode: str = "rb",
+    access: AccessPattern | str | None = None,
+) -> Any:
+    """Open a file for reading with buffering tuned to how it is going to be read.
+
+    With an access pattern, the file gets a `read_stats` attribute holding a `ReadStats` with the bytes
+    fetched and consumed so far, to measure read amplification. Files without a read cache, such as local
+    and in-memory ones, count the bytes read as both fetched and consumed.
+
+    Args:
+        fs: The filesystem to open the file in.
+        path: The path to the file.
+        mode: File open mode.
+        access: One of 'sequential', 'random', 'parquet' or 'whole', or None for the default fsspec buffering.
+
+    Returns:
+        A file-like object.
+
+    Raises:
+        ValueError: If an access pattern is given for a file not opened for reading.
+    """
+    if access is None:
+        return fs.open(path, mode)
+    if "r" not in mode:
+        raise ValueError(f"Access patterns only apply to reading, got mode '{mode}'")
+    f = fs.open(path, mode, **_ACCESS_OPTIONS[AccessPattern(access)])
+    buffered = getattr(f, "buffer", f)
+    if isinstance(buffered, AbstractBufferedFile):
+        f.read_stats = _meter(buffered)
+    else:
+        f.read_stats = _meter_reads(buffered)
+    return f
+
+
+def iter_chunks(
+    fs: AbstractFileSystem,
+    path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    encoding: str | None = None,
+    readahead: int = 0,
+) -> Iterator[Any]:
+    """Stream a file in chunks, holding at most `readahead + 1` chunks in memory.
+
+    Args:
+        fs: The filesystem to read from.
+        path: The path to the file.
+        chunk_size: Number of bytes to read at a time.
+        encoding: Decode the chunks incrementally with this encoding, or yield bytes if None.
+            A multibyte character split between two reads is yielded with the later chunk.
+        readahead: Number of chunks to fetch ahead in a background thread while the caller processes the current one.
+
+    Yields:
+        The file content, chunk by chunk.
+
+    Raises:
+        ValueError: If chunk_size is less than 1 or readahead is negative.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+    if readahead < 0:
+        raise ValueError(f"readahead must not be negative, got {readahead}")
+    chunks = (
+        _read_ahead(fs, path, chunk_size, readahead)
+        if readahead
+        else _read_chunks(fs, path, chunk_size)
+    )
+    if encoding is None:
+        yield from chunks
+        return
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def iter_lines(
+    fs: AbstractFileSystem,
+    path: str,
+    encoding: str = "utf-8",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    readahead: int = 0,
+) -> Iterator[str]:
+    """Stream a text file line by line, holding at most a few chunks and the current line in memory.
+
+    Lines are split on line feeds, and the line terminator, including a preceding carriage return, is not included.
+
+    Args:
+        fs: The filesystem to read from.
+        path: The path to the file.
+        encoding: The text encoding of the file.
+        chunk_size: Number of bytes to read at a time.
+        readahead: Number of chunks to fetch ahead in a background thread.
+
+    Yields:
+        The lines of the file.
+    """
+    # Chunks of a line that spans several chunks are joined once its end arrives, not on every chunk
+    pending: list[str] = []
+    for text in iter_chunks(fs, path, chunk_size, encoding, readahead):
+        if "\n" not in text:
+            pending.append(text)
+            continue
+        lines = text.split("\n")
+        pending.append(lines[0])
+        lines[0] = "".join(pending)
+        pending = [lines.pop()]
+        for line in lines:
+            yield line.removesuffix("\r")
+    last = "".join(pending)
+    if last:
+        yield last.removesuffix("\r")
+
+
+def _read_chunks(fs: AbstractFileSystem, path: str, chunk_size: int) -> Iterator[bytes]:
+    # The file's own block cache is disabled, every read is one ranged request of chunk_size bytes
+    with fs.open(path, "rb", block_size=chunk_size, cache_type="none") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def _read_ahead(
+    fs: AbstractFileSystem, path: str, chunk_size: int, readahead: int
+) -> Iterator[bytes]:
+    """Read chunks in a background thread, keeping at most `readahead` of them queued."""
+    chunks: queue.Queue[Any] = queue.Queue(maxsize=readahead)
+    closed = threading.Event()
+
+    def put(item: Any) -> bool:
+        while not closed.is_set():
+            try:
+                chunks.put(item, timeout=_PUT_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for chunk in _read_chunks(fs, path, chunk_size):
+                if not put(chunk):
+                    return
+        except BaseException as err:
+            put(err)
+            return
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while (item := chunks.get()) is not _DONE:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Stops the producer when the caller abandons the iterator early
+        closed.set()
+
+
+def _meter(f: AbstractBufferedFile) -> ReadStats:
+    """Count the bytes the cache of a file fetches and the bytes its reader consumes."""
+    stats = ReadStats()
+    cache = f.cache
+    if isinstance(cache, AllBytes) and cache.data is not None:
+        # Fetched when the file was opened
+        stats._add(fetched=len(cache.data))
+    fetcher = cache.fetcher
+    read = f.read
+    close = f.close
+
+    def metered_fetch(start: int, end: int) -> bytes:
+        data = fetcher(start, end)
+        stats._add(fetched=len(data))
+        return t.cast(bytes, data)
+
+    def metered_read(length: int = -1) -> bytes:
+        data = read(length)
+        stats._add(consumed=len(data))
+        return t.cast(bytes, data)
+
+    def metered_close() -> None:
+        if not f.closed:
+            logger.debug(f"Closing {f.path}: {stats}")
+        close()
+
+    cache.fetcher = metered_fetch
+    f.read = metered_read
+    f.close = metered_close
+    return stats
+
+
+def _meter_reads(f: Any) -> ReadStats:
+    """Count the bytes read from a file without a cache as both fetched and consumed."""
+    stats = ReadStats()
+    read = f.read
+
+    def metered_read(*args: Any) -> Any:
+        data = read(*args)
+        stats._add(fetched=len(data), consumed=len(data))
+        return data
+
+    try:
+        f.read = metered_read
+    except AttributeError:
+        # Files implemented in C take no new attributes, so their reads are not counted
+        pass
+    return stats
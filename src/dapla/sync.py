@@ -0,0 +1,249 @@
+import base64
+import hashlib
+import json
+import os
+import posixpath
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import NamedTuple
+
+from fsspec.asyn import AsyncFileSystem
+
+from dapla.batch import DEFAULT_BATCH_CONCURRENCY
+from dapla.batch import rm_many
+from dapla.transfer import DEFAULT_COMPOSITE_THRESHOLD
+from dapla.transfer import DEFAULT_MAX_CONCURRENCY
+from dapla.transfer import download
+from dapla.transfer import file_crc32c
+from dapla.transfer import run_many
+from dapla.transfer import upload
+
+_HASH_BUFFER_SIZE = 8 * 2**20
+
+
+class SyncResult(NamedTuple):
+    """Outcome of a `sync_dirs` call.
+
+    `transferred` maps each source path that differed from its destination to the destination path,
+    or to the exception raised while copying it. `deleted` maps each deleted destination path to None,
+    or to the exception raised while deleting it. In a dry run nothing is copied or deleted,
+    and both show what would have been done.
+    """
+
+    transferred: dict[str, Any]
+    deleted: dict[str, Any]
+    unchanged: list[str]
+    dry_run: bool
+
+
+def sync_dirs(
+    fs: AsyncFileSystem,
+    local_dir: str,
+    gcs_prefix: str,
+    to_gcs: bool,
+    delete: bool = False,
+    dry_run: bool = False,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    hash_index: str | None = None,
+    allow_empty_source: bool = False,
+) -> SyncResult:
+    """Make a GCS folder match a local directory, or a local directory match a GCS folder.
+
+    A file is copied if it is missing at the destination, or if its size or checksum differs.
+    Local checksums are compared with the crc32c in the object metadata, or the md5 hash for objects without one.
+    They are kept in a hash index file and only computed again for files whose size or modification time changed.
+
+    Args:
+        fs: The GCS filesystem to use.
+        local_dir: The local directory.
+        gcs_prefix: The GCS folder.
+        to_gcs: Copy from the local directory to GCS if True, or from GCS to the local directory if False.
+        delete: Delete files at the destination that are not in the source.
+        dry_run: Only compare, and report what would be copied and deleted.
+        max_concurrency: Maximum number of files copied at once.
+        hash_index: Path to the hash index file of the local directory.
+            Defaults to a file in the user's cache directory, named after the local directory.
+        allow_empty_source: With `delete`, allow an empty source, which deletes every file at the destination.
+
+    Returns:
+        A `SyncResult` with the copied, deleted and unchanged files.
+
+    Raises:
+        FileNotFoundError: If the source folder does not exist.
+        ValueError: If `delete` is set and the source is empty, without `allow_empty_source`.
+    """
+    gcs_prefix = fs._strip_protocol(gcs_prefix).rstrip("/")
+    if to_gcs and not os.path.isdir(local_dir):
+        raise FileNotFoundError(f"Source directory {local_dir} does not exist")
+    index = _HashIndex(hash_index or _default_index_path(local_dir))
+
+    local_files = _list_local(local_dir)
+    remote_files = {
+        posixpath.relpath(path, gcs_prefix): info
+        for path, info in fs.find(gcs_prefix, detail=True).items()
+        if not path.endswith("/")
+    }
+    local_path = {rel: os.path.join(local_dir, *rel.split("/")) for rel in local_files}
+    remote_path = {rel: f"{gcs_prefix}/{rel}" for rel in remote_files}
+    source_files, target_files = (
+        (local_files, remote_files) if to_gcs else (remote_files, local_files)
+    )
+    if not to_gcs and not remote_files and not fs.exists(gcs_prefix):
+        raise FileNotFoundError(f"Source folder {gcs_prefix} does not exist")
+    if delete and not source_files and target_files and not allow_empty_source:
+        # Most likely a wrong path, which must not wipe out the destination
+        raise ValueError(
+            "The source folder is empty, so every file at the destination would be deleted. "
+            "Pass allow_empty_source=True to do so."
+        )
+
+    changed = [
+        rel
+        for rel, equal in zip(
+            source_files,
+            _compare(local_dir, source_files, local_files, remote_files, index),
+            strict=True,
+        )
+        if not equal
+    ]
+    unchanged = sorted(set(source_files) - set(changed))
+    extra = sorted(set(target_files) - set(source_files)) if delete else []
+    index.save(keep=local_files)
+
+    if to_gcs:
+        copies = {local_path[rel]: f"{gcs_prefix}/{rel}" for rel in changed}
+        removals = [remote_path[rel] for rel in extra]
+    else:
+        copies = {
+            remote_path[rel]: os.path.join(local_dir, *rel.split("/"))
+            for rel in changed
+        }
+        removals = [local_path[rel] for rel in extra]
+
+    if dry_run:
+        return SyncResult(copies, dict.fromkeys(removals), unchanged, True)
+
+    async def copy(path: str) -> str:
+        target = copies[path]
+        if to_gcs:
+            await upload(fs, path, target, DEFAULT_COMPOSITE_THRESHOLD, max_concurrency)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            info = remote_files[posixpath.relpath(path, gcs_prefix)]
+            await download(fs, path, target, info=info)
+        return target
+
+    transferred = run_many(fs, list(copies), copy, max_concurrency)
+    if to_gcs:
+        deleted = rm_many(fs, removals, DEFAULT_BATCH_CONCURRENCY) if removals else {}
+    else:
+        deleted = {path: _remove_local(path) for path in removals}
+    return SyncResult(transferred, deleted, unchanged, False)
+
+
+def _compare(
+    local_dir: str,
+    rels: Iterable[str],
+    local_files: dict[str, os.stat_result],
+    remote_files: dict[str, dict[str, Any]],
+    index: "_HashIndex",
+) -> list[bool]:
+    """Tell for each relative path whether the local file and the object are equal.
+
+    Checksums are only computed for files of equal size, in parallel threads.
+    """
+
+    def equal(rel: str) -> bool:
+        stat = local_files.get(rel)
+        info = remote_files.get(rel)
+        if stat is None or info is None or stat.st_size != int(info["size"]):
+            return False
+        path = os.path.join(local_dir, *rel.split("/"))
+        if info.get("crc32c"):
+            return bool(index.checksum(rel, path, stat, "crc32c") == info["crc32c"])
+        if info.get("md5Hash"):
+            return bool(index.checksum(rel, path, stat, "md5") == info["md5Hash"])
+        return False
+
+    with ThreadPoolExecutor() as executor:
+        return list(executor.map(equal, rels))
+
+
+def _list_local(local_dir: str) -> dict[str, os.stat_result]:
+    """Return the stat of every file below a local directory, keyed by its path relative to the directory."""
+    files = {}
+    for root, _, names in os.walk(local_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, local_dir).replace(os.sep, "/")
+            files[rel] = os.stat(path)
+    return files
+
+
+def _remove_local(path: str) -> Exception | None:
+    try:
+        os.remove(path)
+    except OSError as err:
+        return err
+    return None
+
+
+def _file_md5(path: str) -> str:
+    """Return the md5 hash of a local file, base64 encoded like in GCS object metadata."""
+    md5 = hashlib.md5(usedforsecurity=False)
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_BUFFER_SIZE):
+            md5.update(chunk)
+    return base64.b64encode(md5.digest()).decode("ascii")
+
+
+# Functions computing the checksum of a local file in the format of each GCS metadata field
+_CHECKSUMS = {"crc32c": file_crc32c, "md5": _file_md5}
+
+
+def _default_index_path(local_dir: str) -> str:
+    cache_home = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    key = hashlib.sha256(os.path.abspath(local_dir).encode()).hexdigest()[:32]
+    return os.path.join(cache_home, "dapla-toolbelt", "sync", f"{key}.json")
+
+
+class _HashIndex:
+    """Checksums of local files, reused as long as the size and modification time of a file are unchanged."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.entries: dict[str, dict[str, Any]] = {}
+        self.changed = False
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            # A missing or damaged index only means checksums are computed again
+            pass
+
+    def checksum(self, rel: str, path: str, stat: os.stat_result, kind: str) -> str:
+        entry = self.entries.get(rel)
+        if (
+            entry is None
+            or entry["size"] != stat.st_size
+            or entry["mtime_ns"] != stat.st_mtime_ns
+        ):
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            self.entries[rel] = entry
+        if kind not in entry:
+            entry[kind] = _CHECKSUMS[kind](path)
+            self.changed = True
+        return str(entry[kind])
+
+    def save(self, keep: Iterable[str]) -> None:
+        """Write the index, without the entries of files that no longer exist."""
+        kept = {rel: self.entries[rel] for rel in keep if rel in self.entries}
+        if not self.changed and len(kept) == len(self.entries):
+            return
+        self.entries = kept
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
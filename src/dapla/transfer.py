@@ -0,0 +1,530 @@
+import asyncio
+import base64
+import os
+import posixpath
+import queue
+import typing as t
+import uuid
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from typing import Any
+from typing import TypeVar
+
+import gcsfs
+import google_crc32c
+from fsspec.asyn import AsyncFileSystem
+from fsspec.asyn import sync
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Number of requests kept in flight by the bulk operations unless the caller asks otherwise
+DEFAULT_MAX_CONCURRENCY = 32
+# Files at least this large are uploaded as parallel slices that are composed server-side
+DEFAULT_COMPOSITE_THRESHOLD = 150 * 2**20
+# Smallest slice that is worth a separate upload stream
+MIN_COMPOSITE_SLICE_SIZE = 32 * 2**20
+# GCS composes at most this many source objects in one request
+MAX_COMPOSE_COMPONENTS = 32
+# Smallest byte range that is worth a separate download stream
+MIN_DOWNLOAD_SLICE_SIZE = 16 * 2**20
+# Upper bound on the number of ranged downloads of a single object
+MAX_DOWNLOAD_SLICES = 32
+_COPY_BUFFER_SIZE = 8 * 2**20
+
+_DONE = object()
+
+
+async def _run_bounded(
+    items: Iterable[T],
+    func: Callable[[T], Awaitable[R]],
+    max_concurrency: int,
+    on_result: Callable[[int, T, R | Exception], None],
+) -> None:
+    """Apply `func` to every item with at most `max_concurrency` calls in flight.
+
+    Exceptions raised by `func` are passed to `on_result` in place of a result,
+    so one failing item does not abort the others.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    work = iter(enumerate(items))
+
+    async def worker() -> None:
+        # Workers share one iterator, so items are consumed lazily and in order
+        for index, item in work:
+            try:
+                result: R | Exception = await func(item)
+            except Exception as err:
+                result = err
+            on_result(index, item, result)
+
+    await asyncio.gather(*(worker() for _ in range(max_concurrency)))
+
+
+async def _gather_all(aws: Iterable[Awaitable[Any]]) -> None:
+    """Run awaitables concurrently, and when one fails, cancel the others and wait for them to end before raising.
+
+    Unlike `asyncio.gather`, nothing is left running when the error reaches the caller, which can then clean up.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class _Threads:
+    """Calls run in threads, which are tracked because a thread keeps running when its awaiting task is cancelled."""
+
+    def __init__(self) -> None:
+        self.pending: set[asyncio.Future[Any]] = set()
+
+    async def run(self, func: Callable[..., R], *args: Any) -> R:
+        future = asyncio.ensure_future(asyncio.to_thread(func, *args))
+        self.pending.add(future)
+        future.add_done_callback(self.pending.discard)
+        return await asyncio.shield(future)
+
+    async def wait(self) -> None:
+        """Wait for the calls still running to finish."""
+        await asyncio.gather(*self.pending, return_exceptions=True)
+
+
+def run_many(
+    fs: AsyncFileSystem,
+    items: Iterable[T],
+    func: Callable[[T], Awaitable[R]],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> dict[T, R | Exception]:
+    """Run `func` for every item on the event loop of `fs` and collect the results.
+
+    Args:
+        fs: The async filesystem whose event loop and session the calls run on.
+        items: The items to process, typically paths.
+        func: Coroutine function called once per item.
+        max_concurrency: Maximum number of calls in flight at once.
+
+    Returns:
+        A dict mapping each item to its result, or to the exception raised while processing it.
+    """
+    results: dict[T, R | Exception] = {}
+
+    def collect(index: int, item: T, result: R | Exception) -> None:
+        results[item] = result
+
+    sync(fs.loop, _run_bounded, items, func, max_concurrency, collect)
+    return results
+
+
+def iter_many(
+    fs: AsyncFileSystem,
+    items: Iterable[T],
+    func: Callable[[T], Awaitable[R]],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ordered: bool = False,
+) -> Iterator[tuple[T, R | Exception]]:
+    """Run `func` for every item on the event loop of `fs`, yielding results as they complete.
+
+    Args:
+        fs: The async filesystem whose event loop and session the calls run on.
+        items: The items to process, typically paths.
+        func: Coroutine function called once per item.
+        max_concurrency: Maximum number of calls in flight at once.
+        ordered: Yield results in the order of `items` instead of in completion order.
+            A result is then held back until all results before it are done.
+
+    Yields:
+        Tuples of item and result, or item and the exception raised while processing it.
+    """
+    results: queue.Queue[Any] = queue.Queue()
+
+    def collect(index: int, item: T, result: R | Exception) -> None:
+        results.put((index, item, result))
+
+    async def run() -> None:
+        try:
+            await _run_bounded(items, func, max_concurrency, collect)
+        finally:
+            results.put(_DONE)
+
+    future = asyncio.run_coroutine_threadsafe(run(), fs.loop)
+    pending: dict[int, tuple[T, R | Exception]] = {}
+    next_index = 0
+    try:
+        while (entry := results.get()) is not _DONE:
+            index, item, result = entry
+            if not ordered:
+                yield item, result
+                continue
+            pending[index] = (item, result)
+            while next_index in pending:
+                yield pending.pop(next_index)
+                next_index += 1
+        # Surface errors from the scheduling itself, such as an invalid max_concurrency
+        future.result()
+    finally:
+        future.cancel()
+
+
+def cat_many(
+    fs: AsyncFileSystem,
+    paths: Iterable[str],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    encoding: str | None = None,
+) -> dict[str, Any]:
+    """Read the full content of many objects concurrently.
+
+    Args:
+        fs: The async filesystem to read from.
+        paths: Paths to the objects.
+        max_concurrency: Maximum number of downloads in flight at once.
+        encoding: Decode the content with this encoding. Returns bytes if None.
+
+    Returns:
+        A dict mapping each path to its content, or to the exception raised while reading it.
+    """
+    return run_many(fs, paths, _cat_file(fs, encoding), max_concurrency)
+
+
+def iter_cat_many(
+    fs: AsyncFileSystem,
+    paths: Iterable[str],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    encoding: str | None = None,
+    ordered: bool = False,
+) -> Iterator[tuple[str, Any]]:
+    """Read the full content of many objects concurrently, yielding each one as soon as it is available.
+
+    Args:
+        fs: The async filesystem to read from.
+        paths: Paths to the objects.
+        max_concurrency: Maximum number of downloads in flight at once.
+        encoding: Decode the content with this encoding. Yields bytes if None.
+        ordered: Yield results in the order of `paths` instead of in completion order.
+
+    Returns:
+        An iterator of tuples of path and content, or path and the exception raised while reading it.
+    """
+    return iter_many(fs, paths, _cat_file(fs, encoding), max_concurrency, ordered)
+
+
+def get_many(
+    fs: AsyncFileSystem,
+    paths: Iterable[str],
+    local_dir: str,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> dict[str, str | Exception]:
+    """Download many objects concurrently into a local directory.
+
+    The directory layout below the deepest folder shared by all paths is kept,
+    so objects with the same name in different folders do not overwrite each other.
+
+    Args:
+        fs: The async filesystem to download from.
+        paths: Paths to the objects.
+        local_dir: The local directory to download into. It is created if it does not exist.
+        max_concurrency: Maximum number of downloads in flight at once.
+
+    Returns:
+        A dict mapping each path to the local file it was written to, or to the exception raised while downloading it.
+    """
+    paths = list(paths)
+    local_paths = local_paths_for(fs, paths, local_dir)
+
+    async def get_file(path: str) -> str:
+        lpath = local_paths[path]
+        os.makedirs(os.path.dirname(lpath), exist_ok=True)
+        await fs._get_file(path, lpath)
+        return lpath
+
+    return run_many(fs, paths, get_file, max_concurrency)
+
+
+def put_many(
+    fs: AsyncFileSystem,
+    local_paths: Iterable[str],
+    gcs_prefix: str,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    composite_threshold: int | None = DEFAULT_COMPOSITE_THRESHOLD,
+) -> dict[str, str | Exception]:
+    """Upload many local files concurrently below a GCS prefix.
+
+    The directory layout below the deepest folder shared by all files is kept.
+    Files of at least `composite_threshold` bytes are uploaded with `put_composite`.
+
+    Args:
+        fs: The async filesystem to upload to.
+        local_paths: Paths to the local files.
+        gcs_prefix: The GCS folder to upload into.
+        max_concurrency: Maximum number of uploads in flight at once.
+        composite_threshold: Size in bytes from which files are uploaded as parallel slices.
+            Set to None to always upload files as a single stream.
+
+    Returns:
+        A dict mapping each local path to the GCS path it was written to, or to the exception raised while uploading it.
+    """
+    local_paths = list(local_paths)
+    remote_paths = remote_paths_for(local_paths, gcs_prefix)
+
+    async def put_file(lpath: str) -> str:
+        rpath = remote_paths[lpath]
+        await upload(fs, lpath, rpath, composite_threshold, max_concurrency)
+        return rpath
+
+    return run_many(fs, local_paths, put_file, max_concurrency)
+
+
+async def upload(
+    fs: AsyncFileSystem,
+    lpath: str,
+    rpath: str,
+    composite_threshold: int | None = DEFAULT_COMPOSITE_THRESHOLD,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> None:
+    """Upload a local file, as parallel slices with `put_composite` if it is at least `composite_threshold` bytes.
+
+    Args:
+        fs: The async filesystem to upload to.
+        lpath: Path to the local file.
+        rpath: The GCS path of the destination object.
+        composite_threshold: Size in bytes from which the file is uploaded as parallel slices.
+            Set to None to always upload as a single stream.
+        max_concurrency: Maximum number of slices uploaded at once.
+    """
+    if (
+        composite_threshold is not None
+        and os.path.getsize(lpath) >= composite_threshold
+    ):
+        await put_composite(fs, lpath, rpath, max_concurrency=max_concurrency)
+    else:
+        await fs._put_file(lpath, rpath)
+
+
+async def put_composite(
+    fs: AsyncFileSystem,
+    lpath: str,
+    rpath: str,
+    slices: int | None = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> None:
+    """Upload a large file as slices in parallel, and compose them into one object.
+
+    The slices are stored as temporary objects next to the destination and deleted afterwards.
+    Note that composite objects have a crc32c checksum, but no md5 hash.
+
+    Args:
+        fs: The async filesystem to upload to.
+        lpath: Path to the local file.
+        rpath: The GCS path of the destination object.
+        slices: Number of slices, at most 32. Chosen from the file size if None.
+        max_concurrency: Maximum number of slices uploaded at once.
+
+    Raises:
+        ValueError: If the number of slices is not between 1 and 32.
+    """
+    size = os.path.getsize(lpath)
+    if slices is None:
+        slices = min(MAX_COMPOSE_COMPONENTS, max(1, size // MIN_COMPOSITE_SLICE_SIZE))
+    if not 1 <= slices <= MAX_COMPOSE_COMPONENTS:
+        raise ValueError(
+            f"slices must be between 1 and {MAX_COMPOSE_COMPONENTS}, got {slices}"
+        )
+    if slices == 1:
+        await fs._put_file(lpath, rpath)
+        return
+
+    slice_size = -(-size // slices)
+    part_prefix = f"{rpath}.dapla-part-{uuid.uuid4().hex}"
+    parts = [f"{part_prefix}-{i:02d}" for i in range(slices)]
+    semaphore = asyncio.Semaphore(max_concurrency)
+    threads = _Threads()
+
+    async def upload(index: int) -> None:
+        async with semaphore:
+            # Each slice is streamed from disk in its own thread to keep memory use bounded
+            await threads.run(
+                _upload_slice, fs, lpath, parts[index], index * slice_size, slice_size
+            )
+
+    try:
+        await _gather_all(upload(index) for index in range(slices))
+        await fs._merge(rpath, parts)
+    finally:
+        # A slice still uploading would create its part again after it is deleted
+        await threads.wait()
+        await asyncio.gather(
+            *(fs._rm_file(part) for part in parts), return_exceptions=True
+        )
+
+
+def _upload_slice(
+    fs: AsyncFileSystem, lpath: str, rpath: str, offset: int, length: int
+) -> None:
+    with open(lpath, "rb") as src, fs.open(rpath, "wb") as dst:
+        src.seek(offset)
+        while length > 0:
+            chunk = src.read(min(_COPY_BUFFER_SIZE, length))
+            if not chunk:
+                break
+            dst.write(chunk)
+            length -= len(chunk)
+
+
+async def download(
+    fs: AsyncFileSystem,
+    rpath: str,
+    lpath: str,
+    slices: int | None = None,
+    verify: bool = True,
+    info: dict[str, Any] | None = None,
+) -> str:
+    """Download one object with concurrent byte-range requests into a preallocated local file.
+
+    All ranges are read from the generation the object had when the download started.
+    The data is written to a temporary file next to `lpath`, which replaces `lpath` once complete.
+
+    Args:
+        fs: The async filesystem to download from.
+        rpath: Path to the object.
+        lpath: The local file to write to.
+        slices: Number of concurrent range requests. Chosen from the object size if None.
+        verify: Compare the crc32c checksum of the local file with the object metadata.
+        info: Metadata of the object, if already known. The download is pinned to its generation.
+
+    Raises:
+        ValueError: If the number of slices is less than 1.
+        RuntimeError: If the checksum of the downloaded file does not match the object.
+
+    Returns:
+        The local file path.
+    """
+    if info is None:
+        info = await fs._info(rpath)
+    size = int(info["size"])
+    if slices is None:
+        slices = min(MAX_DOWNLOAD_SLICES, max(1, size // MIN_DOWNLOAD_SLICE_SIZE))
+    if slices < 1:
+        raise ValueError(f"slices must be at least 1, got {slices}")
+    slice_size = -(-size // slices) if size else 0
+    tmp_path = f"{lpath}.{uuid.uuid4().hex}.part"
+
+    os.makedirs(os.path.dirname(os.path.abspath(lpath)), exist_ok=True)
+    fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    threads = _Threads()
+    try:
+        _preallocate(fd, size)
+
+        async def fetch_slice(start: int) -> None:
+            end = min(start + slice_size, size)
+            for offset in range(start, end, _COPY_BUFFER_SIZE):
+                data = await _fetch_range(
+                    fs,
+                    rpath,
+                    info.get("generation"),
+                    offset,
+                    min(offset + _COPY_BUFFER_SIZE, end),
+                )
+                await threads.run(_pwrite, fd, data, offset)
+
+        if size:
+            await _gather_all(
+                fetch_slice(start) for start in range(0, size, slice_size)
+            )
+    except BaseException:
+        # A write still running could otherwise hit the closed descriptor, or a file that reuses it
+        await threads.wait()
+        os.close(fd)
+        os.remove(tmp_path)
+        raise
+    os.close(fd)
+
+    if verify and info.get("crc32c"):
+        actual = await asyncio.to_thread(file_crc32c, tmp_path)
+        if actual != info["crc32c"]:
+            os.remove(tmp_path)
+            raise RuntimeError(
+                f"crc32c mismatch when downloading {rpath}: expected {info['crc32c']}, got {actual}"
+            )
+    os.replace(tmp_path, lpath)
+    return lpath
+
+
+async def _fetch_range(
+    fs: AsyncFileSystem, path: str, generation: str | None, start: int, end: int
+) -> bytes:
+    """Read bytes [start, end) of the object, pinned to `generation` when reading from GCS."""
+    if not isinstance(fs, gcsfs.GCSFileSystem) or not generation:
+        return t.cast(bytes, await fs._cat_file(path, start=start, end=end))
+    url = f"{fs.url(path)}&generation={generation}"
+    _, data = await fs._call("GET", url, headers={"Range": f"bytes={start}-{end - 1}"})
+    return t.cast(bytes, data)
+
+
+def _preallocate(fd: int, size: int) -> None:
+    if size and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError:
+            # Not supported by every filesystem, fall back to a sparse file
+            pass
+    os.ftruncate(fd, size)
+
+
+def _pwrite(fd: int, data: bytes, offset: int) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def file_crc32c(path: str) -> str:
+    """Return the crc32c checksum of a local file, base64 encoded like in GCS object metadata."""
+    checksum = google_crc32c.Checksum()
+    with open(path, "rb") as f:
+        while chunk := f.read(_COPY_BUFFER_SIZE):
+            checksum.update(chunk)
+    return base64.b64encode(checksum.digest()).decode("ascii")
+
+
+def remote_paths_for(local_paths: list[str], gcs_prefix: str) -> dict[str, str]:
+    """Map local paths to paths below `gcs_prefix`, relative to the deepest folder they share."""
+    absolute = [os.path.abspath(path) for path in local_paths]
+    if not absolute:
+        return {}
+    common = os.path.commonpath([os.path.dirname(path) for path in absolute])
+    prefix = gcs_prefix.rstrip("/")
+    return {
+        path: f"{prefix}/{os.path.relpath(name, common).replace(os.sep, '/')}"
+        for path, name in zip(local_paths, absolute, strict=True)
+    }
+
+
+def local_paths_for(
+    fs: AsyncFileSystem, paths: list[str], local_dir: str
+) -> dict[str, str]:
+    """Map remote paths to local paths below `local_dir`, relative to the deepest folder they share."""
+    stripped = [fs._strip_protocol(path) for path in paths]
+    if not stripped:
+        return {}
+    common = posixpath.commonpath([posixpath.dirname(path) for path in stripped])
+    return {
+        path: os.path.join(local_dir, *posixpath.relpath(name, common).split("/"))
+        for path, name in zip(paths, stripped, strict=True)
+    }
+
+
+def _cat_file(
+    fs: AsyncFileSystem, encoding: str | None
+) -> Callable[[str], Awaitable[Any]]:
+    async def cat_file(path: str) -> Any:
+        content = await fs._cat_file(path)
+        return content if encoding is None else content.decode(encoding)
+
+    return cat_file
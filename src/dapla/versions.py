@@ -0,0 +1,224 @@
+import datetime
+import posixpath
+import threading
+import typing as t
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Any
+
+import gcsfs
+from fsspec.asyn import sync
+
+from dapla.gcs import _credential_identity
+from dapla.streaming import AccessPattern
+from dapla.streaming import open_with_access
+
+_LIST_PAGE_SIZE = 1000
+# Number of resolved paths kept in memory
+_CACHE_SIZE = 256
+
+# Keyed by the credentials and filesystem too, as callers may not all be allowed to list the same versions
+_cache: OrderedDict[tuple[Any, ...], dict[str, str]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def list_versions(
+    fs: gcsfs.GCSFileSystem, bucket: str, prefix: str
+) -> tuple[bool, list[dict[str, Any]]]:
+    """List every version of the objects below a prefix, one page after another.
+
+    Args:
+        fs: The GCS filesystem to use.
+        bucket: Name of the bucket.
+        prefix: List the objects whose name starts with this prefix.
+
+    Returns:
+        Whether the bucket has object versioning, and the metadata of the versions.
+        Without object versioning the old versions are the soft deleted objects, listed after the live ones.
+    """
+    return t.cast(
+        tuple[bool, list[dict[str, Any]]],
+        sync(fs.loop, list_versions_async, fs, bucket, prefix),
+    )
+
+
+async def list_versions_async(
+    fs: gcsfs.GCSFileSystem, bucket: str, prefix: str
+) -> tuple[bool, list[dict[str, Any]]]:
+    """Coroutine version of `list_versions`, for filesystems running on the caller's event loop."""
+
+    async def list_all(**params: Any) -> list[dict[str, Any]]:
+        items: list[dict[str, Any]] = []
+        token = None
+        while True:
+            out = await fs._call(
+                "GET",
+                "b/{}/o",
+                bucket,
+                json_out=True,
+                prefix=prefix,
+                maxResults=_LIST_PAGE_SIZE,
+                pageToken=token,
+                **params,
+            )
+            items.extend(out.get("items", []))
+            token = out.get("nextPageToken")
+            if not token:
+                return items
+
+    metadata = await fs._call("GET", "b/{}", bucket, json_out=True)
+    if metadata.get("versioning", {}).get("enabled"):
+        return True, await list_all(versions="true")
+    return False, await list_all() + await list_all(softDeleted="true")
+
+
+def versions_at(
+    items: Iterable[dict[str, Any]], as_of: datetime.datetime
+) -> tuple[dict[str, dict[str, Any]], dict[str, dict[str, Any]]]:
+    """Pick the version of each object that was live at a point in time.
+
+    Args:
+        items: Metadata of the versions, as listed by `list_versions`.
+        as_of: The point in time. Must be timezone aware.
+
+    Returns:
+        The metadata of the version live at `as_of`, and of the version live now, by object name.
+        Objects that did not exist at `as_of`, or do not exist now, are left out of the respective dict.
+    """
+    then: dict[str, dict[str, Any]] = {}
+    now: dict[str, dict[str, Any]] = {}
+    for item in items:
+        deleted = item.get("timeDeleted") or item.get("softDeleteTime")
+        if deleted is None:
+            now[item["name"]] = item
+        if _parse_time(item["timeCreated"]) <= as_of and (
+            deleted is None or _parse_time(deleted) > as_of
+        ):
+            current = then.get(item["name"])
+            if current is None or int(item["generation"]) > int(current["generation"]):
+                then[item["name"]] = item
+    return then, now
+
+
+def generations_as_of(
+    fs: gcsfs.GCSFileSystem, path: str, as_of: datetime.datetime
+) -> dict[str, str]:
+    """Resolve the generation of every object below a path, or of the object at the path, live at a point in time.
+
+    The versions are resolved from one listing. Resolutions for points in time in the past do not change,
+    and are cached so that reading the same data as of the same time again needs no listing.
+
+    Args:
+        fs: The GCS filesystem to use.
+        path: Path to a folder or an object, as 'bucket/path'.
+        as_of: The point in time. Must be timezone aware.
+
+    Returns:
+        A dict mapping the path of each object that existed at `as_of` to its generation at the time.
+
+    Raises:
+        ValueError: If `as_of` is not timezone aware.
+        FileNotFoundError: If one of the versions is soft deleted, which makes it unreadable until it is restored.
+    """
+    if as_of.tzinfo is None:
+        raise ValueError("as_of must be a timezone aware datetime")
+    path = fs._strip_protocol(path).strip("/")
+    key = (_credential_identity(), fs._fs_token, path, as_of)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return dict(_cache[key])
+
+    bucket, _, prefix = path.partition("/")
+    versioned, items = list_versions(fs, bucket, prefix)
+    then, _ = versions_at(items, as_of)
+    generations = {}
+    for name, item in sorted(then.items()):
+        if name.endswith("/") or not (
+            name == prefix or name.startswith(f"{prefix}/") or not prefix
+        ):
+            continue
+        if not versioned and item.get("softDeleteTime"):
+            raise FileNotFoundError(
+                f"The version of {bucket}/{name} as of {as_of} is soft deleted, "
+                "restore it with FileClient.restore_prefix to read it"
+            )
+        generations[f"{bucket}/{name}"] = str(item["generation"])
+
+    if as_of < datetime.datetime.now(datetime.timezone.utc):
+        with _cache_lock:
+            _cache[key] = dict(generations)
+            while len(_cache) > _CACHE_SIZE:
+                _cache.popitem(last=False)
+    return generations
+
+
+def paths_as_of(
+    fs: gcsfs.GCSFileSystem, paths: str | list[str], as_of: datetime.datetime
+) -> list[str]:
+    """List the data files below folders or at paths as they were at a point in time.
+
+    Files whose name starts with '_' or '.', such as '_SUCCESS', are skipped like in dataset discovery.
+
+    Args:
+        fs: A version aware GCS filesystem.
+        paths: Paths to folders or files.
+        as_of: The point in time. Must be timezone aware.
+
+    Returns:
+        The paths of the files, each with a '#generation' suffix selecting the version live at `as_of`.
+
+    Raises:
+        FileNotFoundError: If none of the paths had any files at `as_of`.
+    """
+    versioned = []
+    for path in [paths] if isinstance(paths, str) else paths:
+        for file, generation in generations_as_of(fs, path, as_of).items():
+            if not posixpath.basename(file).startswith(("_", ".")):
+                versioned.append(f"{file}#{generation}")
+    if not versioned:
+        raise FileNotFoundError(f"No files at {paths} as of {as_of}")
+    return versioned
+
+
+def open_as_of(
+    fs: gcsfs.GCSFileSystem,
+    path: str,
+    as_of: datetime.datetime,
+    mode: str = "rb",
+    access: AccessPattern | str | None = None,
+) -> Any:
+    """Open the version of a file that was live at a point in time.
+
+    Args:
+        fs: A version aware GCS filesystem.
+        path: Path to the file.
+        as_of: The point in time. Must be timezone aware.
+        mode: File open mode, for reading.
+        access: Access pattern of the reads, see `open_with_access`.
+
+    Returns:
+        A file-like object.
+
+    Raises:
+        ValueError: If `mode` is not a read mode.
+        FileNotFoundError: If the file did not exist at `as_of`.
+    """
+    if "r" not in mode:
+        raise ValueError(f"Past versions can only be read, got mode '{mode}'")
+    path = fs._strip_protocol(path).strip("/")
+    generation = generations_as_of(fs, path, as_of).get(path)
+    if generation is None:
+        raise FileNotFoundError(f"{path} did not exist at {as_of}")
+    return open_with_access(fs, f"{path}#{generation}", mode, access)
+
+
+def clear_version_cache() -> None:
+    """Forget the cached generations, for instance after noncurrent versions were deleted."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _parse_time(value: str) -> datetime.datetime:
+    # GCS timestamps end in 'Z', which datetime.fromisoformat only accepts from Python 3.11
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
@@ -0,0 +1,105 @@
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+from fsspec.implementations.asyn_wrapper import AsyncFileSystemWrapper
+from fsspec.implementations.memory import MemoryFileSystem
+
+from dapla import metrics
+from dapla.credentials import CredentialCache
+from dapla.gcs import LISTING_TTL_ENV
+from dapla.gcs import GCSFileSystem
+from dapla.gcs import GCSFileSystemPool
+from dapla.gcs import StorageClientPool
+from dapla.versions import clear_version_cache
+
+
+@pytest.fixture(autouse=True)
+def reset_pools() -> Iterator[None]:
+    # Pooled instances and cached credentials must not leak mocks between tests
+    GCSFileSystemPool.reset()
+    StorageClientPool.reset()
+    CredentialCache.reset()
+    clear_version_cache()
+    metrics.disable()
+    metrics.reset()
+    yield
+    GCSFileSystemPool.reset()
+    StorageClientPool.reset()
+    CredentialCache.reset()
+    clear_version_cache()
+
+
+class MemoryAsyncFileSystem(AsyncFileSystemWrapper):  # type: ignore [misc]
+    """In-memory async filesystem standing in for GCS in tests."""
+
+    def _open(self, path: str, mode: str = "rb", **kwargs: Any) -> Any:
+        return self.sync_fs.open(path, mode, **kwargs)
+
+    async def _merge(self, path: str, paths: list[str], acl: str | None = None) -> None:
+        # Stand-in for the GCS compose request
+        data = b"".join([await self._cat_file(p) for p in paths])
+        await self._pipe_file(path, data)
+
+
+@pytest.fixture
+def memory_fs() -> Iterator[MemoryAsyncFileSystem]:
+    memory = MemoryFileSystem()
+    yield MemoryAsyncFileSystem(memory)
+    memory.store.clear()
+    memory.pseudo_dirs.clear()
+    memory.pseudo_dirs.append("")
+
+
+@pytest.fixture
+def gcs_fs(monkeypatch: pytest.MonkeyPatch) -> GCSFileSystem:
+    # Anonymous access keeps the constructor from looking for credentials, requests are mocked by the tests
+    monkeypatch.setenv("DAPLA_REGION", "CLOUD_RUN")
+    monkeypatch.delenv(LISTING_TTL_ENV, raising=False)
+    return GCSFileSystem(token="anon", skip_instance_cache=True)
+
+
+def version(name: str, generation: str, created: int, **kwargs: Any) -> dict[str, Any]:
+    return {
+        "name": name,
+        "generation": generation,
+        "timeCreated": f"2024-01-0{created}T00:00:00.000Z",
+        "size": "1",
+        **kwargs,
+    }
+
+
+class FakeVersionsEndpoint:
+    """Answers bucket, listing and restore requests, listing versions one per page."""
+
+    def __init__(self, versioned: bool, items: list[dict[str, Any]]) -> None:
+        """Set the versions in the bucket."""
+        self.versioned = versioned
+        self.items = items
+        self.requests: list[tuple[str, str, dict[str, Any]]] = []
+
+    async def __call__(self, method: str, path: str, *args: str, **kwargs: Any) -> Any:
+        self.requests.append((method, path, kwargs))
+        if path == "b/{}":
+            return {"versioning": {"enabled": self.versioned}}
+        if path == "b/{}/o":
+            soft_deleted = kwargs.get("softDeleted") == "true"
+            items = [
+                item
+                for item in self.items
+                if self.versioned or ("softDeleteTime" in item) == soft_deleted
+            ]
+            index = int(kwargs["pageToken"] or 0)
+            out: dict[str, Any] = {"items": items[index : index + 1]}
+            if index + 1 < len(items):
+                out["nextPageToken"] = str(index + 1)
+            return out
+        if path.endswith("rewriteTo/b/{}/o/{}"):
+            return {
+                "done": True,
+                "totalBytesRewritten": 1,
+                "resource": {"name": args[3]},
+            }
+        if path.endswith("restore"):
+            return {"name": args[1], "generation": "9"}
+        return None
@@ -0,0 +1,166 @@
+import io
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import patch
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.json
+import pytest
+from fsspec.implementations.memory import MemoryFileSystem
+
+from dapla import FileClient
+from dapla import arrow
+from dapla import backends
+from dapla import read_pandas
+
+CSV = b"id;name;score\n1;a;0.5\n2;b;1.5\n3;c;\n"
+NDJSON = b"".join(
+    b'{"id": %d, "name": "%s", "tags": ["t"]}\n' % (i, name)
+    for i, name in enumerate([b"a", b"b", b"c", b"d", b"e"])
+)
+
+
+@pytest.fixture
+def memory(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setenv(backends.BACKEND_ENV, "memory://")
+    yield
+    MemoryFileSystem.store.clear()
+    MemoryFileSystem.pseudo_dirs[:] = [""]
+
+
+def test_read_csv_is_arrow_backed() -> None:
+    df = arrow.read_csv(io.BytesIO(CSV), sep=";", block_size=16)
+
+    assert list(df.columns) == ["id", "name", "score"]
+    assert all(isinstance(dtype, pd.ArrowDtype) for dtype in df.dtypes)
+    assert df["id"].tolist() == [1, 2, 3]
+    assert df["score"].isna().tolist() == [False, False, True]
+
+
+def test_read_csv_projects_columns() -> None:
+    df = arrow.read_csv(io.BytesIO(CSV), columns=["score", "id"], sep=";")
+
+    assert list(df.columns) == ["score", "id"]
+
+
+@pytest.mark.usefixtures("memory")
+def test_load_csv_to_pandas_with_arrow_engine() -> None:
+    FileClient.save_pandas_to_csv(
+        pd.read_csv(io.BytesIO(CSV), sep=";"), "bucket/data.csv.gz", index=False
+    )
+
+    df = FileClient.load_csv_to_pandas(
+        "bucket/data.csv.gz", engine="arrow", usecols=["name"]
+    )
+    default = FileClient.load_csv_to_pandas("bucket/data.csv.gz")
+
+    assert df["name"].tolist() == ["a", "b", "c"]
+    assert isinstance(df["name"].dtype, pd.ArrowDtype)
+    assert not isinstance(default["name"].dtype, pd.ArrowDtype)
+
+
+@pytest.mark.usefixtures("memory")
+def test_read_pandas_with_arrow_engine() -> None:
+    MemoryFileSystem().pipe("/bucket/data.csv", CSV)
+
+    with pytest.warns(DeprecationWarning):
+        df = read_pandas(
+            "bucket/data.csv",
+            file_format="csv",
+            columns=["id", "score"],
+            engine="arrow",
+            sep=";",
+        )
+
+    assert list(df.columns) == ["id", "score"]
+    assert isinstance(df["id"].dtype, pd.ArrowDtype)
+
+
+@pytest.mark.parametrize(
+    "file_format, data, options",
+    [("csv", CSV, {"sep": ";"}), ("json", NDJSON, {})],
+)
+def test_read_pandas_streams_gcs_files_into_arrow(
+    monkeypatch: pytest.MonkeyPatch,
+    file_format: str,
+    data: bytes,
+    options: dict[str, Any],
+) -> None:
+    monkeypatch.delenv(backends.BACKEND_ENV, raising=False)
+    MemoryFileSystem().pipe(f"/bucket/data.{file_format}", data)
+    memory = backends.filesystem("memory://")
+
+    with (
+        patch.object(FileClient, "get_file_system", return_value=memory),
+        patch(f"dapla.pandas.read_{file_format}") as mock_read,
+        pytest.warns(DeprecationWarning),
+    ):
+        df = read_pandas(
+            f"gs://bucket/data.{file_format}",
+            file_format=file_format,
+            columns=["name"],
+            engine="arrow",
+            **options,
+        )
+
+    mock_read.assert_not_called()
+    assert df["name"].tolist()[:3] == ["a", "b", "c"]
+    MemoryFileSystem.store.clear()
+
+
+def test_read_json_with_schema() -> None:
+    fields: dict[str, pa.DataType] = {"name": pa.string(), "id": pa.int8()}
+    schema = pa.schema(fields)
+
+    df = arrow.read_json(io.BytesIO(NDJSON), schema=schema)
+    inferred = arrow.read_json(io.BytesIO(NDJSON), columns=["tags", "id"])
+
+    assert list(df.columns) == ["name", "id"]
+    assert df["id"].dtype == pd.ArrowDtype(pa.int8())
+    assert list(inferred.columns) == ["tags", "id"]
+    assert inferred["id"].dtype == pd.ArrowDtype(pa.int64())
+
+
+@pytest.mark.parametrize("streaming_reader", [True, False])
+def test_iter_json_reads_one_block_at_a_time(
+    monkeypatch: pytest.MonkeyPatch, streaming_reader: bool
+) -> None:
+    if not streaming_reader:
+        # pyarrow before 19 has no pyarrow.json.open_json
+        monkeypatch.delattr(pyarrow.json, "open_json")
+
+    batches = list(arrow.iter_json(io.BytesIO(NDJSON), columns=["id"], block_size=64))
+
+    assert len(batches) > 1
+    assert all(list(batch.columns) == ["id"] for batch in batches)
+    assert pd.concat(batches)["id"].tolist() == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.usefixtures("memory")
+def test_file_client_streams_ndjson() -> None:
+    MemoryFileSystem().pipe(
+        "/bucket/data.ndjson.zst", pa.compress(NDJSON, "zstd", asbytes=True)
+    )
+
+    batches = list(
+        FileClient.iter_json_batches(
+            "bucket/data.ndjson.zst",
+            schema=pa.schema([("name", pa.string())]),
+            block_size=64,
+        )
+    )
+    df = FileClient.load_json_to_pandas("bucket/data.ndjson.zst", engine="arrow")
+
+    assert pd.concat(batches)["name"].tolist() == ["a", "b", "c", "d", "e"]
+    assert df["tags"].tolist()[0] == ["t"]
+    with pytest.raises(ValueError, match="newline-delimited"):
+        FileClient.load_json_to_pandas(
+            "bucket/data.ndjson.zst", engine="arrow", lines=False
+        )
+
+
+@pytest.mark.usefixtures("memory")
+def test_other_compression_cannot_be_streamed() -> None:
+    with pytest.raises(ValueError, match="Only gzip and zstd"):
+        FileClient.load_csv_to_pandas("bucket/data.csv.bz2", engine="arrow")
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+from collections.abc import Iterator
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from dapla import AsyncFileClient
+from dapla.gcs import GCSFileSystem
+from dapla.gcs import GCSFileSystemPool
+from tests.conftest import FakeVersionsEndpoint
+from tests.conftest import MemoryAsyncFileSystem
+from tests.conftest import version
+
+
+@pytest.fixture
+def fs(memory_fs: MemoryAsyncFileSystem) -> Iterator[MemoryAsyncFileSystem]:
+    memory_fs.pipe({f"/bucket/data/{i}.csv": f"n\n{i}\n".encode() for i in range(50)})
+
+    async def get_async(**kwargs: object) -> MemoryAsyncFileSystem:
+        return memory_fs
+
+    with patch.object(GCSFileSystemPool, "get_async", get_async):
+        yield memory_fs
+
+
+def test_fan_out_with_gather(fs: MemoryAsyncFileSystem) -> None:
+    async def main() -> list[pd.DataFrame]:
+        paths = await AsyncFileClient.ls("/bucket/data")
+        return await asyncio.gather(
+            *(AsyncFileClient.load_csv_to_pandas(path) for path in paths)
+        )
+
+    frames = asyncio.run(main())
+
+    assert sorted(int(df["n"][0]) for df in frames) == list(range(50))
+
+
+def test_save_and_open(fs: MemoryAsyncFileSystem) -> None:
+    async def main() -> tuple[str, bytes, bytes]:
+        df = pd.DataFrame({"n": [1, 2]})
+        await AsyncFileClient.save_pandas_to_json(df, "/bucket/out/df.json")
+        async with await AsyncFileClient.gcs_open("/bucket/out/raw.bin", "wb") as f:
+            await f.write(b"0123456789")
+        f = await AsyncFileClient.gcs_open("/bucket/out/raw.bin")
+        head = await f.read(4)
+        f.seek(-2, 2)
+        tail = await f.read()
+        await f.close()
+        return await AsyncFileClient.cat("/bucket/out/df.json"), head, tail
+
+    text, head, tail = asyncio.run(main())
+
+    assert text == '{"n":{"0":1,"1":2}}'
+    assert (head, tail) == (b"0123", b"89")
+
+
+def test_get_versions(gcs_fs: GCSFileSystem) -> None:
+    items = [version("a.csv", "1", 1), version("a.csv", "2", 2)]
+    gcs_fs._call = FakeVersionsEndpoint(True, items)  # type: ignore [method-assign]
+
+    async def get_async(**kwargs: object) -> GCSFileSystem:
+        return gcs_fs
+
+    with patch.object(GCSFileSystemPool, "get_async", get_async):
+        versions = asyncio.run(AsyncFileClient.get_versions("bucket", "a.csv"))
+
+    assert [(v["name"], v["generation"]) for v in versions] == [
+        ("bucket/a.csv", "1"),
+        ("bucket/a.csv", "2"),
+    ]
+
+
+def test_pool_shares_instance_per_event_loop(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("DAPLA_REGION", "CLOUD_RUN")
+
+    async def main() -> tuple[GCSFileSystem, GCSFileSystem]:
+        return await asyncio.gather(
+            GCSFileSystemPool.get_async(token="anon"),
+            GCSFileSystemPool.get_async(token="anon"),
+        )
+
+    first, second = asyncio.run(main())
+    other = asyncio.run(GCSFileSystemPool.get_async(token="anon"))
+
+    assert first is second
+    assert first.asynchronous
+    assert other is not first
+
+
+def test_writes_drop_stale_listings_of_async_instances(
+    fs: MemoryAsyncFileSystem,
+) -> None:
+    other = MagicMock()
+
+    async def main() -> None:
+        await AsyncFileClient.save_pandas_to_json(
+            pd.DataFrame({"n": [1]}), "/bucket/data/new.json"
+        )
+
+    with (
+        patch.object(GCSFileSystemPool, "async_instances", return_value=[other]),
+        patch.object(fs, "invalidate_cache") as invalidate_cache,
+    ):
+        asyncio.run(main())
+
+    invalidate_cache.assert_called_once_with("/bucket/data/new.json")
+    other.invalidate_cache.assert_called_once_with("/bucket/data/new.json")
+
+
+@patch("dapla.gcs.GCSFileSystem")
+def test_pool_refreshes_credentials_off_the_event_loop(mock_fs: MagicMock) -> None:
+    threads: list[threading.Thread] = []
+
+    def create(**kwargs: object) -> MagicMock:
+        threads.append(threading.current_thread())
+        fs = MagicMock()
+        fs._set_session = AsyncMock()
+        fs.credentials.credentials.expired = True
+        fs.credentials.maybe_refresh.side_effect = lambda: threads.append(
+            threading.current_thread()
+        )
+        return fs
+
+    mock_fs.side_effect = create
+
+    async def main() -> None:
+        await GCSFileSystemPool.get_async()
+        await GCSFileSystemPool.get_async()
+
+    asyncio.run(main())
+
+    assert len(threads) == 3
+    assert threading.main_thread() not in threads
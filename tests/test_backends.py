@@ -0,0 +1,128 @@
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from fsspec.implementations.memory import MemoryFileSystem
+
+from dapla import FileClient
+from dapla import backends
+from dapla import read_pandas
+from dapla import show
+from dapla import write_pandas
+
+DF = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+
+
+@pytest.fixture
+def memory(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setenv(backends.BACKEND_ENV, "memory://")
+    yield
+    MemoryFileSystem.store.clear()
+    MemoryFileSystem.pseudo_dirs[:] = [""]
+
+
+def test_paths_go_to_gcs_by_default(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(backends.BACKEND_ENV, raising=False)
+
+    assert backends.is_gcs("bucket/file.csv")
+    assert backends.is_gcs("gs://bucket/file.csv")
+    assert not backends.is_gcs("memory://bucket/file.csv")
+    assert backends.backend_for("file:///tmp/file.csv") == "file:///"
+
+
+@pytest.mark.usefixtures("memory")
+def test_file_client_runs_against_memory() -> None:
+    FileClient.save_pandas_to_csv(DF, "bucket/data/a.csv", index=False)
+    with FileClient.gcs_open("gs://bucket/data/b.txt", "w") as f:
+        f.write("one\ntwo\n")
+
+    assert FileClient.ls("gs://bucket/data") == [
+        "bucket/data/a.csv",
+        "bucket/data/b.txt",
+    ]
+    assert FileClient.load_csv_to_pandas("bucket/data/a.csv").equals(DF)
+    assert list(FileClient.iter_lines("bucket/data/b.txt")) == ["one", "two"]
+    assert FileClient.cat_many(["bucket/data/b.txt"]) == {
+        "bucket/data/b.txt": "one\ntwo\n"
+    }
+    assert show("gs://bucket") == ["/data"]
+
+
+@pytest.mark.usefixtures("memory")
+def test_bulk_operations_without_gcs_requests() -> None:
+    MemoryFileSystem().pipe({"/bucket/src/a": b"1", "/bucket/src/b": b"22"})
+
+    moved = FileClient.move_tree("bucket/src", "bucket/dst")
+
+    assert moved == {"bucket/src/a": "bucket/dst/a", "bucket/src/b": "bucket/dst/b"}
+    assert FileClient.info_many(["bucket/dst/b"])["bucket/dst/b"]["size"] == 2
+    assert FileClient.rm_many(["bucket/dst/a"]) == {"bucket/dst/a": None}
+    assert FileClient.ls("bucket/dst") == ["bucket/dst/b"]
+
+
+def test_bulk_operations_use_the_backend_of_their_paths(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.delenv(backends.BACKEND_ENV, raising=False)
+    MemoryFileSystem().pipe("/bucket/a.txt", b"1")
+
+    with patch.object(FileClient, "get_gcs_file_system") as mock_gcs:
+        assert FileClient.cat_many(["memory://bucket/a.txt"]) == {
+            "memory://bucket/a.txt": "1"
+        }
+        with pytest.raises(ValueError, match="same storage backend"):
+            FileClient.rm_many(["memory://bucket/a.txt", "gs://bucket/a.txt"])
+
+    mock_gcs.assert_not_called()
+    MemoryFileSystem.store.clear()
+
+
+def test_default_backend_on_local_disk(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setenv(backends.BACKEND_ENV, f"file://{tmp_path}")
+
+    with pytest.warns(DeprecationWarning):
+        write_pandas(DF, "gs://bucket/data/part.parquet")
+        write_pandas(DF, "bucket/data/table.json", file_format="json")
+    with pytest.warns(DeprecationWarning):
+        parquet = read_pandas("bucket/data/part.parquet")
+        json = read_pandas("gs://bucket/data/table.json", file_format="json")
+
+    assert (tmp_path / "bucket" / "data" / "part.parquet").is_file()
+    assert isinstance(parquet, pd.DataFrame) and parquet.equals(DF)
+    assert isinstance(json, pd.DataFrame) and json.equals(DF)
+
+
+@patch("dapla.files.FileClient.get_gcs_file_system")
+def test_uri_selects_backend(mock_get_fs: Mock, tmp_path: Path) -> None:
+    path = tmp_path / "file.csv"
+    DF.to_csv(path, index=False)
+
+    assert FileClient.load_csv_to_pandas(f"file://{path}").equals(DF)
+    assert FileClient.cat(path.as_uri()) == path.read_text()
+    mock_get_fs.assert_not_called()
+
+
+def test_register_backend(monkeypatch: pytest.MonkeyPatch) -> None:
+    fs = MemoryFileSystem()
+    calls: list[tuple[str, dict[str, Any]]] = []
+
+    def factory(root: str, **kwargs: Any) -> MemoryFileSystem:
+        calls.append((root, kwargs))
+        return fs
+
+    monkeypatch.setenv(backends.BACKEND_ENV, "test://root")
+    backends.register_backend("test", factory)
+    try:
+        assert FileClient.get_file_system("gs://bucket/a", anon=True) is fs
+    finally:
+        del backends._factories["test"]
+
+    assert calls == [("root", {"anon": True})]
+    with pytest.raises(ValueError, match="No storage backend registered"):
+        backends.filesystem("s3://")
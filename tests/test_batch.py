@@ -0,0 +1,113 @@
+import email.parser
+import json
+import typing as t
+from email.message import Message
+
+import pytest
+
+from dapla.batch import info_many
+from dapla.batch import rm_many
+from dapla.gcs import GCSFileSystem
+
+
+class FakeBatchEndpoint:
+    """Answers GCS batch requests from an in-memory bucket, throttling some objects once."""
+
+    def __init__(self, names: list[str], throttled: tuple[str, ...] = ()) -> None:
+        """Store the objects of the bucket and the names to answer with 429 the first time."""
+        self.objects = {name: {"name": name, "size": "3"} for name in names}
+        self.throttled = set(throttled)
+        self.batch_sizes: list[int] = []
+
+    async def __call__(
+        self, method: str, path: str, headers: dict[str, str], data: bytes
+    ) -> tuple[dict[str, str], bytes]:
+        message = email.parser.BytesParser().parsebytes(
+            f"Content-Type: {headers['Content-Type']}\r\n\r\n".encode() + data
+        )
+        parts = t.cast(list[Message], message.get_payload())
+        self.batch_sizes.append(len(parts))
+        response = b""
+        for part in parts:
+            content_id = part["Content-ID"].strip("<>")
+            verb, url, _ = str(part.get_payload()).split(maxsplit=2)
+            # Any version of an object is deleted along with the object
+            name = url.rsplit("/o/", 1)[1].split("?")[0]
+            status, body = self._answer(verb, name)
+            response += (
+                "--resp\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n\r\n"
+                f"{body}\r\n"
+            ).encode()
+        return {
+            "Content-Type": "multipart/mixed; boundary=resp"
+        }, response + b"--resp--"
+
+    def _answer(self, verb: str, name: str) -> tuple[int, str]:
+        if name in self.throttled:
+            self.throttled.remove(name)
+            return 429, json.dumps({"error": {"message": "Slow down"}})
+        if name not in self.objects:
+            return 404, json.dumps({"error": {"message": "Not Found"}})
+        if verb == "DELETE":
+            del self.objects[name]
+            return 204, ""
+        return 200, json.dumps(self.objects[name])
+
+
+def test_info_many_packs_100_lookups_per_request(gcs_fs: GCSFileSystem) -> None:
+    names = [f"f{i}.csv" for i in range(250)]
+    endpoint = FakeBatchEndpoint(names)
+    gcs_fs._call = endpoint  # type: ignore [method-assign]
+
+    result = info_many(gcs_fs, [f"gs://bucket/{n}" for n in [*names, "missing.csv"]])
+
+    assert sorted(endpoint.batch_sizes) == [51, 100, 100]
+    info = result["gs://bucket/f7.csv"]
+    assert isinstance(info, dict)
+    assert info["name"] == "bucket/f7.csv"
+    assert info["size"] == 3
+    assert isinstance(result["gs://bucket/missing.csv"], FileNotFoundError)
+
+
+def test_rm_many_retries_throttled_deletes(
+    gcs_fs: GCSFileSystem, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    endpoint = FakeBatchEndpoint(["a.csv", "b.csv"], throttled=("b.csv",))
+    gcs_fs._call = endpoint  # type: ignore [method-assign]
+    monkeypatch.setattr("dapla.batch._RETRY_DELAY", 0.0)
+    gcs_fs.dircache["bucket"] = [
+        {"name": "bucket/a.csv", "type": "file"},
+        {"name": "bucket/b.csv", "type": "file"},
+        {"name": "bucket/c.csv", "type": "file"},
+    ]
+
+    result = rm_many(gcs_fs, ["bucket/a.csv", "bucket/b.csv", "bucket/gone.csv"])
+
+    assert result["bucket/a.csv"] is None
+    assert result["bucket/b.csv"] is None
+    assert isinstance(result["bucket/gone.csv"], FileNotFoundError)
+    assert endpoint.batch_sizes == [3, 1]
+    assert endpoint.objects == {}
+    assert [e["name"] for e in gcs_fs.dircache["bucket"]] == ["bucket/c.csv"]
+
+
+def test_rm_many_of_a_version_updates_listings_only_if_it_was_live(
+    gcs_fs: GCSFileSystem,
+) -> None:
+    endpoint = FakeBatchEndpoint(["a.csv", "b.csv"])
+    gcs_fs._call = endpoint  # type: ignore [method-assign]
+    listing = [
+        {"name": "bucket/a.csv", "type": "file", "generation": "2"},
+        {"name": "bucket/b.csv", "type": "file", "generation": "2"},
+    ]
+    gcs_fs.dircache["bucket"] = listing
+
+    rm_many(gcs_fs, ["bucket/a.csv#1"])
+    assert gcs_fs.dircache["bucket"] is listing
+    assert len(listing) == 2
+
+    rm_many(gcs_fs, ["gs://bucket/b.csv#2"])
+    assert "bucket" not in gcs_fs.dircache
+    assert not endpoint.objects
@@ -0,0 +1,36 @@
+import os
+
+from benchmarks.fake_gcs import FakeGCSServer
+from benchmarks.run import BUCKET
+from benchmarks.run import WORKLOADS
+from benchmarks.run import _pointed_at
+from benchmarks.run import compare
+from benchmarks.run import run_suite
+
+from dapla import FileClient
+
+
+def test_fake_server_round_trips_uploads() -> None:
+    small, large = b"small", os.urandom(2**20 + 5)
+    with FakeGCSServer() as server, _pointed_at(server):
+        fs = FileClient.get_gcs_file_system()
+        fs.pipe(f"{BUCKET}/a/small.bin", small)
+        with fs.open(f"{BUCKET}/a/large.bin", "wb", block_size=2**18) as f:
+            f.write(large)
+
+        assert fs.cat(f"{BUCKET}/a/large.bin") == large
+        assert fs.cat_file(f"{BUCKET}/a/small.bin", start=1, end=3) == b"ma"
+        assert fs.ls(BUCKET) == [f"{BUCKET}/a"]
+        assert sorted(fs.find(BUCKET)) == [
+            f"{BUCKET}/a/large.bin",
+            f"{BUCKET}/a/small.bin",
+        ]
+
+
+def test_suite_runs_every_workload() -> None:
+    results = run_suite(scale=0.001, repeat=1)
+
+    benchmarks = results["benchmarks"]
+    assert {result["workload"] for result in benchmarks.values()} == set(WORKLOADS)
+    assert all(result["requests"] > 0 for result in benchmarks.values())
+    assert "parquet.read_pandas_filtered" in compare(results, results)
@@ -11,10 +11,10 @@ collector_test_url_stop = "https://mock-collector.no/tasks/1234"
 fake_token = "123456789"
 
 
-@mock.patch("dapla.collector.AuthClient")
+@mock.patch("dapla.collector.CredentialCache")
 @responses.activate
-def test_initiate_201_response(auth_client_mock: Mock) -> None:
-    auth_client_mock.fetch_personal_token.return_value = fake_token
+def test_initiate_201_response(credential_cache_mock: Mock) -> None:
+    credential_cache_mock.fetch_personal_token.return_value = fake_token
     specification: dict[str, str] = {}
     worker_id = "abcd"
     collector_response = f"""{{
@@ -30,10 +30,10 @@ def test_initiate_201_response(auth_client_mock: Mock) -> None:
     assert len(responses.calls) == 1
 
 
-@mock.patch("dapla.collector.AuthClient")
+@mock.patch("dapla.collector.CredentialCache")
 @responses.activate
-def test_list_tasks_200_response(auth_client_mock: Mock) -> None:
-    auth_client_mock.fetch_personal_token.return_value = fake_token
+def test_list_tasks_200_response(credential_cache_mock: Mock) -> None:
+    credential_cache_mock.fetch_personal_token.return_value = fake_token
     collector_response: dict[str, str] = {}
     responses.add(
         responses.GET, collector_test_url, json=collector_response, status=200
@@ -44,10 +44,10 @@ def test_list_tasks_200_response(auth_client_mock: Mock) -> None:
     assert len(responses.calls) == 1
 
 
-@mock.patch("dapla.collector.AuthClient")
+@mock.patch("dapla.collector.CredentialCache")
 @responses.activate
-def test_stop_task_200_response(auth_client_mock: Mock) -> None:
-    auth_client_mock.fetch_personal_token.return_value = fake_token
+def test_stop_task_200_response(credential_cache_mock: Mock) -> None:
+    credential_cache_mock.fetch_personal_token.return_value = fake_token
     collector_response: dict[str, str] = {}
     responses.add(
         responses.DELETE, collector_test_url_stop, json=collector_response, status=200
@@ -0,0 +1,78 @@
+import gzip
+import io
+from collections.abc import Iterator
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from fsspec.implementations.memory import MemoryFileSystem
+
+from dapla import FileClient
+from dapla import backends
+from dapla.compression import Codec
+from dapla.compression import codec_for
+from dapla.compression import open_compressed
+from dapla.gcs import GCSFileSystem
+
+DF = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+
+
+@pytest.fixture
+def memory(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setenv(backends.BACKEND_ENV, "memory://")
+    yield
+    MemoryFileSystem.store.clear()
+    MemoryFileSystem.pseudo_dirs[:] = [""]
+
+
+def stored(path: str) -> bytes:
+    return bytes(MemoryFileSystem.store[f"/{path}"].getvalue())
+
+
+def test_codec_for() -> None:
+    assert codec_for("bucket/data.csv.gz") == "gzip"
+    assert codec_for("bucket/data.json.ZST") == "zstd"
+    assert codec_for("bucket/data.csv") is None
+    assert codec_for("bucket/data.csv", "gzip") == "gzip"
+    assert codec_for("bucket/data.csv.gz", None) is None
+    assert codec_for("bucket/data.csv.bz2") is None
+
+
+@pytest.mark.usefixtures("memory")
+def test_pandas_helpers_round_trip_compressed_files() -> None:
+    FileClient.save_pandas_to_csv(DF, "bucket/data.csv.gz", index=False)
+    FileClient.save_pandas_to_json(DF, "bucket/data.json.zst")
+    FileClient.save_pandas_to_xml(DF, "bucket/data.xml", compression="gzip")
+
+    assert gzip.decompress(stored("bucket/data.csv.gz")) == b"a,b\n1,x\n2,y\n"
+    assert stored("bucket/data.json.zst").startswith(b"\x28\xb5\x2f\xfd")
+    assert FileClient.load_csv_to_pandas("bucket/data.csv.gz").equals(DF)
+    assert FileClient.load_json_to_pandas("bucket/data.json.zst").equals(DF)
+    assert FileClient.load_xml_to_pandas("bucket/data.xml", compression="gzip")[
+        ["a", "b"]
+    ].equals(DF)
+
+
+@pytest.mark.usefixtures("memory")
+def test_other_compression_is_left_to_pandas() -> None:
+    FileClient.save_pandas_to_csv(DF, "bucket/data.csv.bz2", index=False)
+
+    assert stored("bucket/data.csv.bz2").startswith(b"BZh")
+    assert FileClient.load_csv_to_pandas("bucket/data.csv.bz2").equals(DF)
+
+
+@pytest.mark.parametrize("codec", ["gzip", "zstd"])
+def test_compressed_files_are_stored_as_is(gcs_fs: GCSFileSystem, codec: Codec) -> None:
+    buffer = io.BytesIO()
+    buffer.close = MagicMock()  # type: ignore [method-assign]
+    with patch.object(gcs_fs, "open", return_value=buffer) as mock_open:
+        with open_compressed(gcs_fs, "gs://bucket/data.csv", codec) as f:
+            f.write(b"a,b\n")
+
+    mock_open.assert_called_once_with(
+        "gs://bucket/data.csv", "wb", content_type=f"application/{codec}"
+    )
+    with pa.CompressedInputStream(pa.BufferReader(buffer.getvalue()), codec) as stream:
+        assert stream.read() == b"a,b\n"
@@ -0,0 +1,141 @@
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+from unittest.mock import patch
+
+import jwt
+
+from dapla.credentials import RETRY_DELAY
+from dapla.credentials import CredentialCache
+
+
+def _token_expiring_in(seconds: int) -> str:
+    expiry = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(
+        seconds=seconds
+    )
+    return jwt.encode({"exp": int(expiry.timestamp())}, "secret", algorithm="HS256")
+
+
+@patch("dapla.credentials.AuthClient.fetch_google_credentials")
+def test_google_credentials_are_fetched_once(mock_fetch: Mock) -> None:
+    mock_fetch.return_value = Mock(token="token", expiry=None)
+
+    first = CredentialCache.fetch_google_credentials()
+    second = CredentialCache.fetch_google_credentials()
+
+    assert first is second
+    mock_fetch.assert_called_once()
+    assert CredentialCache.stats() == {
+        "hits": 1,
+        "misses": 1,
+        "refreshes": 0,
+        "refresh_errors": 0,
+    }
+
+
+@patch("dapla.credentials.AuthClient.fetch_personal_token")
+def test_personal_token_is_cached_until_expiry(mock_fetch: Mock) -> None:
+    token = _token_expiring_in(3600)
+    mock_fetch.return_value = token
+
+    assert CredentialCache.fetch_personal_token() == token
+    assert CredentialCache.fetch_personal_token() == token
+    mock_fetch.assert_called_once()
+
+
+@patch("dapla.credentials.AuthClient.fetch_personal_token")
+def test_expired_personal_token_is_fetched_again(mock_fetch: Mock) -> None:
+    mock_fetch.side_effect = [_token_expiring_in(-10), _token_expiring_in(3600)]
+
+    first = CredentialCache.fetch_personal_token()
+    second = CredentialCache.fetch_personal_token()
+
+    assert first != second
+    assert CredentialCache.stats()["misses"] == 2
+
+
+@patch("dapla.credentials.AuthClient.fetch_personal_token")
+def test_background_refresh_replaces_personal_token(mock_fetch: Mock) -> None:
+    old_token, new_token = _token_expiring_in(3600), _token_expiring_in(7200)
+    mock_fetch.side_effect = [old_token, new_token]
+    CredentialCache.fetch_personal_token()
+
+    timer = CredentialCache._timers["personal"]
+    timer.cancel()
+    with patch("threading.current_thread", return_value=timer):
+        CredentialCache._refresh("personal")
+
+    assert CredentialCache.fetch_personal_token() == new_token
+    assert CredentialCache.stats()["refreshes"] == 1
+    assert CredentialCache._timers["personal"] is not timer
+
+
+@patch("dapla.credentials.AuthClient.fetch_personal_token")
+def test_failed_background_refresh_keeps_token(mock_fetch: Mock) -> None:
+    token = _token_expiring_in(3600)
+    mock_fetch.side_effect = [token, RuntimeError("token exchange failed")]
+    CredentialCache.fetch_personal_token()
+
+    CredentialCache._refresh("personal")
+
+    assert CredentialCache.fetch_personal_token() == token
+    assert CredentialCache.stats()["refresh_errors"] == 1
+
+
+@patch("dapla.credentials.AuthClient.fetch_google_credentials")
+def test_expired_google_credentials_are_fetched_again(mock_fetch: Mock) -> None:
+    expired = Mock(token="old", expiry=datetime.datetime(2000, 1, 1))
+    fresh = Mock(token="new", expiry=None)
+    mock_fetch.side_effect = [expired, fresh]
+
+    CredentialCache.fetch_google_credentials()
+
+    assert CredentialCache.fetch_google_credentials() is fresh
+    assert CredentialCache.stats()["misses"] == 2
+
+
+@patch("dapla.credentials.AuthClient.fetch_google_credentials")
+def test_failed_google_refresh_is_retried(mock_fetch: Mock) -> None:
+    expiry = datetime.datetime.now() + datetime.timedelta(hours=1)
+    credentials = Mock(token="token", expiry=expiry)
+    credentials.refresh.side_effect = RuntimeError("metadata server unavailable")
+    mock_fetch.return_value = credentials
+    CredentialCache.fetch_google_credentials()
+
+    timer = CredentialCache._timers["google"]
+    timer.cancel()
+    with patch("threading.current_thread", return_value=timer):
+        CredentialCache._refresh("google")
+
+    retry = CredentialCache._timers["google"]
+    assert retry is not timer
+    assert retry.interval == RETRY_DELAY
+    assert CredentialCache.fetch_google_credentials() is credentials
+    assert CredentialCache.stats()["refresh_errors"] == 1
+
+
+@patch("dapla.credentials.AuthClient.fetch_google_credentials")
+@patch("dapla.credentials.AuthClient.fetch_personal_token")
+def test_concurrent_misses_fetch_once_outside_the_lock(
+    mock_fetch_token: Mock, mock_fetch_credentials: Mock
+) -> None:
+    started, release = threading.Event(), threading.Event()
+    token = _token_expiring_in(3600)
+
+    def slow_fetch() -> str:
+        started.set()
+        release.wait(5)
+        return token
+
+    mock_fetch_token.side_effect = slow_fetch
+    mock_fetch_credentials.return_value = Mock(token="token", expiry=None)
+    with ThreadPoolExecutor(4) as pool:
+        tokens = [pool.submit(CredentialCache.fetch_personal_token) for _ in range(4)]
+        started.wait(5)
+        # Other credentials are served while the token is being fetched
+        CredentialCache.fetch_google_credentials()
+        release.set()
+
+        assert [future.result() for future in tokens] == [token] * 4
+    mock_fetch_token.assert_called_once()
@@ -0,0 +1,122 @@
+import os
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import gcsfs
+import pytest
+
+from dapla.disk_cache import DiskCache
+from dapla.gcs import GCSFileSystem
+
+
+def _add(cache: DiskCache, name: str, content: bytes) -> None:
+    tmp_path = cache.new_entry_path()
+    Path(tmp_path).write_bytes(content)
+    cache.add("bucket", name, "1", tmp_path).close()
+
+
+def test_entries_are_keyed_by_generation(tmp_path: Path) -> None:
+    cache = DiskCache(str(tmp_path))
+    _add(cache, "data.csv", b"a,b")
+
+    with cache.open("bucket", "data.csv", "1") as f:  # type: ignore [union-attr]
+        assert f.read() == b"a,b"
+    assert cache.open("bucket", "data.csv", "2") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "bytes_stored": 3}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: Path) -> None:
+    cache = DiskCache(str(tmp_path), max_bytes=10)
+    _add(cache, "old", b"12345")
+    _add(cache, "used", b"12345")
+    os.utime(cache._path("bucket", "old", "1"), (0, 0))
+    os.utime(cache._path("bucket", "used", "1"), (1, 1))
+    cache.open("bucket", "used", "1").close()  # type: ignore [union-attr]
+
+    _add(cache, "new", b"12345")
+
+    assert cache.open("bucket", "old", "1") is None
+    assert cache.open("bucket", "used", "1") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_from_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("DAPLA_TOOLBELT_CACHE_DIR", raising=False)
+    assert DiskCache.from_env() is None
+
+    monkeypatch.setenv("DAPLA_TOOLBELT_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("DAPLA_TOOLBELT_CACHE_MAX_BYTES", "1024")
+    cache = DiskCache.from_env()
+    assert cache is not None
+    assert cache.max_bytes == 1024
+
+
+@patch("google.auth.default", return_value=(None, None))
+def test_gcs_file_system_reads_through_cache(
+    mock_auth: MagicMock, tmp_path: Path
+) -> None:
+    fs = GCSFileSystem(disk_cache=DiskCache(str(tmp_path)), skip_instance_cache=True)
+
+    async def info(path: str, **kwargs: Any) -> dict[str, Any]:
+        return {"type": "file", "size": 5, "generation": "42"}
+
+    async def download(
+        fs: GCSFileSystem, path: str, lpath: str, info: dict[str, Any]
+    ) -> str:
+        Path(lpath).write_bytes(b"hello")
+        return lpath
+
+    with (
+        patch.object(fs, "_info", info),
+        patch("dapla.gcs.download", side_effect=download) as mock_download,
+    ):
+        assert fs.cat_file("bucket/greeting.txt") == b"hello"
+        with fs.open("bucket/greeting.txt", "rb") as f:
+            assert f.read() == b"hello"
+        fs.dircache["bucket"] = [
+            {"name": "bucket/greeting.txt", "type": "file", "generation": "42"}
+        ]
+        assert fs.cat_file("bucket/greeting.txt", start=1, end=-1) == b"ell"
+
+    mock_download.assert_called_once()
+    assert fs.disk_cache is not None
+    assert fs.disk_cache.stats()["hits"] == 2
+
+
+@patch("google.auth.default", return_value=(None, None))
+def test_ranged_reads_do_not_fill_the_cache(
+    mock_auth: MagicMock, tmp_path: Path
+) -> None:
+    fs = GCSFileSystem(disk_cache=DiskCache(str(tmp_path)), skip_instance_cache=True)
+
+    with (
+        patch.object(fs, "_info") as mock_info,
+        patch("dapla.gcs.download") as mock_download,
+        patch.object(
+            gcsfs.GCSFileSystem, "_cat_file", AsyncMock(return_value=b"ell")
+        ) as mock_cat_file,
+    ):
+        assert fs.cat_file("bucket/greeting.txt", start=1, end=4) == b"ell"
+
+    mock_cat_file.assert_awaited_once()
+    mock_info.assert_not_called()
+    mock_download.assert_not_called()
+
+
+def test_downloads_in_progress_are_not_evicted(tmp_path: Path) -> None:
+    cache = DiskCache(str(tmp_path), max_bytes=10)
+    in_progress = Path(f"{cache.new_entry_path()}.{'0' * 32}.part")
+    in_progress.write_bytes(b"0" * 100)
+    crashed = Path(f"{cache.new_entry_path()}.{'1' * 32}.part")
+    crashed.write_bytes(b"0" * 100)
+    os.utime(crashed, (0, 0))
+
+    _add(cache, "data.csv", b"12345")
+
+    assert in_progress.exists()
+    assert not crashed.exists()
+    assert cache.open("bucket", "data.csv", "1") is not None
+    assert cache.stats()["evictions"] == 0
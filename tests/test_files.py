@@ -1,11 +1,16 @@
 # Test for FileClient class
+import datetime
 import unittest
+from unittest.mock import MagicMock
 from unittest.mock import Mock
 from unittest.mock import patch
 
 import google
+import pytest
 
 from dapla import FileClient
+from dapla import metrics
+from tests.conftest import MemoryAsyncFileSystem
 
 PATH_WITH_PREFIX = "gs://bucket/path"
 PATH_WITHOUT_PREFIX = "bucket/path"
@@ -314,6 +319,93 @@ class TestFiles(unittest.TestCase):
             source_generation=source_generation_id,
         )
 
+    @pytest.fixture(autouse=True)
+    def _memory_fs(self, memory_fs: MemoryAsyncFileSystem) -> None:
+        self.memory_fs = memory_fs
+
+    @patch("dapla.files.FileClient.get_gcs_file_system")
+    def test_cat_many_decodes_content(self, mock_get_fs: Mock) -> None:
+        self.memory_fs.pipe(
+            {"/bucket/cat_many/a.csv": b"a,b", "/bucket/cat_many/b.csv": b"c"}
+        )
+        mock_get_fs.return_value = self.memory_fs
+
+        result = FileClient.cat_many(
+            ["/bucket/cat_many/a.csv", "/bucket/cat_many/b.csv"]
+        )
+
+        assert result == {
+            "/bucket/cat_many/a.csv": "a,b",
+            "/bucket/cat_many/b.csv": "c",
+        }
+
+    @patch("google.cloud.storage.Client")
+    def test_iter_versions_filters_and_keeps_latest(self, mock_client: Mock) -> None:
+        mock_bucket = Mock(versioning_enabled=True)
+        mock_client.return_value.get_bucket.return_value = mock_bucket
+        created = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        blobs = []
+        for name in ["a.csv", "b.csv"]:
+            for generation in range(1, 5):
+                blob = Mock(
+                    generation=generation,
+                    time_created=created + datetime.timedelta(days=generation),
+                )
+                blob.name = name
+                blobs.append(blob)
+        mock_bucket.list_blobs.return_value = MagicMock(
+            pages=iter([blobs[:5], blobs[5:]])
+        )
+        metrics.enable()
+
+        versions = FileClient.iter_versions(
+            "test-bucket",
+            "folder/",
+            end_time=created + datetime.timedelta(days=4),
+            min_generation=2,
+            latest=1,
+        )
+
+        assert [(v.name, v.generation) for v in versions] == [
+            ("a.csv", 3),
+            ("b.csv", 3),
+        ]
+        assert metrics.snapshot()["list"].requests == 4
+        mock_bucket.list_blobs.assert_called_with(
+            prefix="folder/", versions=True, page_size=1000
+        )
+        FileClient.get_versions("test-bucket", "folder/")
+        mock_client.assert_called_once()
+
+
+@patch("dapla.files.FileClient.get_gcs_file_system")
+def test_iter_lines_streams_text(
+    mock_get_fs: Mock, memory_fs: MemoryAsyncFileSystem
+) -> None:
+    memory_fs.pipe_file("/bucket/iter_lines/a.csv", b"a,b\n1,2\n")
+    mock_get_fs.return_value = memory_fs
+
+    lines = FileClient.iter_lines("/bucket/iter_lines/a.csv", chunk_size=2)
+
+    assert list(lines) == ["a,b", "1,2"]
+
+
+@patch("google.cloud.storage.Client")
+def test_missing_bucket_is_logged_not_printed(
+    mock_client: Mock,
+    caplog: pytest.LogCaptureFixture,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    mock_client.return_value.get_bucket.side_effect = (
+        google.api_core.exceptions.NotFound("missing")
+    )
+
+    assert FileClient.get_versions("missing-bucket", "folder/") == []
+    assert list(FileClient.iter_versions("missing-bucket", "folder/")) == []
+
+    assert capsys.readouterr().out == ""
+    assert caplog.messages == ['Bucket "missing-bucket" does not exist'] * 2
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,8 +1,11 @@
 import os
+from unittest.mock import AsyncMock
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
 from dapla.gcs import GCSFileSystem
+from dapla.gcs import GCSFileSystemPool
+from dapla.gcs import StorageClientPool
 
 
 @patch("google.auth.default", return_value=(None, None))
@@ -36,3 +39,153 @@ def test_init_with_custom_region(mock_auth: MagicMock) -> None:
 def test_init_with_additional_kwargs(mock_auth: MagicMock) -> None:
     client = GCSFileSystem(project="test-project", timeout=100)
     assert client is not None
+
+
+@patch("dapla.gcs.GCSFileSystem")
+def test_pool_reuses_instance_for_same_arguments(mock_fs: MagicMock) -> None:
+    mock_fs.side_effect = lambda **kwargs: MagicMock()
+    first = GCSFileSystemPool.get(project="test-project")
+    second = GCSFileSystemPool.get(project="test-project")
+    other = GCSFileSystemPool.get(project="other-project")
+
+    assert first is second
+    assert first is not other
+    assert mock_fs.call_count == 2
+    mock_fs.assert_called_with(skip_instance_cache=True, project="other-project")
+
+
+@patch("dapla.gcs.GCSFileSystem")
+def test_pool_reset_and_fork_drop_instances(mock_fs: MagicMock) -> None:
+    mock_fs.side_effect = lambda **kwargs: MagicMock()
+    first = GCSFileSystemPool.get()
+    GCSFileSystemPool.reset()
+    second = GCSFileSystemPool.get()
+    GCSFileSystemPool._reset_after_fork()
+    third = GCSFileSystemPool.get()
+
+    assert first is not second
+    assert second is not third
+
+
+@patch("dapla.gcs.GCSFileSystem")
+def test_pool_replaces_instance_with_unrefreshable_credentials(
+    mock_fs: MagicMock,
+) -> None:
+    mock_fs.side_effect = lambda **kwargs: MagicMock()
+    first = GCSFileSystemPool.get()
+    first.credentials.credentials.expired = True
+    first.credentials.maybe_refresh.side_effect = RuntimeError("refresh failed")
+
+    second = GCSFileSystemPool.get()
+
+    assert first is not second
+
+
+@patch("dapla.gcs.GCSFileSystem")
+def test_pool_refreshes_and_creates_without_holding_the_lock(
+    mock_fs: MagicMock,
+) -> None:
+    def create(**kwargs: object) -> MagicMock:
+        assert not GCSFileSystemPool._lock.locked()
+        return MagicMock()
+
+    def refresh() -> None:
+        assert not GCSFileSystemPool._lock.locked()
+        first.credentials.credentials.expired = False
+
+    mock_fs.side_effect = create
+    first = GCSFileSystemPool.get()
+    first.credentials.credentials.expired = True
+    first.credentials.maybe_refresh.side_effect = refresh
+
+    assert GCSFileSystemPool.get() is first
+    assert mock_fs.call_count == 1
+
+
+def _file(name: str, size: int) -> dict[str, object]:
+    return {"bucket": "bucket", "name": name, "size": size, "type": "file"}
+
+
+def test_listing_cache_defaults_to_ttl(gcs_fs: GCSFileSystem) -> None:
+    assert gcs_fs.dircache.listings_expiry_time == 60.0
+    assert gcs_fs.dircache.max_paths == 10_000
+
+
+def test_update_listing_cache_in_place(gcs_fs: GCSFileSystem) -> None:
+    gcs_fs.dircache["bucket/folder"] = [_file("bucket/folder/a.csv", 1)]
+    gcs_fs.dircache["bucket"] = [_file("bucket/other.csv", 1)]
+
+    gcs_fs.update_listing_cache(
+        "gs://bucket/folder/a.csv", _file("bucket/folder/a.csv", 2)
+    )
+    gcs_fs.update_listing_cache(
+        "bucket/folder/sub/b.csv", _file("bucket/folder/sub/b.csv", 3)
+    )
+
+    assert gcs_fs.dircache["bucket/folder"][0]["size"] == 2
+    assert [e["name"] for e in gcs_fs.dircache["bucket/folder"]] == [
+        "bucket/folder/a.csv",
+        "bucket/folder/sub",
+    ]
+    assert [e["name"] for e in gcs_fs.dircache["bucket"]] == [
+        "bucket/other.csv",
+        "bucket/folder",
+    ]
+
+
+def test_remove_from_listing_cache(gcs_fs: GCSFileSystem) -> None:
+    gcs_fs.dircache["bucket/folder"] = [
+        _file("bucket/folder/a.csv", 1),
+        _file("bucket/folder/b.csv", 1),
+    ]
+    gcs_fs.dircache["bucket"] = [{"name": "bucket/folder", "type": "directory"}]
+
+    gcs_fs.remove_from_listing_cache("bucket/folder/a.csv")
+    assert [e["name"] for e in gcs_fs.dircache["bucket/folder"]] == [
+        "bucket/folder/b.csv"
+    ]
+
+    gcs_fs.remove_from_listing_cache("bucket/folder/b.csv")
+    assert "bucket/folder" not in gcs_fs.dircache
+    assert "bucket" not in gcs_fs.dircache
+
+
+def test_isdir_lists_at_most_one_object(gcs_fs: GCSFileSystem) -> None:
+    with patch.object(
+        gcs_fs, "_call", AsyncMock(return_value={"items": [{"name": "big/a"}]})
+    ) as call:
+        assert gcs_fs.isdir("gs://bucket/big/")
+    call.assert_awaited_once_with(
+        "GET", "b/{}/o", "bucket", json_out=True, prefix="big/", maxResults=1
+    )
+
+    with patch.object(gcs_fs, "_call", AsyncMock(return_value={})):
+        assert not gcs_fs.isdir("bucket/missing")
+
+
+def test_isdir_and_exists_use_listing_cache(gcs_fs: GCSFileSystem) -> None:
+    gcs_fs.dircache["bucket/folder"] = [
+        _file("bucket/folder/a.csv", 1),
+        {"name": "bucket/folder/sub", "type": "directory"},
+    ]
+
+    with patch.object(gcs_fs, "_call", AsyncMock()) as call:
+        assert gcs_fs.isdir("bucket/folder")
+        assert gcs_fs.isdir("bucket/folder/sub")
+        assert not gcs_fs.isdir("bucket/folder/a.csv")
+        assert not gcs_fs.isdir("bucket/folder/missing")
+        assert gcs_fs.exists("bucket/folder/a.csv")
+        assert not gcs_fs.exists("bucket/folder/missing")
+    call.assert_not_awaited()
+
+
+@patch("google.cloud.storage.Client")
+def test_storage_client_pool_reuses_client(mock_client: MagicMock) -> None:
+    first = StorageClientPool.get()
+    second = StorageClientPool.get()
+    StorageClientPool.reset()
+    third = StorageClientPool.get()
+
+    assert first is second
+    assert mock_client.call_count == 2
+    assert third is mock_client.return_value
@@ -0,0 +1,93 @@
+from typing import Any
+from unittest.mock import patch
+
+import gcsfs
+import pytest
+from fsspec.asyn import sync
+
+from dapla import metrics
+from dapla.gcs import GCSFileSystem
+
+
+def test_nothing_is_recorded_while_disabled() -> None:
+    metrics.record("read", 0.1)
+    with metrics.timed("list"):
+        pass
+
+    assert metrics.snapshot() == {}
+
+
+def test_record_and_snapshot() -> None:
+    metrics.enable()
+    metrics.record("read", 0.0015, bytes_in=10)
+    metrics.record("read", 0.003, retries=2, bytes_in=5)
+    with pytest.raises(RuntimeError), metrics.timed("copy"):
+        raise RuntimeError
+
+    stats = metrics.snapshot()
+
+    assert list(stats) == ["copy", "read"]
+    assert stats["copy"].errors == 1
+    read = stats["read"]
+    assert (read.requests, read.errors, read.retries, read.bytes_in) == (2, 0, 2, 15)
+    assert read.latency.observations == 2
+    assert read.latency.quantile(0.5) == 0.002
+    assert read.latency.quantile(1.0) == 0.004
+
+
+def test_exporters_receive_snapshots() -> None:
+    received: list[metrics.Snapshot] = []
+    metrics.enable()
+    metrics.add_exporter(received.append)
+    try:
+        metrics.record("write", 0.01, bytes_out=3)
+        metrics.export()
+    finally:
+        metrics.remove_exporter(received.append)
+
+    assert received[0]["write"].bytes_out == 3
+
+
+@pytest.mark.parametrize(
+    ("method", "path", "operation"),
+    [
+        ("GET", "b/{}/o", "list"),
+        ("GET", "b/{}/o/{}", "info"),
+        ("GET", "https://host/download/storage/v1/b/x/o/y?alt=media", "read"),
+        ("POST", "https://host/upload/storage/v1/b/x/o", "write"),
+        ("POST", "b/{}/o/{}/rewriteTo/b/{}/o/{}", "copy"),
+        ("DELETE", "b/{}/o/{}", "delete"),
+        ("GET", "b/{}", "other"),
+    ],
+)
+def test_gcs_requests_are_recorded_by_operation(
+    gcs_fs: GCSFileSystem, method: str, path: str, operation: str
+) -> None:
+    async def call(
+        self: Any, *args: Any, **kwargs: Any
+    ) -> tuple[dict[str, str], bytes]:
+        # Two HTTP attempts, as when the first one is retried
+        metrics.count_attempt()
+        metrics.count_attempt()
+        return {}, b"abc"
+
+    metrics.enable()
+    with patch.object(gcsfs.GCSFileSystem, "_call", call):
+        sync(gcs_fs.loop, gcs_fs._call, method, path, "bucket", "key", data=b"12345")
+
+    stats = metrics.snapshot()[operation]
+    assert (stats.requests, stats.retries, stats.bytes_out) == (1, 1, 5)
+    assert stats.bytes_in == (3 if operation == "read" else 0)
+
+
+def test_failed_gcs_requests_are_counted(gcs_fs: GCSFileSystem) -> None:
+    async def call(self: Any, *args: Any, **kwargs: Any) -> None:
+        raise FileNotFoundError
+
+    metrics.enable()
+    with patch.object(gcsfs.GCSFileSystem, "_call", call), pytest.raises(
+        FileNotFoundError
+    ):
+        sync(gcs_fs.loop, gcs_fs._call, "GET", "b/{}/o/{}", "bucket", "key")
+
+    assert metrics.snapshot()["info"].errors == 1
@@ -17,7 +17,7 @@ from dapla.pandas import write_pandas
 
 @mock.patch("dapla.pandas.FileClient")
 def test_read_default_format(file_client_mock: Mock) -> None:
-    file_client_mock.get_gcs_file_system.return_value = LocalFileSystem()
+    file_client_mock.get_file_system.return_value = LocalFileSystem()
     file_client_mock._remove_gcs_uri_prefix.return_value = "tests/data/fruits.parquet"
     result = read_pandas("tests/data/fruits.parquet")
     print(result.head(5))
@@ -27,7 +27,7 @@ def test_read_default_format(file_client_mock: Mock) -> None:
 
 @mock.patch("dapla.pandas.FileClient")
 def test_read_parquet_format_with_filterings(file_client_mock: Mock) -> None:
-    file_client_mock.get_gcs_file_system.return_value = LocalFileSystem()
+    file_client_mock.get_file_system.return_value = LocalFileSystem()
     file_client_mock._remove_gcs_uri_prefix.return_value = "tests/data/fruits.parquet"
     col_filter = "oranges"
     row_filter = pc.field(col_filter) == pc.scalar(7)
@@ -49,14 +49,14 @@ def test_read_parquet_format_with_filterings(file_client_mock: Mock) -> None:
 
 @mock.patch("dapla.pandas.read_csv")
 @mock.patch("dapla.pandas.FileClient")
-@mock.patch("dapla.pandas.AuthClient")
+@mock.patch("dapla.pandas.CredentialCache")
 def test_read_csv_format(
-    auth_client_mock: Mock, file_client_mock: Mock, read_csv_mock: Mock
+    credential_cache_mock: Mock, file_client_mock: Mock, read_csv_mock: Mock
 ) -> None:
     mock_google_creds = Mock(spec=Credentials)
     mock_google_creds.token = None
-    auth_client_mock.fetch_google_credentials.return_value = mock_google_creds
-    file_client_mock.get_gcs_file_system.return_value = LocalFileSystem()
+    credential_cache_mock.fetch_google_credentials.return_value = mock_google_creds
+    file_client_mock.get_file_system.return_value = LocalFileSystem()
     file_client_mock._ensure_gcs_uri_prefix.return_value = "gs://tests/data/fruits.csv"
     read_csv_mock.return_value = read_csv("tests/data/fruits.csv")
     result = read_pandas("gs://tests/data/fruits.csv", file_format="csv")
@@ -69,7 +69,7 @@ def test_read_csv_format(
 
 @mock.patch("dapla.pandas.FileClient")
 def test_read_sas7bdat_format(file_client_mock: Mock) -> None:
-    file_client_mock.get_gcs_file_system.return_value = LocalFileSystem()
+    file_client_mock.get_file_system.return_value = LocalFileSystem()
     file_client_mock._remove_gcs_uri_prefix.return_value = "tests/data/sasdata.sas7bdat"
     file_client_mock._ensure_gcs_uri_prefix.return_value = "tests/data/sasdata.sas7bdat"
     result = read_pandas(
@@ -80,16 +80,16 @@ def test_read_sas7bdat_format(file_client_mock: Mock) -> None:
 
 @mock.patch("dapla.pandas.read_excel")
 @mock.patch("dapla.pandas.FileClient")
-@mock.patch("dapla.pandas.AuthClient")
+@mock.patch("dapla.pandas.CredentialCache")
 def test_read_excel_format(
-    auth_client_mock: Mock, file_client_mock: Mock, read_excel_mock: Mock
+    credential_cache_mock: Mock, file_client_mock: Mock, read_excel_mock: Mock
 ) -> None:
     mock_google_creds = Mock(spec=Credentials)
     mock_google_creds.token = None
-    auth_client_mock.fetch_google_credentials.return_value = mock_google_creds
-    file_client_mock.get_gcs_file_system.return_value = LocalFileSystem()
+    credential_cache_mock.fetch_google_credentials.return_value = mock_google_creds
+    file_client_mock.get_file_system.return_value = LocalFileSystem()
     read_excel_mock.return_value = read_excel("tests/data/people.xlsx")
-    file_client_mock.get_gcs_file_system.return_value = LocalFileSystem()
+    file_client_mock.get_file_system.return_value = LocalFileSystem()
     file_client_mock._remove_gcs_uri_prefix.return_value = "tests/data/people.xlsx"
     file_client_mock._ensure_gcs_uri_prefix.return_value = "gs://tests/data/people.xlsx"
     result = read_pandas("gs://tests/data/people.xlsx", file_format="excel")
@@ -102,14 +102,14 @@ def test_read_excel_format(
 
 @mock.patch("dapla.pandas.DataFrame.to_excel")
 @mock.patch("dapla.pandas.FileClient")
-@mock.patch("dapla.pandas.AuthClient")
+@mock.patch("dapla.pandas.CredentialCache")
 def test_write_excel_format(
-    auth_client_mock: Mock, file_client_mock: Mock, to_excel_mock: Mock
+    credential_cache_mock: Mock, file_client_mock: Mock, to_excel_mock: Mock
 ) -> None:
     mock_google_creds = Mock(spec=Credentials)
     mock_google_creds.token = None
-    auth_client_mock.fetch_google_credentials.return_value = mock_google_creds
-    file_client_mock.get_gcs_file_system.return_value = LocalFileSystem()
+    credential_cache_mock.fetch_google_credentials.return_value = mock_google_creds
+    file_client_mock.get_file_system.return_value = LocalFileSystem()
     file_client_mock._ensure_gcs_uri_prefix.return_value = "gs://tests/output/test.xlsx"
     data = {"age": [23, 30, 77, 32]}
     df = pd.DataFrame(data, index=["June", "Robert", "Lily", "David"])
@@ -122,14 +122,14 @@ def test_write_excel_format(
 
 @mock.patch("dapla.pandas.DataFrame.to_csv")
 @mock.patch("dapla.pandas.FileClient")
-@mock.patch("dapla.pandas.AuthClient")
+@mock.patch("dapla.pandas.CredentialCache")
 def test_write_csv_format(
-    auth_client_mock: Mock, file_client_mock: Mock, to_csv_mock: Mock
+    credential_cache_mock: Mock, file_client_mock: Mock, to_csv_mock: Mock
 ) -> None:
     mock_google_creds = Mock(spec=Credentials)
     mock_google_creds.token = None
-    file_client_mock.get_gcs_file_system.return_value = LocalFileSystem()
-    auth_client_mock.fetch_google_credentials.return_value = mock_google_creds
+    file_client_mock.get_file_system.return_value = LocalFileSystem()
+    credential_cache_mock.fetch_google_credentials.return_value = mock_google_creds
     file_client_mock._ensure_gcs_uri_prefix.return_value = "gs://tests/output/test.csv"
     # Create pandas dataframe
     data = {"apples": [3, 2, 0, 1], "oranges": [0, 3, 7, 2]}
@@ -139,18 +139,21 @@ def test_write_csv_format(
     to_csv_mock.assert_called_with(
         "gs://tests/output/test.csv", storage_options={"token": mock_google_creds}
     )
+    file_client_mock._update_listing_cache.assert_called_once_with(
+        "gs://tests/output/test.csv"
+    )
 
 
 @mock.patch("dapla.pandas.read_xml")
 @mock.patch("dapla.pandas.FileClient")
-@mock.patch("dapla.pandas.AuthClient")
+@mock.patch("dapla.pandas.CredentialCache")
 def test_read_xml_format(
-    auth_client_mock: Mock, file_client_mock: Mock, read_xml_mock: Mock
+    credential_cache_mock: Mock, file_client_mock: Mock, read_xml_mock: Mock
 ) -> None:
     mock_google_creds = Mock(spec=Credentials)
     mock_google_creds.token = None
-    file_client_mock.get_gcs_file_system.return_value = LocalFileSystem()
-    auth_client_mock.fetch_google_credentials.return_value = mock_google_creds
+    file_client_mock.get_file_system.return_value = LocalFileSystem()
+    credential_cache_mock.fetch_google_credentials.return_value = mock_google_creds
     file_client_mock._ensure_gcs_uri_prefix.return_value = (
         "gs://tests/data/students.xml"
     )
@@ -164,7 +167,7 @@ def test_read_xml_format(
 
 @mock.patch("dapla.pandas.FileClient")
 def test_read_partitioned_parquet(file_client_mock: Mock) -> None:
-    file_client_mock.get_gcs_file_system.return_value = LocalFileSystem()
+    file_client_mock.get_file_system.return_value = LocalFileSystem()
     file_client_mock._remove_gcs_uri_prefix.return_value = "tests/data/partition"
     file_client_mock._ensure_gcs_uri_prefix.return_value = "gs://tests/data/partition"
     result = read_pandas("tests/data/partition")
@@ -174,14 +177,14 @@ def test_read_partitioned_parquet(file_client_mock: Mock) -> None:
 
 @mock.patch("dapla.pandas.DataFrame.to_xml")
 @mock.patch("dapla.pandas.FileClient")
-@mock.patch("dapla.pandas.AuthClient")
+@mock.patch("dapla.pandas.CredentialCache")
 def test_write_xml_format(
-    auth_client_mock: Mock, file_client_mock: Mock, to_xml_mock: Mock
+    credential_cache_mock: Mock, file_client_mock: Mock, to_xml_mock: Mock
 ) -> None:
     mock_google_creds = Mock(spec=Credentials)
     mock_google_creds.token = None
-    file_client_mock.get_gcs_file_system.return_value = LocalFileSystem()
-    auth_client_mock.fetch_google_credentials.return_value = mock_google_creds
+    file_client_mock.get_file_system.return_value = LocalFileSystem()
+    credential_cache_mock.fetch_google_credentials.return_value = mock_google_creds
     file_client_mock._ensure_gcs_uri_prefix.return_value = "gs://tests/output/test.xml"
     # Create pandas dataframe
     data = {"apples": [3, 2, 0, 1], "oranges": [0, 3, 7, 2]}
@@ -195,13 +198,13 @@ def test_write_xml_format(
     )
 
 
-@mock.patch("dapla.pandas.AuthClient")
-def test_get_storage_options(auth_client_mock: Mock) -> None:
-    auth_client_mock.fetch_google_credentials.return_value = Credentials(
+@mock.patch("dapla.pandas.CredentialCache")
+def test_get_storage_options(credential_cache_mock: Mock) -> None:
+    credential_cache_mock.fetch_google_credentials.return_value = Credentials(
         token="dummy_token",
         token_uri="https://oauth2.googleapis.com/token",
     )
-    auth_client_mock._is_oidc_token.return_value = True
+    credential_cache_mock._is_oidc_token.return_value = True
 
     result = _get_storage_options()
     assert result is not None
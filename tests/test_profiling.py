@@ -0,0 +1,103 @@
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import patch
+
+import gcsfs
+import pytest
+from fsspec.asyn import sync
+
+import dapla
+from dapla import profiling
+from dapla.gcs import GCSFileSystem
+
+
+class Clock:
+    """Stands in for time.perf_counter, moved forward by the tests."""
+
+    def __init__(self) -> None:
+        """Start at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Iterator[Clock]:
+    clock = Clock()
+    with patch("dapla.profiling.time.perf_counter", clock):
+        yield clock
+
+
+def test_time_is_split_between_categories(clock: Clock) -> None:
+    with dapla.profile(show=False) as p:
+        with profiling.span("pandas", "outer"):
+            clock.now += 1
+            with profiling.span("arrow", "inner"):
+                clock.now += 2
+                profiling.io_started()
+                clock.now += 3
+                profiling.io_finished("read", "bucket/a", 3.0, bytes_in=10)
+            clock.now += 1
+
+    assert p.wall == 7
+    assert p.seconds == {
+        "gcs": 3,
+        "arrow": 2,
+        "pandas": 2,
+        "auth": 0,
+        "service": 0,
+    }
+    assert p.other == 0
+    assert [call.name for call in p.slowest] == ["read", "outer", "inner"]
+    assert p.bytes_by_path == {"bucket/a": (10, 0)}
+
+
+def test_concurrent_requests_are_not_counted_twice(clock: Clock) -> None:
+    with dapla.profile(show=False) as p:
+        profiling.io_started()
+        clock.now += 1
+        profiling.io_started()
+        clock.now += 1
+        profiling.io_finished("read", "bucket/a", 2.0)
+        clock.now += 1
+        profiling.io_finished("read", "bucket/b", 2.0)
+        clock.now += 1
+
+    assert p.seconds["gcs"] == 3
+    assert p.other == 1
+
+
+def test_profiled_functions_and_report(capsys: pytest.CaptureFixture[str]) -> None:
+    @profiling.profiled("service")
+    def call_service() -> str:
+        return "ok"
+
+    assert call_service() == "ok"
+    with dapla.profile(top=1):
+        call_service()
+
+    out = capsys.readouterr().out
+    assert out.startswith("Profile of")
+    assert "test_profiled_functions_and_report.<locals>.call_service" in out
+
+
+def test_gcs_requests_are_profiled(gcs_fs: GCSFileSystem) -> None:
+    async def call(
+        self: Any, *args: Any, **kwargs: Any
+    ) -> tuple[dict[str, str], bytes]:
+        return {}, b"abc"
+
+    url = "https://storage.googleapis.com/download/storage/v1/b/bucket/o/dir%2Fa.csv?alt=media"
+    with patch.object(gcsfs.GCSFileSystem, "_call", call), dapla.profile(
+        show=False
+    ) as p:
+        sync(gcs_fs.loop, gcs_fs._call, "GET", url)
+        sync(gcs_fs.loop, gcs_fs._call, "GET", "b/{}/o/{}", "bucket", "dir/b.csv")
+
+    assert p.bytes_by_path == {"bucket/dir/a.csv": (3, 0)}
+    assert sorted((call.name, call.path) for call in p.slowest) == [
+        ("info", "bucket/dir/b.csv"),
+        ("read", "bucket/dir/a.csv"),
+    ]
@@ -0,0 +1,105 @@
+import asyncio
+from unittest.mock import patch
+
+import gcsfs
+import pytest
+
+from dapla.gcs import GCSFileSystem
+from dapla.read_policy import HEDGE_PERCENTILE_ENV
+from dapla.read_policy import READ_DEADLINE_ENV
+from dapla.read_policy import ReadPolicy
+
+
+class SlowFirstRequest:
+    """Answers the first request after `delay` seconds and every later one immediately."""
+
+    def __init__(self, delay: float) -> None:
+        """Set the delay of the first request."""
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self) -> bytes:
+        self.calls += 1
+        if self.calls == 1:
+            await asyncio.sleep(self.delay)
+            return b"primary"
+        return b"hedge"
+
+
+def test_slow_read_is_hedged() -> None:
+    policy = ReadPolicy(initial_hedge_delay=0.01)
+
+    result = asyncio.run(policy.run(SlowFirstRequest(delay=5)))
+
+    assert result == b"hedge"
+    assert policy.stats() == {
+        "reads": 1,
+        "hedges": 1,
+        "hedge_wins": 1,
+        "deadline_exceeded": 0,
+    }
+
+
+def test_hedge_delay_follows_percentile() -> None:
+    policy = ReadPolicy(hedge_percentile=50, min_hedge_delay=0, min_samples=4)
+
+    async def fetch() -> bytes:
+        return b""
+
+    async def main() -> None:
+        for _ in range(4):
+            await policy.run(fetch)
+
+    assert policy.hedge_delay() == policy.initial_hedge_delay
+    asyncio.run(main())
+    assert policy.hedge_delay() < 0.1
+
+
+def test_retry_budget_limits_hedges() -> None:
+    policy = ReadPolicy(retry_budget=0, initial_hedge_delay=0.001)
+
+    async def main() -> None:
+        for _ in range(15):
+            await policy.run(SlowFirstRequest(delay=0.05))
+
+    asyncio.run(main())
+
+    assert policy.stats()["hedges"] == 10
+
+
+def test_deadline_bounds_read() -> None:
+    policy = ReadPolicy(hedge_percentile=None, deadline=0.05)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(policy.run(SlowFirstRequest(delay=5)))
+
+    assert policy.stats()["deadline_exceeded"] == 1
+
+
+def test_filesystem_reads_use_policy(gcs_fs: GCSFileSystem) -> None:
+    gcs_fs.read_policy = ReadPolicy(initial_hedge_delay=0.01)
+    fetch = SlowFirstRequest(delay=5)
+
+    async def cat_file(self: gcsfs.GCSFileSystem, path: str, **kwargs: object) -> bytes:
+        return await fetch()
+
+    with patch.object(gcsfs.GCSFileSystem, "_cat_file", cat_file):
+        assert gcs_fs.cat_file("bucket/file.csv", start=0, end=10) == b"hedge"
+
+
+def test_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(HEDGE_PERCENTILE_ENV, raising=False)
+    monkeypatch.delenv(READ_DEADLINE_ENV, raising=False)
+    assert ReadPolicy.from_env() is None
+
+    monkeypatch.setenv(READ_DEADLINE_ENV, "30")
+    policy = ReadPolicy.from_env()
+    assert policy is not None
+    assert (policy.hedge_percentile, policy.deadline) == (None, 30)
+
+    monkeypatch.setenv(HEDGE_PERCENTILE_ENV, "99")
+    policy = ReadPolicy.from_env()
+    assert policy is not None
+    assert (policy.hedge_percentile, policy.deadline) == (99, 30)
+    with pytest.raises(ValueError):
+        ReadPolicy(hedge_percentile=0)
@@ -0,0 +1,82 @@
+import datetime
+from typing import Any
+from unittest.mock import Mock
+from unittest.mock import patch
+
+import pytest
+
+from dapla.gcs import GCSFileSystem
+from dapla.restore import RestoreResult
+from dapla.restore import restore_prefix
+from tests.conftest import FakeVersionsEndpoint
+from tests.conftest import version
+
+AS_OF = datetime.datetime(2024, 1, 2, tzinfo=datetime.timezone.utc)
+
+
+@pytest.fixture
+def items() -> list[dict[str, Any]]:
+    return [
+        # Overwritten after the restore time
+        version("data/a.csv", "1", 1, timeDeleted="2024-01-03T00:00:00.000Z"),
+        version("data/a.csv", "2", 3),
+        # Unchanged since before the restore time
+        version("data/b.csv", "3", 1),
+        # Created after the restore time
+        version("data/c.csv", "4", 3),
+        # Deleted after the restore time
+        version("data/d.csv", "5", 1, timeDeleted="2024-01-04T00:00:00.000Z"),
+    ]
+
+
+def test_restore_prefix_with_versioning(
+    gcs_fs: GCSFileSystem, items: list[dict[str, Any]]
+) -> None:
+    gcs_fs._call = FakeVersionsEndpoint(True, items)  # type: ignore [method-assign]
+
+    plan = restore_prefix(gcs_fs, "gs://bucket", "data/", AS_OF, dry_run=True)
+    assert plan == RestoreResult(
+        {"bucket/data/a.csv": "1", "bucket/data/d.csv": "5"},
+        {},
+        ["bucket/data/b.csv"],
+        ["bucket/data/c.csv"],
+        True,
+    )
+    # The versions come from a single paginated listing
+    assert [r[1] for r in gcs_fs._call.requests] == ["b/{}"] + ["b/{}/o"] * 5
+
+    result = restore_prefix(gcs_fs, "bucket", "data/", AS_OF)
+
+    assert result.restored == plan.restored
+    rewrites = [r[2] for r in gcs_fs._call.requests if "rewriteTo" in r[1]]
+    assert sorted(r["sourceGeneration"] for r in rewrites) == ["1", "5"]
+
+
+def test_restore_prefix_with_soft_delete(
+    gcs_fs: GCSFileSystem, items: list[dict[str, Any]]
+) -> None:
+    rm_many = Mock(return_value={"bucket/data/c.csv": None})
+    for item in items:
+        if "timeDeleted" in item:
+            item["softDeleteTime"] = item.pop("timeDeleted")
+    gcs_fs._call = FakeVersionsEndpoint(False, items)  # type: ignore [method-assign]
+
+    with pytest.raises(ValueError):
+        restore_prefix(gcs_fs, "bucket", "data/", AS_OF.replace(tzinfo=None))
+
+    with patch("dapla.restore.rm_many", rm_many):
+        result = restore_prefix(
+            gcs_fs, "bucket", "data/", AS_OF, delete_newer=True, max_concurrency=1
+        )
+
+    assert result.restored == {"bucket/data/a.csv": "1", "bucket/data/d.csv": "5"}
+    assert result.deleted == {"bucket/data/c.csv": None}
+    assert rm_many.call_args.args[1] == ["bucket/data/c.csv"]
+    assert result.newer == []
+    changes = [(r[0], r[2]) for r in gcs_fs._call.requests if r[0] != "GET"]
+    # The live version of a.csv is deleted before the old one is restored
+    assert changes[:3] == [
+        ("DELETE", {"ifGenerationMatch": "2"}),
+        ("POST", {"json_out": True, "generation": "1"}),
+        ("POST", {"json_out": True, "generation": "5"}),
+    ]
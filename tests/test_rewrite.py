@@ -0,0 +1,110 @@
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from dapla.gcs import GCSFileSystem
+from dapla.rewrite import TreeProgress
+from dapla.rewrite import copy_tree
+from dapla.rewrite import move_tree
+
+SOURCES: dict[str, dict[str, Any]] = {
+    "src-bucket/data/a.parquet": {"size": 30, "generation": "1", "type": "file"},
+    "src-bucket/data/sub/b.parquet": {"size": 5, "generation": "2", "type": "file"},
+}
+
+
+class FakeRewriteEndpoint:
+    """Answers rewrite requests 10 bytes at a time, optionally failing after a number of requests."""
+
+    def __init__(self, fail_after: int | None = None) -> None:
+        """Set the number of requests to answer before failing."""
+        self.fail_after = fail_after
+        self.requests: list[dict[str, Any]] = []
+
+    async def __call__(self, method: str, path: str, *args: str, **kwargs: Any) -> Any:
+        if self.fail_after is not None and len(self.requests) >= self.fail_after:
+            raise ConnectionError("Interrupted")
+        self.requests.append({"args": args, **kwargs})
+        size = SOURCES["/".join(args[:2])]["size"]
+        rewritten = int(kwargs["rewriteToken"] or 0) + 10
+        if rewritten < size:
+            return {
+                "totalBytesRewritten": rewritten,
+                "done": False,
+                "rewriteToken": str(rewritten),
+            }
+        return {
+            "totalBytesRewritten": size,
+            "done": True,
+            "resource": {"name": args[3], "size": str(size)},
+        }
+
+
+@pytest.fixture
+def fs(gcs_fs: GCSFileSystem) -> Iterator[GCSFileSystem]:
+    with patch.object(gcs_fs, "find", return_value=SOURCES):
+        yield gcs_fs
+
+
+def test_copy_tree_follows_rewrite_tokens(fs: GCSFileSystem) -> None:
+    fs._call = FakeRewriteEndpoint()  # type: ignore [method-assign]
+    updates: list[TreeProgress] = []
+
+    result = copy_tree(
+        fs, "gs://src-bucket/data", "dst-bucket/copy/", progress=updates.append
+    )
+
+    assert result == {
+        "src-bucket/data/a.parquet": "dst-bucket/copy/a.parquet",
+        "src-bucket/data/sub/b.parquet": "dst-bucket/copy/sub/b.parquet",
+    }
+    assert len(fs._call.requests) == 4
+    assert all(r["sourceGeneration"] in ("1", "2") for r in fs._call.requests)
+    assert updates[-1] == TreeProgress(2, 2, 35, 35)
+
+
+def test_copy_tree_of_a_single_object(gcs_fs: GCSFileSystem) -> None:
+    gcs_fs._call = FakeRewriteEndpoint()  # type: ignore [method-assign]
+    source = "src-bucket/data/sub/b.parquet"
+
+    with patch.object(
+        gcs_fs, "find", return_value={source: SOURCES[source]}
+    ) as mock_find:
+        result = copy_tree(gcs_fs, f"gs://{source}", "dst-bucket/copy")
+
+    mock_find.assert_called_once_with(source, detail=True)
+    assert result == {source: "dst-bucket/copy/b.parquet"}
+
+
+def test_copy_tree_resumes_from_checkpoint(fs: GCSFileSystem, tmp_path: Path) -> None:
+    checkpoint = str(tmp_path / "copy.jsonl")
+    fs._call = FakeRewriteEndpoint(fail_after=2)  # type: ignore [method-assign]
+    first = copy_tree(fs, "src-bucket/data", "dst-bucket/copy", 1, checkpoint)
+    assert any(isinstance(r, ConnectionError) for r in first.values())
+
+    fs._call = FakeRewriteEndpoint()  # type: ignore [method-assign]
+    second = copy_tree(fs, "src-bucket/data", "dst-bucket/copy", 1, checkpoint)
+
+    assert not any(isinstance(r, Exception) for r in second.values())
+    # One more request finishes the large object from its saved token, one copies the small object
+    assert [r["rewriteToken"] for r in fs._call.requests] == ["20", None]
+
+    with pytest.raises(ValueError):
+        copy_tree(fs, "src-bucket/data", "dst-bucket/elsewhere", checkpoint=checkpoint)
+
+
+def test_move_tree_deletes_copied_sources(fs: GCSFileSystem) -> None:
+    fs._call = FakeRewriteEndpoint()  # type: ignore [method-assign]
+    with patch("dapla.rewrite.rm_many") as rm_many:
+        rm_many.return_value = {
+            "src-bucket/data/a.parquet": None,
+            "src-bucket/data/sub/b.parquet": PermissionError("Forbidden"),
+        }
+        result = move_tree(fs, "src-bucket/data", "dst-bucket/moved")
+
+    assert sorted(rm_many.call_args.args[1]) == list(SOURCES)
+    assert result["src-bucket/data/a.parquet"] == "dst-bucket/moved/a.parquet"
+    assert isinstance(result["src-bucket/data/sub/b.parquet"], PermissionError)
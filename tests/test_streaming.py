@@ -0,0 +1,132 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fsspec import AbstractFileSystem
+from fsspec.implementations.local import LocalFileSystem
+from fsspec.spec import AbstractBufferedFile
+
+from dapla.streaming import AccessPattern
+from dapla.streaming import iter_chunks
+from dapla.streaming import iter_lines
+from dapla.streaming import open_with_access
+from tests.conftest import MemoryAsyncFileSystem
+
+TEXT = "første linje\r\nandre linje\n\nsiste linje"
+
+
+@pytest.fixture
+def fs(memory_fs: MemoryAsyncFileSystem) -> MemoryAsyncFileSystem:
+    memory_fs.pipe_file("/bucket/log.txt", TEXT.encode())
+    return memory_fs
+
+
+@pytest.mark.parametrize("readahead", [0, 2])
+def test_iter_lines_across_chunk_boundaries(
+    fs: MemoryAsyncFileSystem, readahead: int
+) -> None:
+    lines = list(iter_lines(fs, "/bucket/log.txt", chunk_size=3, readahead=readahead))
+
+    assert lines == ["første linje", "andre linje", "", "siste linje"]
+
+
+def test_iter_lines_joins_a_line_spanning_many_chunks(
+    memory_fs: MemoryAsyncFileSystem,
+) -> None:
+    memory_fs.pipe_file("/bucket/long.txt", b"x" * 1000 + b"\r\nend")
+
+    lines = list(iter_lines(memory_fs, "/bucket/long.txt", chunk_size=7))
+
+    assert lines == ["x" * 1000, "end"]
+
+
+def test_iter_chunks_decodes_split_characters(fs: MemoryAsyncFileSystem) -> None:
+    # The two bytes of "ø" end up in different chunks
+    chunks = list(iter_chunks(fs, "/bucket/log.txt", chunk_size=3, encoding="utf-8"))
+
+    assert all(len(chunk.encode()) <= 4 for chunk in chunks)
+    assert "".join(chunks) == TEXT
+
+
+def test_iter_chunks_bytes_with_readahead(fs: MemoryAsyncFileSystem) -> None:
+    chunks = list(iter_chunks(fs, "/bucket/log.txt", chunk_size=5, readahead=1))
+
+    assert all(len(chunk) == 5 for chunk in chunks[:-1])
+    assert b"".join(chunks) == TEXT.encode()
+
+
+def test_iter_chunks_readahead_raises_errors(fs: MemoryAsyncFileSystem) -> None:
+    with pytest.raises(FileNotFoundError):
+        list(iter_chunks(fs, "/bucket/missing.txt", readahead=1))
+    with pytest.raises(ValueError):
+        list(iter_chunks(fs, "/bucket/log.txt", chunk_size=0))
+
+
+class BytesFile(AbstractBufferedFile):  # type: ignore [misc]
+    def _fetch_range(self, start: int, end: int) -> bytes:
+        return self.fs.data[self.path][start:end]  # type: ignore [no-any-return]
+
+
+class BytesFileSystem(AbstractFileSystem):  # type: ignore [misc]
+    """Filesystem returning fsspec buffered files, like GCS does."""
+
+    protocol = "bytesfs"
+
+    def __init__(self, data: dict[str, bytes]) -> None:
+        """Serve the given file contents."""
+        super().__init__(skip_instance_cache=True)
+        self.data = data
+
+    def _open(self, path: str, mode: str = "rb", **kwargs: Any) -> BytesFile:
+        kwargs.pop("autocommit", None)
+        return BytesFile(self, path, mode, size=len(self.data[path]), **kwargs)
+
+
+@pytest.mark.parametrize(
+    ("access", "cache_name", "fetched"),
+    [
+        ("sequential", "background", 32 * 2**20),
+        ("random", "blockcache", 2**20),
+        ("whole", "all", 48 * 2**20),
+    ],
+)
+def test_open_with_access_reports_read_stats(
+    access: str, cache_name: str, fetched: int
+) -> None:
+    fs = BytesFileSystem({"/data.bin": bytes(48 * 2**20)})
+
+    with open_with_access(fs, "/data.bin", "rb", access) as f:
+        assert f.cache.name == cache_name
+        assert len(f.read(100)) == 100
+        if access == "sequential":
+            # The block after the first one is fetched ahead in the background
+            f.cache._fetch_future.result()
+
+    assert f.read_stats.consumed == 100
+    assert f.read_stats.fetched == fetched
+
+
+def test_open_with_access_reports_read_stats_without_a_cache(
+    memory_fs: MemoryAsyncFileSystem, tmp_path: Path
+) -> None:
+    memory_fs.pipe_file("/bucket/data.bin", bytes(100))
+    (tmp_path / "data.bin").write_bytes(bytes(100))
+
+    for fs, path in [
+        (memory_fs.sync_fs, "/bucket/data.bin"),
+        (LocalFileSystem(), str(tmp_path / "data.bin")),
+    ]:
+        with open_with_access(fs, path, "rb", "sequential") as f:
+            assert len(f.read(30)) == 30
+
+        assert f.read_stats.consumed == 30
+        assert f.read_stats.fetched == 30
+
+
+def test_open_with_access_rejects_write_modes() -> None:
+    fs = BytesFileSystem({})
+
+    with pytest.raises(ValueError):
+        open_with_access(fs, "/data.bin", "wb", AccessPattern.SEQUENTIAL)
+    with pytest.raises(ValueError):
+        open_with_access(fs, "/data.bin", "rb", "backwards")
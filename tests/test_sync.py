@@ -0,0 +1,134 @@
+import base64
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock
+
+import google_crc32c
+import pytest
+
+from dapla import sync as dapla_sync
+from dapla.sync import sync_dirs
+from dapla.transfer import file_crc32c
+from tests.conftest import MemoryAsyncFileSystem
+
+
+@pytest.fixture
+def fs(
+    memory_fs: MemoryAsyncFileSystem, monkeypatch: pytest.MonkeyPatch
+) -> MemoryAsyncFileSystem:
+    find = memory_fs.find
+
+    def find_with_checksums(path: str, **kwargs: Any) -> dict[str, dict[str, Any]]:
+        # Like GCS, report the crc32c of every object in the listing
+        return {
+            name: {
+                **info,
+                "crc32c": base64.b64encode(
+                    google_crc32c.Checksum(memory_fs.cat(name)).digest()
+                ).decode(),
+            }
+            for name, info in find(path, **kwargs).items()
+        }
+
+    monkeypatch.setattr(memory_fs, "find", find_with_checksums)
+    memory_fs.pipe({"/bucket/out/a.txt": b"same", "/bucket/out/old.txt": b"remove me"})
+    return memory_fs
+
+
+@pytest.fixture
+def local_dir(tmp_path: Path) -> Path:
+    (tmp_path / "data" / "sub").mkdir(parents=True)
+    (tmp_path / "data" / "a.txt").write_bytes(b"same")
+    (tmp_path / "data" / "sub" / "b.txt").write_bytes(b"new")
+    return tmp_path / "data"
+
+
+def test_sync_to_gcs_uploads_changed_files(
+    fs: MemoryAsyncFileSystem,
+    local_dir: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    index = str(tmp_path / "index.json")
+    rm_many = Mock(return_value={"/bucket/out/old.txt": None})
+    monkeypatch.setattr(dapla_sync, "rm_many", rm_many)
+
+    plan = sync_dirs(
+        fs,
+        str(local_dir),
+        "/bucket/out",
+        True,
+        delete=True,
+        dry_run=True,
+        hash_index=index,
+    )
+    assert plan.transferred == {
+        str(local_dir / "sub" / "b.txt"): "/bucket/out/sub/b.txt"
+    }
+    assert plan.deleted == {"/bucket/out/old.txt": None}
+    assert plan.unchanged == ["a.txt"]
+    assert not fs.exists("/bucket/out/sub/b.txt")
+
+    # The checksum of a.txt comes from the hash index the second time
+    crc32c = Mock(side_effect=file_crc32c)
+    monkeypatch.setitem(dapla_sync._CHECKSUMS, "crc32c", crc32c)
+    result = sync_dirs(
+        fs, str(local_dir), "/bucket/out", True, delete=True, hash_index=index
+    )
+
+    crc32c.assert_not_called()
+    assert result.transferred == plan.transferred
+    assert fs.cat("/bucket/out/sub/b.txt") == b"new"
+    rm_many.assert_called_once()
+    assert rm_many.call_args.args[1] == ["/bucket/out/old.txt"]
+
+
+def test_sync_from_gcs_downloads_and_deletes(
+    fs: MemoryAsyncFileSystem, local_dir: Path, tmp_path: Path
+) -> None:
+    (local_dir / "a.txt").write_bytes(b"edit")
+
+    result = sync_dirs(
+        fs,
+        str(local_dir),
+        "/bucket/out",
+        False,
+        delete=True,
+        hash_index=str(tmp_path / "index.json"),
+    )
+
+    assert set(result.transferred) == {"/bucket/out/a.txt", "/bucket/out/old.txt"}
+    assert result.deleted == {str(local_dir / "sub" / "b.txt"): None}
+    assert (local_dir / "a.txt").read_bytes() == b"same"
+    assert (local_dir / "old.txt").read_bytes() == b"remove me"
+    assert not (local_dir / "sub" / "b.txt").exists()
+
+
+def test_sync_refuses_a_missing_or_empty_source(
+    fs: MemoryAsyncFileSystem, local_dir: Path, tmp_path: Path
+) -> None:
+    index = str(tmp_path / "index.json")
+    empty_dir = tmp_path / "empty"
+    empty_dir.mkdir()
+
+    with pytest.raises(FileNotFoundError):
+        sync_dirs(fs, str(tmp_path / "missing"), "/bucket/out", True, hash_index=index)
+    with pytest.raises(FileNotFoundError):
+        sync_dirs(fs, str(local_dir), "/bucket/missing", False, hash_index=index)
+    with pytest.raises(ValueError, match="allow_empty_source"):
+        sync_dirs(
+            fs, str(empty_dir), "/bucket/out", True, delete=True, hash_index=index
+        )
+    assert fs.exists("/bucket/out/old.txt")
+
+    result = sync_dirs(
+        fs,
+        str(empty_dir),
+        "/bucket/out",
+        True,
+        delete=True,
+        dry_run=True,
+        hash_index=index,
+        allow_empty_source=True,
+    )
+    assert set(result.deleted) == {"/bucket/out/a.txt", "/bucket/out/old.txt"}
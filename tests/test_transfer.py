@@ -0,0 +1,229 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fsspec.asyn import AsyncFileSystem
+from fsspec.asyn import sync
+
+from dapla import transfer as dapla_transfer
+from dapla.transfer import cat_many
+from dapla.transfer import download
+from dapla.transfer import file_crc32c
+from dapla.transfer import get_many
+from dapla.transfer import iter_cat_many
+from dapla.transfer import put_composite
+from dapla.transfer import put_many
+from tests.conftest import MemoryAsyncFileSystem
+
+
+@pytest.fixture
+def fs(memory_fs: MemoryAsyncFileSystem) -> MemoryAsyncFileSystem:
+    memory_fs.pipe(
+        {
+            "/bucket/a/one.json": b'{"n": 1}',
+            "/bucket/a/two.json": b'{"n": 2}',
+            "/bucket/b/one.json": b'{"n": 3}',
+        }
+    )
+    return memory_fs
+
+
+def test_cat_many_collects_errors_per_file(fs: MemoryAsyncFileSystem) -> None:
+    result = cat_many(
+        fs,
+        ["/bucket/a/one.json", "/bucket/missing.json", "/bucket/b/one.json"],
+        max_concurrency=2,
+        encoding="utf-8",
+    )
+
+    assert result["/bucket/a/one.json"] == '{"n": 1}'
+    assert result["/bucket/b/one.json"] == '{"n": 3}'
+    assert isinstance(result["/bucket/missing.json"], FileNotFoundError)
+
+
+def test_iter_cat_many_ordered(fs: MemoryAsyncFileSystem) -> None:
+    paths = ["/bucket/b/one.json", "/bucket/a/two.json", "/bucket/a/one.json"]
+
+    result = list(iter_cat_many(fs, paths, max_concurrency=3, ordered=True))
+
+    assert [path for path, _ in result] == paths
+    assert result[0][1] == b'{"n": 3}'
+
+
+def test_iter_cat_many_rejects_invalid_concurrency(
+    fs: MemoryAsyncFileSystem,
+) -> None:
+    with pytest.raises(ValueError):
+        list(iter_cat_many(fs, ["/bucket/a/one.json"], max_concurrency=0))
+
+
+def test_get_many_keeps_relative_layout(
+    fs: MemoryAsyncFileSystem, tmp_path: Path
+) -> None:
+    result = get_many(fs, ["/bucket/a/one.json", "/bucket/b/one.json"], str(tmp_path))
+
+    assert result["/bucket/a/one.json"] == str(tmp_path / "a" / "one.json")
+    assert (tmp_path / "b" / "one.json").read_bytes() == b'{"n": 3}'
+
+
+def test_put_many_keeps_relative_layout(
+    fs: MemoryAsyncFileSystem, tmp_path: Path
+) -> None:
+    (tmp_path / "x").mkdir()
+    (tmp_path / "x" / "data.csv").write_bytes(b"a,b")
+    (tmp_path / "y.csv").write_bytes(b"c,d")
+
+    result = put_many(
+        fs, [str(tmp_path / "x" / "data.csv"), str(tmp_path / "y.csv")], "/bucket/up"
+    )
+
+    assert result[str(tmp_path / "x" / "data.csv")] == "/bucket/up/x/data.csv"
+    assert fs.cat("/bucket/up/y.csv") == b"c,d"
+
+
+def test_put_composite_uploads_slices_and_cleans_up(
+    fs: MemoryAsyncFileSystem, tmp_path: Path
+) -> None:
+    content = bytes(range(256)) * 1000
+    (tmp_path / "large.bin").write_bytes(content)
+
+    sync(
+        fs.loop,
+        put_composite,
+        fs,
+        str(tmp_path / "large.bin"),
+        "/bucket/large.bin",
+        slices=7,
+    )
+
+    assert fs.cat("/bucket/large.bin") == content
+    assert fs.ls("/bucket", detail=False) == [
+        "/bucket/a",
+        "/bucket/b",
+        "/bucket/large.bin",
+    ]
+
+
+def test_put_composite_leaves_no_parts_when_a_slice_fails(
+    fs: MemoryAsyncFileSystem, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "large.bin").write_bytes(bytes(700))
+    upload_slice = dapla_transfer._upload_slice
+
+    def fail_first_slice(
+        fs: AsyncFileSystem, lpath: str, rpath: str, offset: int, length: int
+    ) -> None:
+        if offset == 0:
+            raise OSError("upload failed")
+        # The other slices are still uploading when the first one fails
+        time.sleep(0.05)
+        upload_slice(fs, lpath, rpath, offset, length)
+
+    monkeypatch.setattr(dapla_transfer, "_upload_slice", fail_first_slice)
+
+    with pytest.raises(OSError, match="upload failed"):
+        sync(
+            fs.loop,
+            put_composite,
+            fs,
+            str(tmp_path / "large.bin"),
+            "/bucket/large.bin",
+            slices=7,
+        )
+    assert fs.ls("/bucket", detail=False) == ["/bucket/a", "/bucket/b"]
+
+
+def test_put_composite_rejects_too_many_slices(
+    fs: MemoryAsyncFileSystem, tmp_path: Path
+) -> None:
+    (tmp_path / "large.bin").write_bytes(b"data")
+
+    with pytest.raises(ValueError):
+        sync(
+            fs.loop,
+            put_composite,
+            fs,
+            str(tmp_path / "large.bin"),
+            "/bucket/large.bin",
+            slices=33,
+        )
+
+
+def test_download_in_slices(fs: MemoryAsyncFileSystem, tmp_path: Path) -> None:
+    content = bytes(range(256)) * 1000
+    fs.pipe("/bucket/large.bin", content)
+
+    local = sync(
+        fs.loop, download, fs, "/bucket/large.bin", str(tmp_path / "large.bin"), 5
+    )
+
+    assert Path(local).read_bytes() == content
+    assert list(tmp_path.iterdir()) == [tmp_path / "large.bin"]
+
+
+def test_download_verifies_crc32c(
+    fs: MemoryAsyncFileSystem, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    fs.pipe("/bucket/small.bin", b"content")
+    info = fs.info("/bucket/small.bin")
+
+    async def info_with_checksum(path: str, **kwargs: Any) -> dict[str, Any]:
+        return {**info, "crc32c": file_crc32c(__file__)}
+
+    monkeypatch.setattr(fs, "_info", info_with_checksum)
+
+    with pytest.raises(RuntimeError, match="crc32c mismatch"):
+        sync(fs.loop, download, fs, "/bucket/small.bin", str(tmp_path / "small.bin"))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failed_download_closes_the_file_after_the_last_write(
+    fs: MemoryAsyncFileSystem, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    fs.pipe("/bucket/large.bin", bytes(700))
+    monkeypatch.setattr(dapla_transfer, "_COPY_BUFFER_SIZE", 100)
+    fetch_range = dapla_transfer._fetch_range
+    pwrite = dapla_transfer._pwrite
+    close = os.close
+    events: list[str] = []
+
+    async def fail_last_range(
+        fs: AsyncFileSystem, path: str, generation: Any, start: int, end: int
+    ) -> bytes:
+        if start == 600:
+            # Fail while the writes of the other ranges are running
+            await asyncio.sleep(0.02)
+            raise OSError("download failed")
+        return await fetch_range(fs, path, generation, start, end)
+
+    def slow_pwrite(fd: int, data: bytes, offset: int) -> None:
+        time.sleep(0.05)
+        pwrite(fd, data, offset)
+        events.append("write")
+
+    def record_close(fd: int) -> None:
+        events.append("close")
+        close(fd)
+
+    monkeypatch.setattr(dapla_transfer, "_fetch_range", fail_last_range)
+    monkeypatch.setattr(dapla_transfer, "_pwrite", slow_pwrite)
+    monkeypatch.setattr(os, "close", record_close)
+
+    with pytest.raises(OSError, match="download failed"):
+        sync(fs.loop, download, fs, "/bucket/large.bin", str(tmp_path / "large.bin"), 7)
+    monkeypatch.undo()
+    time.sleep(0.1)
+
+    assert "write" in events
+    assert events[-1] == "close"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_file_crc32c_matches_gcs_encoding(tmp_path: Path) -> None:
+    (tmp_path / "hello.txt").write_bytes(b"hello world")
+
+    # Checksum as reported by GCS object metadata for the same content
+    assert file_crc32c(str(tmp_path / "hello.txt")) == "yZRlqg=="
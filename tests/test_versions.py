@@ -0,0 +1,125 @@
+import datetime
+import io
+from typing import Any
+
+import pandas as pd
+import pytest
+
+from dapla.gcs import GCSFileSystem
+from dapla.pandas import read_pandas
+from dapla.versions import generations_as_of
+from dapla.versions import open_as_of
+from dapla.versions import paths_as_of
+from tests.conftest import FakeVersionsEndpoint
+from tests.conftest import MemoryAsyncFileSystem
+from tests.conftest import version
+
+AS_OF = datetime.datetime(2024, 1, 2, tzinfo=datetime.timezone.utc)
+
+ITEMS = [
+    version("data/a.csv", "1", 1, timeDeleted="2024-01-03T00:00:00.000Z"),
+    version("data/a.csv", "2", 3),
+    version("data/_SUCCESS", "3", 1),
+    version("data/new.csv", "4", 3),
+    version("data2/other.csv", "5", 1),
+]
+
+
+@pytest.fixture
+def versioned_fs(
+    memory_fs: MemoryAsyncFileSystem, monkeypatch: pytest.MonkeyPatch
+) -> MemoryAsyncFileSystem:
+    # Stored under their versioned paths, as a version aware filesystem opens them
+    memory_fs.pipe(
+        {"/bucket/data/a.csv#1": b"n\n1\n", "/bucket/data/a.csv#2": b"n\n2\n"}
+    )
+    monkeypatch.setattr(
+        "dapla.versions.list_versions", lambda fs, bucket, prefix: (True, ITEMS)
+    )
+    return memory_fs
+
+
+def test_generations_as_of_resolves_once(gcs_fs: GCSFileSystem) -> None:
+    gcs_fs._call = FakeVersionsEndpoint(True, ITEMS)  # type: ignore [method-assign]
+
+    first = generations_as_of(gcs_fs, "gs://bucket/data", AS_OF)
+    second = generations_as_of(gcs_fs, "bucket/data/", AS_OF)
+
+    assert first == second == {"bucket/data/_SUCCESS": "3", "bucket/data/a.csv": "1"}
+    assert sum(r[1] == "b/{}" for r in gcs_fs._call.requests) == 1
+
+
+def test_generations_as_of_caches_per_filesystem_and_credentials(
+    gcs_fs: GCSFileSystem, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    listings: list[str] = []
+
+    def list_versions(
+        fs: GCSFileSystem, bucket: str, prefix: str
+    ) -> tuple[bool, list[dict[str, Any]]]:
+        listings.append(bucket)
+        return True, ITEMS
+
+    monkeypatch.setattr("dapla.versions.list_versions", list_versions)
+    other_fs = GCSFileSystem(token="anon", project="other", skip_instance_cache=True)
+
+    generations_as_of(gcs_fs, "bucket/data", AS_OF)
+    generations_as_of(gcs_fs, "bucket/data", AS_OF)
+    generations_as_of(other_fs, "bucket/data", AS_OF)
+    monkeypatch.setenv("GOOGLE_APPLICATION_CREDENTIALS", "/other/key.json")
+    generations_as_of(gcs_fs, "bucket/data", AS_OF)
+
+    assert len(listings) == 3
+
+
+def test_generations_as_of_rejects_soft_deleted_versions(
+    gcs_fs: GCSFileSystem,
+) -> None:
+    items: list[dict[str, Any]] = [
+        version("data/a.csv", "1", 1, softDeleteTime="2024-01-03T00:00:00.000Z"),
+        version("data/a.csv", "2", 3),
+    ]
+    gcs_fs._call = FakeVersionsEndpoint(False, items)  # type: ignore [method-assign]
+
+    with pytest.raises(FileNotFoundError, match="restore_prefix"):
+        generations_as_of(gcs_fs, "bucket/data", AS_OF)
+    with pytest.raises(ValueError):
+        generations_as_of(gcs_fs, "bucket/data", AS_OF.replace(tzinfo=None))
+
+
+def test_open_as_of_reads_past_version(versioned_fs: MemoryAsyncFileSystem) -> None:
+    with open_as_of(versioned_fs, "bucket/data/a.csv", AS_OF) as f:
+        assert f.read() == b"n\n1\n"
+    with pytest.raises(FileNotFoundError):
+        open_as_of(versioned_fs, "bucket/data/new.csv", AS_OF)
+    with pytest.raises(ValueError):
+        open_as_of(versioned_fs, "bucket/data/a.csv", AS_OF, mode="wb")
+
+
+def test_paths_as_of_skips_hidden_files(versioned_fs: MemoryAsyncFileSystem) -> None:
+    assert paths_as_of(versioned_fs, "bucket/data", AS_OF) == ["bucket/data/a.csv#1"]
+    with pytest.raises(FileNotFoundError):
+        paths_as_of(versioned_fs, "bucket/empty", AS_OF)
+
+
+def test_read_pandas_as_of(
+    versioned_fs: MemoryAsyncFileSystem, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    buffer = io.BytesIO()
+    pd.DataFrame({"n": [1]}).to_parquet(buffer)
+    versioned_fs.pipe("/bucket/data/a.parquet#6", buffer.getvalue())
+    items = [*ITEMS, version("data/a.parquet", "6", 1)]
+    monkeypatch.setattr(
+        "dapla.versions.list_versions", lambda fs, bucket, prefix: (True, items)
+    )
+    monkeypatch.setattr(
+        "dapla.pandas.FileClient.get_gcs_file_system", lambda **kwargs: versioned_fs
+    )
+
+    csv = read_pandas("bucket/data/a.csv", file_format="csv", as_of=AS_OF)
+    parquet = read_pandas(
+        ["gs://bucket/data/a.parquet"], file_format="parquet", as_of=AS_OF
+    )
+
+    assert csv["n"].tolist() == [1]
+    assert parquet["n"].tolist() == [1]